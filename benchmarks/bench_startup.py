@@ -0,0 +1,104 @@
+"""
+Startup Benchmark
+Measures cold-start time of the one-shot CLI commands.
+
+Each command is run in a fresh interpreter with `python -X importtime`.
+The script reports wall-clock time and the total import time, and fails
+if the median wall time goes over the budget.
+
+Run from the project root:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 100 --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One-shot commands that should feel instant
+COMMANDS = [
+    ['main.py', 'summary'],
+    ['main.py', 'streak'],
+]
+
+DEFAULT_BUDGET_MS = 100
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into per-module cumulative times.
+
+    Args:
+        stderr (str): Captured stderr of the run
+
+    Returns:
+        dict: Top-level module name -> cumulative import time in ms
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        # Nested imports are indented further; keep only top-level ones
+        if len(raw_name) - len(raw_name.lstrip()) == 1:
+            modules[raw_name.strip()] = int(cumulative_us) / 1000
+    return modules
+
+
+def run_command(args):
+    """
+    Run one command in a fresh interpreter.
+
+    Args:
+        args (list): Arguments after `python`
+
+    Returns:
+        tuple: (wall time in ms, dict of top-level import times in ms)
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    return wall_ms, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold-start benchmark")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=5, help="slowest imports to show")
+    args = parser.parse_args()
+
+    over_budget = False
+
+    for command in COMMANDS:
+        walls = []
+        imports = {}
+        for _ in range(args.runs):
+            wall_ms, imports = run_command(command)
+            walls.append(wall_ms)
+
+        median = statistics.median(walls)
+        status = "OK" if median <= args.budget_ms else "OVER BUDGET"
+        over_budget = over_budget or median > args.budget_ms
+
+        print(f"python {' '.join(command)}")
+        print(f"  median wall time: {median:.1f} ms (budget {args.budget_ms:.0f} ms) {status}")
+        print(f"  total import time: {sum(imports.values()):.1f} ms")
+        slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for name, ms in slowest:
+            print(f"    {ms:7.1f} ms  {name}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Benchmark Suite
+Times the parser, store, tracker, streak manager and full pipeline.
+
+Every case runs against a temporary data directory filled by the
+deterministic generator in synthetic.py, so real data is never touched.
+Results are written as JSON and can be compared against a stored
+baseline to catch regressions.
+
+Run from the project root:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1e3,1e5,1e7 --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --compare    # exit 1 on regression
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_sms_corpus, write_data_dir
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_SIZES = '1e3,1e4,1e5'
+
+# A case is a regression if it is this much slower than the baseline
+REGRESSION_THRESHOLD = 1.25
+
+
+def time_call(func, repeat, setup=None):
+    """
+    Time a function several times.
+
+    Args:
+        func (callable): Function with no arguments
+        repeat (int): Number of runs
+        setup (callable, optional): Called before each run, untimed, e.g.
+                                    to restore data the run changes
+
+    Returns:
+        dict: 'best' and 'mean' times in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return {'best': min(times), 'mean': sum(times) / len(times)}
+
+
+def bench_parser(corpus_size, repeat):
+    """Time parse_expense_amount over an SMS corpus."""
+    from logic.expense_parser import parse_expense_amount
+
+    corpus = make_sms_corpus(corpus_size)
+
+    def run():
+        for sms_text in corpus:
+            parse_expense_amount(sms_text)
+
+    return time_call(run, repeat), corpus_size
+
+
+def bench_store_cases(data_dir, size, repeat):
+    """
+    Time the ledger-backed functions for one ledger size.
+
+    Yields:
+        tuple: (case name, timing dict, operations per run)
+    """
+    from logic.expense_store import add_expense, load_expenses
+    from logic.daily_tracker import get_daily_total
+    from logic.streak_manager import check_and_update_streak, save_streak_data
+    from logic.pipeline import process_sms
+    from logic.spend_forecaster import discard_profile
+
+    def reset():
+        # Cases that write start every run from the same snapshot
+        write_data_dir(data_dir, size)
+        discard_profile()
+
+    reset()
+    yield 'load_expenses', time_call(load_expenses, repeat), 1
+    yield 'get_daily_total', time_call(get_daily_total, repeat), 1
+
+    yield 'add_expense', time_call(lambda: add_expense(120), repeat, setup=reset), 1
+
+    def clear_streak():
+        # Clear last_update_date so each run does the full update
+        save_streak_data({'current_streak': 0, 'last_update_date': None, 'best_streak': 0})
+
+    reset()
+    yield 'check_and_update_streak', time_call(check_and_update_streak, repeat, setup=clear_streak), 1
+
+    yield ('pipeline.process_sms',
+           time_call(lambda: process_sms("Rs.120 spent via UPI to Zomato"), repeat, setup=reset), 1)
+
+    yield 'main.process_expense', time_call(_process_expense_quietly, repeat, setup=reset), 1
+
+
+def _process_expense_quietly():
+    """Run main.process_expense with its console output discarded."""
+    import main
+    from interface.mobile_actions import flush_notifications
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.process_expense()
+        flush_notifications()
+
+
+def run_suite(sizes, corpus_sizes, repeat):
+    """
+    Run every benchmark case.
+
+    Args:
+        sizes (list): Ledger sizes (number of expenses)
+        corpus_sizes (list): SMS corpus sizes
+        repeat (int): Runs per case
+
+    Returns:
+        list: Result dictionaries with 'name', 'size', 'best', 'mean'
+              and 'per_op' keys (seconds)
+    """
+    # Fixed seed for the SMS stub used by main.process_expense
+    random.seed(0)
+    results = []
+
+    for corpus_size in corpus_sizes:
+        timing, ops = bench_parser(corpus_size, repeat)
+        results.append(_result('parse_expense_amount', corpus_size, timing, ops))
+
+    data_dir = tempfile.mkdtemp(prefix='spendwise-bench-')
+    previous = os.environ.get('SPENDWISE_DATA_DIR')
+    os.environ['SPENDWISE_DATA_DIR'] = data_dir
+
+    try:
+        for size in sizes:
+            for name, timing, ops in bench_store_cases(data_dir, size, repeat):
+                results.append(_result(name, size, timing, ops))
+                print(f"  {name:<28} n={size:<10} best {timing['best'] * 1000:10.3f} ms",
+                      file=sys.stderr)
+    finally:
+        if previous is None:
+            del os.environ['SPENDWISE_DATA_DIR']
+        else:
+            os.environ['SPENDWISE_DATA_DIR'] = previous
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    return results
+
+
+def _result(name, size, timing, ops):
+    """Build one result dictionary."""
+    return {
+        'name': name,
+        'size': size,
+        'best': timing['best'],
+        'mean': timing['mean'],
+        'per_op': timing['best'] / ops
+    }
+
+
+def compare(results, baseline):
+    """
+    Compare results against a baseline.
+
+    Args:
+        results (list): Current results
+        baseline (list): Baseline results
+
+    Returns:
+        list: (name, size, ratio) for every case slower than the threshold
+    """
+    previous = {(item['name'], item['size']): item for item in baseline}
+    regressions = []
+
+    for item in results:
+        base = previous.get((item['name'], item['size']))
+        if base is None or base['best'] <= 0:
+            continue
+        ratio = item['best'] / base['best']
+        flag = "REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"  {item['name']:<28} n={item['size']:<10} {ratio:6.2f}x {flag}")
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append((item['name'], item['size'], ratio))
+
+    return regressions
+
+
+def parse_sizes(text):
+    """Parse a comma-separated list like '1e3,1e5' into ints."""
+    return [int(float(part)) for part in text.split(',') if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SpendWise benchmark suite")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help="ledger sizes in expenses, e.g. 1e3,1e5,1e7")
+    parser.add_argument('--corpus-sizes', default='1e3,1e4',
+                        help="SMS corpus sizes for the parser benchmark")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="write results JSON to this file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store these results as the new baseline")
+    parser.add_argument('--compare', action='store_true',
+                        help="compare with the baseline and exit 1 on regression")
+    args = parser.parse_args()
+
+    results = run_suite(parse_sizes(args.sizes), parse_sizes(args.corpus_sizes), args.repeat)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}", file=sys.stderr)
+            sys.exit(2)
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        print("Comparison with baseline:", file=sys.stderr)
+        regressions = compare(results, baseline)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
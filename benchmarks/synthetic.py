@@ -0,0 +1,96 @@
+"""
+Synthetic Data Generator
+Deterministic ledgers and SMS corpora for the benchmark suite.
+
+The same seed always produces the same data, so benchmark runs on
+different machines or commits measure the same work.
+"""
+
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+# Allow running from the benchmarks folder as well as the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interface.fake_device import SyntheticSmsGenerator
+
+
+# Average number of expenses per day in generated ledgers
+EXPENSES_PER_DAY = 8
+
+
+def make_ledger(expense_count, seed=0, end_date=None):
+    """
+    Build a ledger with a given number of expenses ending on end_date.
+
+    Args:
+        expense_count (int): Total number of expenses
+        seed (int): Random seed
+        end_date (str, optional): Last day in YYYY-MM-DD format.
+                                  If None, uses today's date.
+
+    Returns:
+        dict: Ledger in the expenses.json format (date -> list of amounts)
+    """
+    rng = random.Random(seed)
+    end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now()
+    day_count = max(1, expense_count // EXPENSES_PER_DAY)
+
+    ledger = {}
+    remaining = expense_count
+    for offset in range(day_count - 1, -1, -1):
+        date_str = (end - timedelta(days=offset)).strftime('%Y-%m-%d')
+        # Last day takes whatever is left so the total is exact
+        count = EXPENSES_PER_DAY if offset else remaining
+        count = min(count, remaining)
+        ledger[date_str] = [int(rng.lognormvariate(4.5, 0.9)) + 1 for _ in range(count)]
+        remaining -= count
+
+    return ledger
+
+
+def make_sms_corpus(message_count, seed=0):
+    """
+    Build a list of synthetic bank SMS.
+
+    Args:
+        message_count (int): Number of messages
+        seed (int): Random seed
+
+    Returns:
+        list: SMS text strings
+    """
+    generator = SyntheticSmsGenerator(seed=seed)
+    return [generator.next_body() for _ in range(message_count)]
+
+
+def write_data_dir(data_dir, expense_count, daily_limit=800, seed=0):
+    """
+    Write a complete data directory (expenses, config, streak).
+
+    Args:
+        data_dir (str): Directory to write into
+        expense_count (int): Number of expenses in the ledger
+        daily_limit (int): Daily limit to configure
+        seed (int): Random seed
+    """
+    os.makedirs(data_dir, exist_ok=True)
+
+    files = {
+        'expenses.json': make_ledger(expense_count, seed),
+        'config.json': {'daily_limit': daily_limit},
+        'streak.json': {'current_streak': 0, 'last_update_date': None, 'best_streak': 0},
+    }
+    for name, data in files.items():
+        with open(os.path.join(data_dir, name), 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+
+    # Start from a clean slate for optional state files
+    for name in ('alert_state.json', 'forecast_profile.json', 'outbox.json',
+                 'expense_meta.json', 'anomaly_state.json', 'commit_journal.json'):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
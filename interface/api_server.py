@@ -0,0 +1,319 @@
+"""
+API Server Module
+Small local HTTP server over the logic package.
+
+Keeps expenses, config and streak state warm in memory so other
+services on the host can query totals and budgets without starting a
+new interpreter. Listens on loopback TCP or on a Unix socket.
+
+Endpoints (all return JSON):
+    GET  /summary            Today's total, count, limit and remaining
+    GET  /limit?total=N      check_limit() for N (default: today's total)
+    GET  /remaining          Remaining budget for today
+    GET  /streak             Current and best streak
+    POST /ingest             {"sms": "..."} or {"messages": ["...", ...]}
+
+Run:
+    python main.py serve --port 8765
+    python main.py serve --unix /tmp/spendwise.sock
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from logic import metrics
+from logic.expense_store import get_expenses_file_path
+from logic.limit_checker import get_config_file_path
+from logic.streak_manager import get_streak_file_path
+from logic.pipeline import ExpenseTransaction, process_sms
+from logic.tenant import get_current_user, use_user
+
+
+# Largest POST body read into memory; bigger requests get a 400
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class ApiState:
+    """
+    Warm in-memory state shared by all request threads.
+
+    Read endpoints share one transaction, re-read only when the files'
+    modification times change, e.g. after `main.py set-limit` runs in
+    another process. Each ingest commits through its own transaction.
+    Serves whichever user was selected when it was created (see
+    tenant.use_user).
+    """
+
+    def __init__(self):
+        # Request threads don't inherit the caller's context
+        self.user_id = get_current_user()
+        self.lock = threading.Lock()
+        self.txn = ExpenseTransaction()
+        self._mtimes = self._read_mtimes()
+
+    def _read_mtimes(self):
+        """Get modification times of the state files."""
+        mtimes = []
+        with use_user(self.user_id):
+            paths = (get_expenses_file_path(), get_config_file_path(), get_streak_file_path())
+        for file_path in paths:
+            try:
+                mtimes.append(os.stat(file_path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return mtimes
+
+    def refresh(self):
+        """Reload state if another process changed the files. Call with lock held."""
+        mtimes = self._read_mtimes()
+        metrics.record_cache('api_state', mtimes == self._mtimes)
+        if mtimes != self._mtimes:
+            with use_user(self.user_id):
+                self.txn = ExpenseTransaction()
+            self._mtimes = mtimes
+
+    def summary(self):
+        """Today's spending summary."""
+        with self.lock:
+            self.refresh()
+            total = self.txn.get_daily_total()
+            limit = self.txn.daily_limit
+            return {
+                'total': total,
+                'count': self.txn.get_expense_count(),
+                'limit': limit,
+                'remaining': limit - total
+            }
+
+    def check_limit(self, total=None):
+        """Limit check for a total (today's total by default)."""
+        with self.lock:
+            self.refresh()
+            if total is None:
+                total = self.txn.get_daily_total()
+            return self.txn.check_limit(total)
+
+    def remaining(self):
+        """Remaining budget for today."""
+        with self.lock:
+            self.refresh()
+            return {'remaining': self.txn.daily_limit - self.txn.get_daily_total()}
+
+    def streak(self):
+        """Current and best streak."""
+        with self.lock:
+            self.refresh()
+            return {
+                'current_streak': self.txn.streak.get('current_streak', 0),
+                'best_streak': self.txn.streak.get('best_streak', 0)
+            }
+
+    def ingest(self, messages):
+        """Run SMS through the pipeline and commit once, or not at all."""
+        # A fresh transaction per request: it loads the latest files under
+        # the folder lock, and the cached one stays read-only
+        with use_user(self.user_id), ExpenseTransaction() as txn:
+            results = [process_sms(sms_text, txn) for sms_text in messages]
+
+        with self.lock:
+            # Make the next read reload, however coarse the mtimes are
+            self._mtimes = None
+
+        stored = [result for result in results if result is not None]
+        return {
+            'received': len(messages),
+            'stored': len(stored),
+            'daily_total': stored[-1]['daily_total'] if stored else None,
+            'alerts': [result['crossing'] for result in stored if result['crossing']]
+        }
+
+
+def parse_ingest_payload(payload):
+    """
+    Get the SMS texts from a POST /ingest body.
+
+    Args:
+        payload: Decoded JSON body
+
+    Returns:
+        list or None: Non-empty list of SMS texts, or None if the body
+                      isn't {"sms": str} or {"messages": [str, ...]}
+    """
+    if not isinstance(payload, dict):
+        return None
+
+    if 'messages' in payload:
+        messages = payload['messages']
+        if not isinstance(messages, list) or not all(isinstance(text, str) for text in messages):
+            return None
+    elif isinstance(payload.get('sms'), str):
+        messages = [payload['sms']]
+    else:
+        return None
+
+    return messages or None
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the shared ApiState."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm adds tens of milliseconds to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        state = self.server.state
+
+        if url.path == '/summary':
+            self._reply(200, state.summary())
+        elif url.path == '/limit':
+            query = parse_qs(url.query)
+            try:
+                total = int(query['total'][0]) if 'total' in query else None
+            except ValueError:
+                self._reply(400, {'error': 'total must be an integer'})
+                return
+            self._reply(200, state.check_limit(total))
+        elif url.path == '/remaining':
+            self._reply(200, state.remaining())
+        elif url.path == '/streak':
+            self._reply(200, state.streak())
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/ingest':
+            self._reply(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            # The body is left unread, so the connection can't be reused
+            self.close_connection = True
+            self._reply(400, {'error': f'Content-Length must be 0 to {MAX_BODY_BYTES}'})
+            return
+
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            self._reply(400, {'error': 'invalid JSON'})
+            return
+
+        messages = parse_ingest_payload(payload)
+        if messages is None:
+            self._reply(400, {'error': 'expected {"sms": "..."} or {"messages": ["..."]}'})
+            return
+
+        try:
+            result = self.server.state.ingest(messages)
+        except Exception as e:
+            self._reply(500, {'error': f'ingest failed: {e}'})
+            return
+        self._reply(200, result)
+
+    def _reply(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep the hot path quiet
+        pass
+
+
+class UnixApiRequestHandler(ApiRequestHandler):
+    """Request handler for Unix sockets, which have no TCP options."""
+
+    disable_nagle_algorithm = False
+
+
+class ApiServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server on loopback TCP."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=8765, state=None):
+        self.state = state or ApiState()
+        super().__init__((host, port), ApiRequestHandler)
+
+
+class UnixApiServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server on a Unix domain socket."""
+
+    daemon_threads = True
+    address_family = socket.AF_UNIX
+
+    def __init__(self, path, state=None):
+        self.state = state or ApiState()
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, UnixApiRequestHandler)
+
+    def server_bind(self):
+        # HTTPServer.server_bind expects a (host, port) address
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # Handlers expect a (host, port) style client address
+        return request, ('local', 0)
+
+
+def serve(host='127.0.0.1', port=8765, unix_path=None):
+    """
+    Start the API server and block until interrupted.
+
+    Args:
+        host (str): Address to bind for TCP (loopback by default)
+        port (int): TCP port
+        unix_path (str, optional): Serve on this Unix socket instead
+    """
+    if unix_path is not None:
+        server = UnixApiServer(unix_path)
+        where = unix_path
+    else:
+        server = ApiServer(host, port)
+        where = f"http://{host}:{server.server_address[1]}"
+
+    print(f"SpendWise API listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix_path is not None and os.path.exists(unix_path):
+            os.remove(unix_path)
+
+
+if __name__ == "__main__":
+    # Simple test: start on a free port and query it once
+    from urllib.request import urlopen
+
+    print("Testing API server...")
+
+    server = ApiServer(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    for endpoint in ('/summary', '/remaining', '/streak', '/limit?total=700'):
+        with urlopen(base + endpoint) as response:
+            print(f"GET {endpoint}: {json.loads(response.read())}")
+
+    server.shutdown()
@@ -0,0 +1,388 @@
+"""
+Fake Device Module
+Local stand-in for a phone that emits a stream of synthetic bank SMS.
+
+Used to load-test the ingest path offline. The device can run
+in-process (FakeDevice) or behind a loopback socket (FakeDeviceServer)
+with a matching FakeDeviceClient. Both expose fetch_sms_since(), the
+same call mobile_actions uses, so they can be plugged in with
+mobile_actions.set_sms_source().
+
+Run a load test:
+    python -m interface.fake_device --rate 10000 --total 50000
+"""
+
+import bisect
+import json
+import random
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+
+
+# Debit message templates per bank
+DEBIT_TEMPLATES = {
+    'HDFC': "Rs.{amount} debited from HDFC Bank A/c XX{acct} to {merchant} on {date}. Avl bal Rs.{balance}",
+    'SBI': "Your SBI A/c XX{acct} is debited by ₹{amount} for UPI payment to {merchant}. Ref {ref}",
+    'ICICI': "INR {amount} spent on ICICI Bank Card XX{acct} at {merchant} on {date}.",
+    'Axis': "₹{amount} paid to {merchant} from Axis Bank A/c XX{acct}. UPI Ref {ref}",
+    'Kotak': "Rs {amount} spent via Kotak Debit Card XX{acct} at {merchant}.",
+}
+
+# Credit message templates (the parser should skip these)
+CREDIT_TEMPLATES = [
+    "Rs.{amount} credited to your A/c XX{acct} by {merchant}. Avl bal Rs.{balance}",
+    "₹{amount} received from {merchant} in your A/c XX{acct} via UPI",
+    "INR {amount} deposited in A/c XX{acct} on {date}",
+]
+
+MERCHANTS = [
+    'Zomato', 'Swiggy', 'Amazon', 'Flipkart', 'Uber', 'Ola', 'Spotify',
+    'Netflix', 'BigBasket', 'Myntra', 'BookMyShow', 'IRCTC', 'Airtel',
+    'Jio', 'Starbucks', 'Dominos', 'Reliance Fresh', 'DMart',
+]
+
+
+class SyntheticSmsGenerator:
+    """
+    Deterministic generator of synthetic bank SMS bodies.
+
+    Mixes banks, debits and credits, and repeats recent messages to
+    mimic banks that send duplicate alerts.
+    """
+
+    def __init__(self, seed=0, credit_rate=0.15, duplicate_rate=0.05,
+                 banks=None, merchants=None):
+        """
+        Args:
+            seed (int): Random seed, so runs are repeatable
+            credit_rate (float): Share of messages that are credits
+            duplicate_rate (float): Share of messages that repeat a
+                                    recent message body
+            banks (list, optional): Bank names to use (keys of
+                                    DEBIT_TEMPLATES). Defaults to all.
+            merchants (list, optional): Merchant names to use
+        """
+        self.random = random.Random(seed)
+        self.credit_rate = credit_rate
+        self.duplicate_rate = duplicate_rate
+        self.banks = banks or list(DEBIT_TEMPLATES)
+        self.merchants = merchants or MERCHANTS
+        self._recent = []
+
+    def next_body(self):
+        """
+        Generate the next SMS body.
+
+        Returns:
+            str: SMS text
+        """
+        rng = self.random
+
+        if self._recent and rng.random() < self.duplicate_rate:
+            return rng.choice(self._recent)
+
+        if rng.random() < self.credit_rate:
+            template = rng.choice(CREDIT_TEMPLATES)
+        else:
+            template = DEBIT_TEMPLATES[rng.choice(self.banks)]
+
+        body = template.format(
+            # Mostly small everyday spends with the odd large one
+            amount=int(rng.lognormvariate(5, 1)) + 1,
+            merchant=rng.choice(self.merchants),
+            acct=rng.randint(1000, 9999),
+            ref=rng.randint(10 ** 11, 10 ** 12 - 1),
+            balance=rng.randint(1000, 100000),
+            date=datetime.now().strftime('%d-%m-%y'),
+        )
+
+        self._recent.append(body)
+        if len(self._recent) > 20:
+            self._recent.pop(0)
+
+        return body
+
+
+class FakeDevice:
+    """
+    In-process fake phone whose inbox fills at a configurable rate.
+
+    Messages arrive in bursts: each arrival event delivers between 1 and
+    burst_size messages, with event gaps chosen so the long-run average
+    matches `rate` messages per second.
+    """
+
+    def __init__(self, rate=1000.0, total=None, burst_size=1, generator=None):
+        """
+        Args:
+            rate (float or None): Average messages per second. None means
+                                  every message is available immediately.
+            total (int, optional): Stop after this many messages
+            burst_size (int): Largest number of messages per arrival event
+            generator (SyntheticSmsGenerator, optional): Message source
+
+        Raises:
+            ValueError: If rate is not positive, or if rate and total are
+                        both None (an endless inbox delivered at once)
+        """
+        if rate is None and total is None:
+            raise ValueError("total is required when rate is None")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be greater than 0")
+
+        self.rate = rate
+        self.total = total
+        self.burst_size = max(1, burst_size)
+        self.generator = generator or SyntheticSmsGenerator()
+
+        self._inbox = []
+        self._ids = []
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._next_arrival = None
+
+    def _deliver(self, count):
+        """Append `count` new messages to the inbox."""
+        now = time.time()
+        for _ in range(count):
+            if self.total is not None and self._next_id > self.total:
+                return
+            self._inbox.append({
+                'id': self._next_id,
+                'timestamp': datetime.fromtimestamp(now).isoformat(),
+                'arrived_at': now,
+                'body': self.generator.next_body()
+            })
+            self._ids.append(self._next_id)
+            self._next_id += 1
+
+    def _catch_up(self):
+        """Deliver every message whose arrival time has passed."""
+        if self.rate is None:
+            if self.total is not None:
+                self._deliver(self.total - len(self._inbox))
+            return
+
+        now = time.monotonic()
+        if self._next_arrival is None:
+            self._next_arrival = now
+
+        rng = self.generator.random
+        while self._next_arrival <= now:
+            if self.total is not None and self._next_id > self.total:
+                return
+            burst = rng.randint(1, self.burst_size)
+            self._deliver(burst)
+            # Exponential gaps scaled by burst size keep the average rate
+            self._next_arrival += rng.expovariate(self.rate / burst)
+
+    def fetch_sms_since(self, cursor, limit=None):
+        """
+        Get messages newer than the cursor.
+
+        Args:
+            cursor (dict): Cursor with 'last_id' key
+            limit (int, optional): Maximum number of messages to return
+
+        Returns:
+            list: Message dictionaries, oldest first
+        """
+        with self._lock:
+            self._catch_up()
+            start = bisect.bisect_right(self._ids, cursor.get('last_id', 0))
+            end = len(self._inbox) if limit is None else min(len(self._inbox), start + limit)
+            return self._inbox[start:end]
+
+    def is_exhausted(self, cursor):
+        """
+        Check whether every message has been delivered and fetched.
+
+        Args:
+            cursor (dict): Cursor with 'last_id' key
+
+        Returns:
+            bool: True if no more messages will arrive after the cursor
+        """
+        return self.total is not None and cursor.get('last_id', 0) >= self.total
+
+
+class _FakeDeviceHandler(socketserver.StreamRequestHandler):
+    """Line-based JSON protocol: one request line in, one reply line out."""
+
+    def handle(self):
+        device = self.server.device
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            cursor = {'last_id': request.get('since', 0)}
+            messages = device.fetch_sms_since(cursor, request.get('limit'))
+            reply = {'messages': messages, 'exhausted': device.is_exhausted(
+                {'last_id': messages[-1]['id'] if messages else cursor['last_id']})}
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+class FakeDeviceServer(socketserver.ThreadingTCPServer):
+    """Serves a FakeDevice over a loopback TCP socket."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, device, host='127.0.0.1', port=0):
+        """
+        Args:
+            device (FakeDevice): Device to serve
+            host (str): Address to bind to (loopback by default)
+            port (int): Port to bind to; 0 picks a free port
+        """
+        self.device = device
+        super().__init__((host, port), _FakeDeviceHandler)
+
+    def start(self):
+        """
+        Serve in a background thread.
+
+        Returns:
+            tuple: (host, port) the server is listening on
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self.server_address
+
+
+class FakeDeviceClient:
+    """Client for FakeDeviceServer with the mobile_actions fetch API."""
+
+    def __init__(self, host, port):
+        self._sock = socket.create_connection((host, port))
+        self._reader = self._sock.makefile('rb')
+        self.exhausted = False
+
+    def fetch_sms_since(self, cursor, limit=None):
+        """
+        Get messages newer than the cursor from the server.
+
+        Args:
+            cursor (dict): Cursor with 'last_id' key
+            limit (int, optional): Maximum number of messages to return
+
+        Returns:
+            list: Message dictionaries, oldest first
+        """
+        request = {'since': cursor.get('last_id', 0), 'limit': limit}
+        self._sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        reply = json.loads(self._reader.readline())
+        self.exhausted = reply['exhausted']
+        return reply['messages']
+
+    def close(self):
+        """Close the connection."""
+        self._reader.close()
+        self._sock.close()
+
+
+def run_load_test(source, total, batch_size=1000, store=False):
+    """
+    Pull every message from a source through the parser and store.
+
+    Args:
+        source: Object with fetch_sms_since(cursor, limit)
+        total (int): Number of messages to consume
+        batch_size (int): Maximum messages per fetch
+        store (bool): If True, commit parsed expenses to the real ledger.
+                      By default they are only added in memory.
+
+    Returns:
+        dict: Counts, 'msgs_per_sec' and latency percentiles in ms
+
+    Raises:
+        ValueError: If total is not positive or the source will never
+                    deliver that many messages
+    """
+    if total is None or total < 1:
+        raise ValueError("total must be at least 1")
+    source_total = getattr(source, 'total', None)
+    if source_total is not None and source_total < total:
+        raise ValueError(f"source only delivers {source_total} messages")
+
+    from logic.expense_parser import parse_expense_amount
+    from logic.pipeline import ExpenseTransaction
+
+    cursor = {'last_id': 0}
+    latencies = []
+    parsed = 0
+    skipped = 0
+
+    with ExpenseTransaction() as txn:
+        started = time.perf_counter()
+        while cursor['last_id'] < total:
+            messages = source.fetch_sms_since(cursor, batch_size)
+            if not messages:
+                time.sleep(0.0005)
+                continue
+
+            for message in messages:
+                amount = parse_expense_amount(message['body'])
+                if amount is None:
+                    skipped += 1
+                else:
+                    txn.add_expense(amount)
+                    parsed += 1
+
+            done_at = time.time()
+            latencies.extend(done_at - message['arrived_at'] for message in messages)
+            cursor['last_id'] = messages[-1]['id']
+
+        if not store:
+            # Drop the in-memory expenses; the block has nothing to commit
+            txn.rollback()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+
+    return {
+        'messages': len(latencies),
+        'parsed': parsed,
+        'skipped': skipped,
+        'elapsed': round(elapsed, 3),
+        'msgs_per_sec': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        'latency_p50_ms': percentile(0.50),
+        'latency_p99_ms': percentile(0.99),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake device load test")
+    parser.add_argument('--rate', type=float, default=10000,
+                        help="average messages per second (0 = all at once)")
+    parser.add_argument('--total', type=int, default=50000)
+    parser.add_argument('--burst', type=int, default=10, help="largest burst size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--socket', action='store_true',
+                        help="go through the loopback server instead of in-process")
+    args = parser.parse_args()
+
+    device = FakeDevice(rate=args.rate or None, total=args.total, burst_size=args.burst,
+                        generator=SyntheticSmsGenerator(seed=args.seed))
+
+    if args.socket:
+        server = FakeDeviceServer(device)
+        host, port = server.start()
+        source = FakeDeviceClient(host, port)
+    else:
+        source = device
+
+    print(f"Load test: {args.total} messages at {args.rate or 'max'} msg/s"
+          f" ({'socket' if args.socket else 'in-process'})")
+    result = run_load_test(source, args.total)
+    for key, value in result.items():
+        print(f"  {key}: {value}")
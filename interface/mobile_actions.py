@@ -7,11 +7,24 @@ NOTE: In production, this will be replaced with actual Android/iOS integration
 using Droidrun or similar mobile automation tools.
 """
 
+import atexit
+import bisect
+import json
+import os
 import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from logic import file_lock, metrics
+from logic.tenant import get_current_user, use_user
 # from droidrun.device import AndroidDevice
 
 
 
+@metrics.timed('sms_fetch')
 def get_latest_sms():
     """
     Get the latest SMS message (STUB).
@@ -43,6 +56,237 @@ def get_latest_sms():
 
 
 
+# Optional replacement SMS source (e.g. interface.fake_device), used by
+# fetch_sms_since() instead of the built-in stub inbox
+_sms_source = None
+
+
+def set_sms_source(source):
+    """
+    Route fetch_sms_since() to another SMS source.
+    
+    Args:
+        source: Object with a fetch_sms_since(cursor, limit) method,
+                or None to go back to the built-in stub
+    """
+    global _sms_source
+    _sms_source = source
+
+
+# Simulated device inbox, oldest first, with a parallel list of IDs
+# so lookups by cursor are a binary search
+_sample_inbox = []
+_sample_inbox_ids = []
+
+
+def _receive_sample_sms():
+    """Simulate a new SMS arriving in the device inbox (STUB)."""
+    # Millisecond-based IDs keep increasing across restarts, like a
+    # real inbox, so a saved cursor stays valid
+    sms_id = int(time.time() * 1000)
+    if _sample_inbox_ids and sms_id <= _sample_inbox_ids[-1]:
+        sms_id = _sample_inbox_ids[-1] + 1
+    _sample_inbox.append({
+        'id': sms_id,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        # Unwrapped so the fetch isn't timed twice
+        'body': get_latest_sms.__wrapped__()
+    })
+    _sample_inbox_ids.append(sms_id)
+
+
+def get_sms_cursor_file_path():
+    """
+    Get the full path to sms_cursor.json file.
+    
+    Returns:
+        str: Absolute path to sms_cursor.json
+    """
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'sms_cursor.json')
+
+
+def load_sms_cursor():
+    """
+    Load the SMS cursor from sms_cursor.json.
+    
+    Returns:
+        dict: Dictionary with 'last_id' and 'last_timestamp' keys
+    """
+    file_path = get_sms_cursor_file_path()
+    
+    default_cursor = {
+        'last_id': 0,
+        'last_timestamp': None
+    }
+    
+    if not os.path.exists(file_path):
+        return default_cursor
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            cursor = json.load(file)
+            for key, value in default_cursor.items():
+                cursor.setdefault(key, value)
+            return cursor
+    except (json.JSONDecodeError, IOError):
+        return default_cursor
+
+
+def save_sms_cursor(cursor):
+    """
+    Save the SMS cursor atomically.
+    
+    The cursor is written to a temporary file and moved into place, so
+    a crash mid-write never leaves a half-written checkpoint.
+    
+    Args:
+        cursor (dict): Cursor dictionary to save
+    """
+    try:
+        _write_json_atomic(get_sms_cursor_file_path(), cursor)
+    except (IOError, OSError) as e:
+        print(f"Error saving SMS cursor: {e}")
+
+
+def _write_json_atomic(file_path, data):
+    """
+    Write JSON to a temporary file and move it into place.
+    
+    Args:
+        file_path (str): Destination path
+        data: JSON-serializable data
+    """
+    # A unique temp name, so concurrent writers never share one
+    directory, name = os.path.split(file_path)
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=name + '.', suffix='.tmp')
+    except FileNotFoundError:
+        # First write to a new (or removed) data folder
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=2, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+@metrics.timed('sms_fetch')
+def fetch_sms_since(cursor, limit=None):
+    """
+    Get SMS messages newer than the cursor (STUB).
+    
+    In production: This will query the device inbox for IDs greater than
+    the cursor, so each poll only touches new messages.
+    For now: Simulates one new message arriving per call.
+    
+    Args:
+        cursor (dict): Cursor with 'last_id' key
+        limit (int, optional): Maximum number of messages to return
+        
+    Returns:
+        list: Message dictionaries with 'id', 'timestamp' and 'body' keys,
+              oldest first
+    """
+    if _sms_source is not None:
+        return _sms_source.fetch_sms_since(cursor, limit)
+    
+    _receive_sample_sms()
+    
+    start = bisect.bisect_right(_sample_inbox_ids, cursor.get('last_id', 0))
+    end = len(_sample_inbox) if limit is None else min(len(_sample_inbox), start + limit)
+    
+    return _sample_inbox[start:end]
+
+
+def advance_sms_cursor(cursor, messages, save=True):
+    """
+    Move the cursor past processed messages.
+    
+    Call this only after the messages have been fully processed, so a
+    crash before then means they are fetched again rather than lost.
+    
+    Args:
+        cursor (dict): Cursor dictionary, updated in place
+        messages (list): Processed messages, oldest first
+        save (bool): Whether to persist the cursor
+        
+    Returns:
+        dict: Updated cursor
+    """
+    if not messages:
+        return cursor
+    
+    last = messages[-1]
+    cursor['last_id'] = last['id']
+    cursor['last_timestamp'] = last['timestamp']
+    
+    if save:
+        save_sms_cursor(cursor)
+    
+    return cursor
+
+
+def get_failed_sms_file_path():
+    """
+    Get the full path to failed_sms.json file.
+    
+    Returns:
+        str: Absolute path to failed_sms.json
+    """
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'failed_sms.json')
+
+
+def load_failed_sms():
+    """
+    Load the SMS that could not be processed and were skipped.
+    
+    Returns:
+        list: Message dictionaries with an added 'error' key, oldest first
+    """
+    file_path = get_failed_sms_file_path()
+    
+    if not os.path.exists(file_path):
+        return []
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (json.JSONDecodeError, IOError):
+        return []
+
+
+def record_failed_sms(failed, message, error):
+    """
+    Add a message that failed processing to a dead-letter list.
+    
+    Args:
+        failed (list): List from load_failed_sms(), updated in place
+        message (dict): Message with 'id', 'timestamp' and 'body' keys
+        error (Exception): Why processing failed
+        
+    Returns:
+        list: Updated list, ready to be saved to failed_sms.json
+    """
+    failed.append({
+        'id': message['id'],
+        'timestamp': message['timestamp'],
+        'body': message['body'],
+        'error': f"{type(error).__name__}: {error}"
+    })
+    return failed
+
+
+@metrics.timed('notify')
 def send_notification(title, message):
     """
     Send a notification to the phone (STUB).
@@ -61,6 +305,380 @@ def send_notification(title, message):
     print()
 
 
+class NotificationQueue:
+    """
+    Debounced notification queue with a background delivery worker.
+    
+    Notifications queued within `window` seconds of each other are held
+    back and same-title alerts are merged into one summary, so a burst
+    of SMS produces one alert per type instead of one per message.
+    Callers never wait on delivery.
+    """
+    
+    def __init__(self, window=1.0, max_delay=5.0, deliver=None):
+        """
+        Args:
+            window (float): Quiet period (seconds) before pending alerts
+                            are delivered
+            max_delay (float): Longest time an alert can be held back
+                               during a continuous burst
+            deliver (callable, optional): Function taking (title, message).
+                                          Defaults to send_notification.
+        """
+        self.window = window
+        self.max_delay = max_delay
+        self.deliver = deliver or send_notification
+        # Notifications whose delivery raised
+        self.failed = 0
+        
+        # (user, title) -> list of messages, in order of first arrival
+        self._pending = {}
+        self._first_at = None
+        self._last_at = None
+        self._delivering = False
+        self._closed = False
+        self._cond = threading.Condition()
+        
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def put(self, title, message):
+        """
+        Queue a notification without waiting for delivery.
+        
+        Args:
+            title (str): Notification title
+            message (str): Notification message
+        """
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_at = now
+            self._last_at = now
+            # The worker thread doesn't share our context, so remember
+            # which user each alert is for
+            key = (get_current_user(), title)
+            self._pending.setdefault(key, []).append(message)
+            self._cond.notify_all()
+    
+    def flush(self):
+        """Deliver everything pending now and wait until it is delivered."""
+        with self._cond:
+            self._first_at = float('-inf')
+            self._cond.notify_all()
+            while self._pending or self._delivering:
+                self._cond.wait()
+    
+    def close(self):
+        """Deliver pending notifications and stop the worker."""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+    
+    def _due_in(self):
+        """Seconds until pending notifications should go out."""
+        now = time.monotonic()
+        quiet = self._last_at + self.window - now
+        forced = self._first_at + self.max_delay - now
+        return min(quiet, forced)
+    
+    def _run(self):
+        """Worker loop: wait for a quiet period, then deliver merged alerts."""
+        while True:
+            with self._cond:
+                while not self._closed and (not self._pending or self._due_in() > 0):
+                    timeout = self._due_in() if self._pending else None
+                    self._cond.wait(timeout)
+                
+                if self._closed and not self._pending:
+                    return
+                
+                batch = self._pending
+                self._pending = {}
+                self._delivering = True
+            
+            try:
+                for (user_id, title), messages in batch.items():
+                    # One failed delivery must not stop the worker, or
+                    # flush() and close() would wait forever
+                    try:
+                        with use_user(user_id):
+                            self.deliver(*merge_notifications(title, messages))
+                    except Exception as e:
+                        self.failed += 1
+                        print(f"Error delivering notification '{title}': {e}")
+            finally:
+                with self._cond:
+                    self._delivering = False
+                    self._cond.notify_all()
+
+
+def merge_notifications(title, messages):
+    """
+    Merge same-title notifications into one summary.
+    
+    Args:
+        title (str): Shared notification title
+        messages (list): Messages in the order they were queued
+        
+    Returns:
+        tuple: (title, message) for the merged notification
+    """
+    if len(messages) == 1:
+        return title, messages[0]
+    
+    # The latest message carries the most up-to-date totals
+    return f"{title} ({len(messages)} alerts)", messages[-1]
+
+
+# Shared queue used by queue_notification(), created on first use
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def queue_notification(title, message):
+    """
+    Queue a notification on the shared background queue.
+    
+    Args:
+        title (str): Notification title
+        message (str): Notification message
+    """
+    global _default_queue
+    
+    with _default_queue_lock:
+        if _default_queue is None:
+            # Merged alerts go through the durable outbox
+            _default_queue = NotificationQueue(deliver=enqueue_outbox)
+            # Don't lose alerts that are still pending at exit
+            atexit.register(_default_queue.close)
+    
+    _default_queue.put(title, message)
+
+
+def flush_notifications():
+    """Deliver everything on the shared queue and wait for it."""
+    if _default_queue is not None:
+        _default_queue.flush()
+
+
+# Outbox delivery policy
+OUTBOX_DEFER_SECONDS = 15 * 60          # Screen off: flush at most this often
+OUTBOX_LOW_BATTERY_DEFER_SECONDS = 60 * 60  # ... or this often on low battery
+LOW_BATTERY_PERCENT = 20
+OUTBOX_RETRY_BASE_SECONDS = 5
+OUTBOX_RETRY_MAX_SECONDS = 30 * 60
+OUTBOX_MAX_ATTEMPTS = 10                # Then the entry is dead-lettered
+
+# Held around outbox read-modify-write cycles, across processes
+OUTBOX_LOCK_FILE = 'outbox.lock'
+
+
+def get_outbox_file_path():
+    """
+    Get the full path to outbox.json file.
+    
+    Returns:
+        str: Absolute path to outbox.json
+    """
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'outbox.json')
+
+
+@contextmanager
+def _outbox_lock():
+    """Hold the data folder's outbox lock. Reentrant within a thread."""
+    from logic.expense_store import get_data_dir
+    lock_path = os.path.join(get_data_dir(), OUTBOX_LOCK_FILE)
+    file_lock.acquire(lock_path)
+    try:
+        yield
+    finally:
+        file_lock.release(lock_path)
+
+
+def load_outbox():
+    """
+    Load the notification outbox from outbox.json.
+    
+    Returns:
+        dict: Dictionary with 'next_seq', 'last_flush_at', 'entries' and
+              'dead' (entries given up on) keys
+    """
+    file_path = get_outbox_file_path()
+    
+    default_outbox = {
+        'next_seq': 1,
+        'last_flush_at': 0,
+        'entries': [],
+        'dead': []
+    }
+    
+    if not os.path.exists(file_path):
+        return default_outbox
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            outbox = json.load(file)
+            for key, value in default_outbox.items():
+                outbox.setdefault(key, value)
+            return outbox
+    except (json.JSONDecodeError, IOError):
+        return default_outbox
+
+
+def save_outbox(outbox):
+    """
+    Save the notification outbox atomically.
+    
+    Args:
+        outbox (dict): Outbox dictionary to save
+    """
+    try:
+        _write_json_atomic(get_outbox_file_path(), outbox)
+    except (IOError, OSError) as e:
+        print(f"Error saving outbox: {e}")
+
+
+def enqueue_outbox(title, message, flush=True):
+    """
+    Store a notification durably, then try to deliver the outbox.
+    
+    Args:
+        title (str): Notification title
+        message (str): Notification message
+        flush (bool): Whether to attempt delivery right away
+        
+    Returns:
+        int: Sequence number of the queued notification
+    """
+    with _outbox_lock():
+        outbox = load_outbox()
+        seq = outbox['next_seq']
+        outbox['entries'].append({
+            'seq': seq,
+            'title': title,
+            'message': message,
+            'created_at': time.time(),
+            'attempts': 0,
+            'next_attempt_at': 0
+        })
+        outbox['next_seq'] = seq + 1
+        save_outbox(outbox)
+    
+    if flush:
+        flush_outbox()
+    
+    return seq
+
+
+def flush_outbox(deliver=None, force=False):
+    """
+    Deliver pending outbox notifications, respecting screen and battery.
+    
+    - Screen on: everything due is delivered right away, one by one.
+    - Screen off: delivery waits until OUTBOX_DEFER_SECONDS have passed
+      since the last flush (longer on low battery), then all pending
+      notifications go out as one grouped notification.
+    
+    Notifications are delivered strictly in order. If one fails, it is
+    retried later with exponential backoff and nothing after it is sent.
+    After OUTBOX_MAX_ATTEMPTS failures it is moved to the outbox's
+    'dead' list so the rest can go out. Nothing else triggers the retry,
+    so long-running processes should call this periodically (the daemon
+    does on every poll).
+    
+    Args:
+        deliver (callable, optional): Function taking (title, message)
+                                      that raises on failure. Defaults
+                                      to send_notification.
+        force (bool): Deliver now regardless of screen and battery
+        
+    Returns:
+        dict: Dictionary with 'delivered', 'pending' and 'deferred' keys
+    """
+    if deliver is None:
+        deliver = send_notification
+    
+    with _outbox_lock():
+        outbox = load_outbox()
+        entries = outbox['entries']
+        now = time.time()
+        
+        if not entries:
+            return {'delivered': 0, 'pending': 0, 'deferred': False}
+        
+        screen_on = force or is_screen_on()
+        
+        if not screen_on:
+            if get_phone_battery() < LOW_BATTERY_PERCENT:
+                interval = OUTBOX_LOW_BATTERY_DEFER_SECONDS
+            else:
+                interval = OUTBOX_DEFER_SECONDS
+            
+            if now - outbox['last_flush_at'] < interval:
+                return {'delivered': 0, 'pending': len(entries), 'deferred': True}
+        
+        # Respect backoff on the head of the queue to keep ordering
+        if entries[0]['next_attempt_at'] > now:
+            return {'delivered': 0, 'pending': len(entries), 'deferred': True}
+        
+        if screen_on:
+            batches = [[entry] for entry in entries]
+        else:
+            # One wakeup for everything that piled up
+            batches = [entries]
+        
+        delivered = 0
+        failed = None
+        for batch in batches:
+            title, message = _group_outbox_entries(batch)
+            try:
+                deliver(title, message)
+            except Exception as e:
+                head = batch[0]
+                head['attempts'] += 1
+                backoff = OUTBOX_RETRY_BASE_SECONDS * (2 ** (head['attempts'] - 1))
+                head['next_attempt_at'] = now + min(backoff, OUTBOX_RETRY_MAX_SECONDS)
+                print(f"Notification delivery failed (attempt {head['attempts']}): {e}")
+                failed = str(e)
+                break
+            delivered += len(batch)
+        
+        outbox['entries'] = entries[delivered:]
+        if failed is not None and outbox['entries'][0]['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+            head = outbox['entries'].pop(0)
+            head['error'] = failed
+            outbox['dead'].append(head)
+            print(f"Gave up on notification {head['seq']} after {head['attempts']} attempts")
+        # A failed flush mustn't restart the screen-off deferral, or the
+        # retry would wait the full interval instead of the backoff
+        if failed is None:
+            outbox['last_flush_at'] = now
+        save_outbox(outbox)
+        
+        return {'delivered': delivered, 'pending': len(outbox['entries']), 'deferred': False}
+
+
+def _group_outbox_entries(entries):
+    """
+    Turn one or more outbox entries into a single notification.
+    
+    Args:
+        entries (list): Outbox entries, oldest first
+        
+    Returns:
+        tuple: (title, message)
+    """
+    if len(entries) == 1:
+        return entries[0]['title'], entries[0]['message']
+    
+    lines = [f"{entry['title']}: {entry['message']}" for entry in entries]
+    return f"{len(entries)} spending alerts", "\n".join(lines)
+
+
 def get_phone_battery():
     """
     Get phone battery level (STUB).
@@ -89,7 +707,8 @@ def is_screen_on():
 
 # Future integration notes:
 # --------------------------
-# 1. get_latest_sms() will use Android SMS API or Droidrun to read actual messages
+# 1. get_latest_sms() and fetch_sms_since() will use Android SMS API or Droidrun
+#    to read actual messages
 # 2. send_notification() will use Android notification API to show real notifications
 # 3. Additional functions can be added for:
 #    - Reading all SMS from today
@@ -107,6 +726,16 @@ if __name__ == "__main__":
     
     send_notification("Test", "This is a test notification")
     
+    cursor = {'last_id': 0, 'last_timestamp': None}
+    new_messages = fetch_sms_since(cursor)
+    advance_sms_cursor(cursor, new_messages, save=False)
+    print(f"New messages: {len(new_messages)}, cursor at ID {cursor['last_id']}")
+    
+    # Three queued alerts of the same type should arrive as one
+    for total in (850, 900, 950):
+        queue_notification("Spending Alert", f"Total: ₹{total}")
+    flush_notifications()
+    
     battery = get_phone_battery()
     print(f"Battery: {battery}%")
     
@@ -0,0 +1,219 @@
+"""
+SMS Ingest Module
+Asyncio loop that pulls SMS from the device and stores parsed expenses.
+
+An SMS source coroutine feeds a bounded queue and a configurable number
+of consumer tasks drain it in batches. Each batch goes through the
+pipeline in one transaction, so consumers only wait for each other
+while a batch commits. When storage falls behind, the queue fills up
+and the source waits (backpressure) instead of reading more messages
+into memory.
+
+Run:
+    python main.py listen --concurrency 4
+"""
+
+import asyncio
+import time
+
+from interface.mobile_actions import get_latest_sms
+from logic.pipeline import ExpenseTransaction, process_sms
+
+
+# Most SMS one consumer stores per transaction
+DEFAULT_BATCH_SIZE = 50
+
+
+class IngestStats:
+    """Counters and throughput for one ingest run."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.received = 0
+        self.parsed = 0
+        self.skipped = 0
+        self.stored = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.queue = None
+
+    def snapshot(self):
+        """
+        Get the current counters.
+
+        Returns:
+            dict: Counters plus 'elapsed', 'msgs_per_sec' and 'queue_depth'
+        """
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'received': self.received,
+            'parsed': self.parsed,
+            'skipped': self.skipped,
+            'stored': self.stored,
+            'failed': self.failed,
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'max_queue_depth': self.max_queue_depth,
+            'elapsed': round(elapsed, 3),
+            'msgs_per_sec': round(self.received / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+async def sms_source(queue, stats, fetch=get_latest_sms, max_messages=None,
+                     poll_interval=0.0, stop_event=None):
+    """
+    Poll the device for SMS and put them on the queue.
+
+    Args:
+        queue (asyncio.Queue): Bounded queue feeding the consumers
+        stats (IngestStats): Counters to update
+        fetch (callable): Blocking function returning one SMS, a list of
+                          SMS, or None when there is nothing new
+        max_messages (int, optional): Stop after this many messages
+        poll_interval (float): Seconds to sleep when nothing new arrived
+        stop_event (asyncio.Event, optional): Set to stop polling
+    """
+    while max_messages is None or stats.received < max_messages:
+        if stop_event is not None and stop_event.is_set():
+            break
+
+        # Device reads block, so keep them off the event loop
+        result = await asyncio.to_thread(fetch)
+
+        if not result:
+            await asyncio.sleep(poll_interval)
+            continue
+
+        messages = [result] if isinstance(result, str) else result
+        for sms_text in messages:
+            # Waits here while the queue is full
+            await queue.put(sms_text)
+            stats.received += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, queue.qsize())
+
+            if max_messages is not None and stats.received >= max_messages:
+                break
+
+        if poll_interval:
+            await asyncio.sleep(poll_interval)
+
+
+def store_batch(messages):
+    """
+    Run SMS through the pipeline and commit once, or not at all.
+
+    Args:
+        messages (list): SMS texts
+
+    Returns:
+        list: process_sms() result for each message (None if skipped)
+    """
+    with ExpenseTransaction() as txn:
+        return [process_sms(sms_text, txn) for sms_text in messages]
+
+
+async def sms_consumer(queue, stats, store=store_batch, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Drain SMS from the queue in batches and store the expenses.
+
+    Args:
+        queue (asyncio.Queue): Queue of SMS text; None means stop
+        stats (IngestStats): Counters to update
+        store (callable): Blocking function that stores a list of SMS
+                          and returns one result per message (None if
+                          skipped)
+        batch_size (int): Most SMS stored per call to store
+    """
+    stopping = False
+    while not stopping:
+        # Wait for one message, then take whatever else is already queued,
+        # up to and including one stop marker
+        batch = [await queue.get()]
+        while batch[-1] is not None and len(batch) < batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+
+        stopping = batch[-1] is None
+        messages = batch[:-1] if stopping else batch
+        try:
+            if not messages:
+                continue
+
+            try:
+                results = await asyncio.to_thread(store, messages)
+            except Exception as e:
+                # Count it and keep consuming, or the source would block
+                # on a full queue with nobody reading it
+                print(f"Error storing expenses: {e}")
+                stats.failed += len(messages)
+                continue
+
+            for result in results:
+                if result is None:
+                    stats.skipped += 1
+                else:
+                    stats.parsed += 1
+                    stats.stored += 1
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+async def run_ingest(concurrency=4, queue_size=100, fetch=get_latest_sms,
+                     max_messages=None, poll_interval=0.0, store=store_batch,
+                     batch_size=DEFAULT_BATCH_SIZE, stop_event=None, on_stats=None,
+                     stats_interval=1.0):
+    """
+    Run the source and consumers until the source stops.
+
+    Args:
+        concurrency (int): Number of consumer tasks
+        queue_size (int): Maximum SMS held in the queue
+        fetch (callable): Blocking SMS fetch function
+        max_messages (int, optional): Stop after this many messages
+        poll_interval (float): Seconds to sleep when nothing new arrived
+        store (callable): Blocking function that stores a list of SMS
+        batch_size (int): Most SMS a consumer stores per transaction
+        stop_event (asyncio.Event, optional): Set to stop polling
+        on_stats (callable, optional): Called with a stats snapshot every
+                                       stats_interval seconds
+        stats_interval (float): Seconds between on_stats calls
+
+    Returns:
+        dict: Final stats snapshot
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+    stats = IngestStats()
+    stats.queue = queue
+
+    consumers = [asyncio.create_task(sms_consumer(queue, stats, store, batch_size))
+                 for _ in range(concurrency)]
+
+    reporter = None
+    if on_stats is not None:
+        async def report():
+            while True:
+                await asyncio.sleep(stats_interval)
+                on_stats(stats.snapshot())
+        reporter = asyncio.create_task(report())
+
+    try:
+        await sms_source(queue, stats, fetch, max_messages, poll_interval, stop_event)
+    finally:
+        # One stop marker per consumer, after all real messages
+        for _ in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+        if reporter is not None:
+            reporter.cancel()
+
+    return stats.snapshot()
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing SMS ingest loop...")
+
+    result = asyncio.run(run_ingest(max_messages=20))
+    print(f"Received: {result['received']}")
+    print(f"Stored: {result['stored']}, skipped: {result['skipped']}")
+    print(f"Throughput: {result['msgs_per_sec']} msgs/s")
+    print(f"Max queue depth: {result['max_queue_depth']}")
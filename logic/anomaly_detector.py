@@ -0,0 +1,231 @@
+"""
+Anomaly Detector Module
+Flags unusually large debits as they arrive.
+
+Keeps an exponentially weighted mean and variance of log amounts for
+the user overall and for each merchant. Each expense is scored against
+the statistics before it, then folded in, so checking and learning
+are both constant time and the saved state is a few numbers per
+merchant rather than the whole history.
+
+Log amounts are used because spending is heavily skewed: ₹150 → ₹300
+is an ordinary day, ₹150 → ₹20,000 is not.
+"""
+
+import json
+import math
+import os
+
+from logic import metrics
+
+
+# Weight of the newest expense in the running statistics
+EWMA_ALPHA = 0.1
+
+# Standard deviations above the typical log amount that count as unusual
+ANOMALY_Z_THRESHOLD = 3.5
+
+# Expenses seen before the user's (or a merchant's) statistics are trusted
+MIN_OBSERVATIONS = 5
+
+# Merchants tracked per user; new merchants beyond this are not tracked
+MAX_MERCHANTS = 500
+
+# Floor on the standard deviation, so a run of identical amounts
+# doesn't make every small change look unusual
+MIN_STD = 0.25
+
+
+def new_state():
+    """
+    Get an empty detector state.
+
+    Returns:
+        dict: 'user' stats and 'merchants' (name -> stats), where stats
+              are [count, mean, variance] of log amounts
+    """
+    return {'user': [0, 0.0, 0.0], 'merchants': {}}
+
+
+def update_stats(stats, value):
+    """
+    Fold one value into [count, mean, variance] in place.
+
+    The first few values use a plain running mean so early statistics
+    aren't pulled towards zero.
+
+    Args:
+        stats (list): [count, mean, variance]
+        value (float): New value
+    """
+    count, mean, variance = stats
+    count += 1
+    alpha = max(EWMA_ALPHA, 1.0 / count)
+
+    diff = value - mean
+    increment = alpha * diff
+    stats[0] = count
+    stats[1] = mean + increment
+    stats[2] = (1 - alpha) * (variance + diff * increment)
+
+
+def score(stats, value):
+    """
+    Get how many standard deviations a value is above the mean.
+
+    Args:
+        stats (list): [count, mean, variance]
+        value (float): Value to score
+
+    Returns:
+        float or None: Z-score, or None if too few values were seen
+    """
+    count, mean, variance = stats
+    if count < MIN_OBSERVATIONS:
+        return None
+    return (value - mean) / max(math.sqrt(variance), MIN_STD)
+
+
+def _clip(stats, value):
+    """Limit a value to the anomaly threshold of trusted statistics."""
+    if stats[0] < MIN_OBSERVATIONS:
+        return value
+    ceiling = stats[1] + ANOMALY_Z_THRESHOLD * max(math.sqrt(stats[2]), MIN_STD)
+    return min(value, ceiling)
+
+
+@metrics.timed('anomaly_check')
+def evaluate_expense(state, amount, merchant=None):
+    """
+    Score an expense, then learn from it.
+
+    Args:
+        state (dict): Detector state, updated in place
+        amount (int): Expense amount
+        merchant (str, optional): Merchant name
+
+    Returns:
+        dict: Dictionary with 'anomaly', 'user_score', 'merchant_score'
+              and 'typical' keys
+              - anomaly: True if either score is over the threshold
+              - user_score / merchant_score: Z-scores, None while warming up
+              - typical: Typical amount for the user (or merchant, when
+                that is what flagged it), or None
+    """
+    value = math.log1p(amount)
+
+    user_stats = state['user']
+    merchant_stats = None
+    if merchant:
+        key = merchant.lower()
+        merchants = state['merchants']
+        merchant_stats = merchants.get(key)
+        if merchant_stats is None and len(merchants) < MAX_MERCHANTS:
+            merchant_stats = merchants[key] = [0, 0.0, 0.0]
+
+    user_score = score(user_stats, value)
+    merchant_score = score(merchant_stats, value) if merchant_stats else None
+
+    anomaly = False
+    typical = None
+    if merchant_score is not None and merchant_score >= ANOMALY_Z_THRESHOLD:
+        anomaly = True
+        typical = round(math.expm1(merchant_stats[1]))
+    if user_score is not None and user_score >= ANOMALY_Z_THRESHOLD:
+        anomaly = True
+        typical = round(math.expm1(user_stats[1]))
+    if typical is None and user_stats[0]:
+        typical = round(math.expm1(user_stats[1]))
+
+    # Learn from an unusual amount only up to the threshold, so one
+    # outlier doesn't make the next one look normal
+    update_stats(user_stats, _clip(user_stats, value))
+    if merchant_stats is not None:
+        update_stats(merchant_stats, _clip(merchant_stats, value))
+
+    return {
+        'anomaly': anomaly,
+        'user_score': None if user_score is None else round(user_score, 2),
+        'merchant_score': None if merchant_score is None else round(merchant_score, 2),
+        'typical': typical
+    }
+
+
+def get_anomaly_state_file_path():
+    """
+    Get the full path to anomaly_state.json file.
+
+    Returns:
+        str: Absolute path to anomaly_state.json
+    """
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'anomaly_state.json')
+
+
+def load_anomaly_state():
+    """
+    Load the detector state.
+
+    Returns:
+        dict: Detector state (empty if none saved yet)
+    """
+    file_path = get_anomaly_state_file_path()
+
+    if not os.path.exists(file_path):
+        return new_state()
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+        metrics.record_io('load', file_path)
+        return state
+    except (json.JSONDecodeError, IOError):
+        return new_state()
+
+
+def save_anomaly_state(state):
+    """
+    Save the detector state.
+
+    Args:
+        state (dict): Detector state
+    """
+    from logic.expense_store import write_lock
+    file_path = get_anomaly_state_file_path()
+
+    try:
+        with write_lock(), open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file, ensure_ascii=False)
+        metrics.record_io('save', file_path)
+    except IOError as e:
+        print(f"Error saving anomaly state: {e}")
+
+
+def check_expense(amount, merchant=None):
+    """
+    Score an expense against the saved statistics and update them.
+
+    Args:
+        amount (int): Expense amount
+        merchant (str, optional): Merchant name
+
+    Returns:
+        dict: Same structure as evaluate_expense()
+    """
+    from logic.expense_store import data_lock
+
+    with data_lock():
+        state = load_anomaly_state()
+        result = evaluate_expense(state, amount, merchant)
+        save_anomaly_state(state)
+    return result
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing anomaly detector...")
+
+    state = new_state()
+    for amount in [120, 150, 90, 200, 140, 160, 110, 20000]:
+        result = evaluate_expense(state, amount, 'Zomato')
+        print(f"₹{amount}: {result}")
@@ -0,0 +1,120 @@
+"""
+Budget Simulator Module
+Answers "what if my daily limit had been X?" from the expense history.
+
+Per-day totals are loaded once, then every candidate limit is judged
+with the same rules the app uses (check_limits_batch for warnings and
+breaches, compute_streaks for streaks). With NumPy installed, all
+candidates are checked in one batch call.
+
+    simulate_limits([400, 500, 600])
+"""
+
+from logic.limit_checker import check_limits_batch
+from logic.streak_manager import compute_streaks, get_daily_series
+
+
+def limit_range(start, stop, step):
+    """
+    Get evenly spaced candidate limits, including stop.
+
+    Args:
+        start (int): Smallest limit
+        stop (int): Largest limit
+        step (int): Gap between limits
+
+    Returns:
+        list: Candidate limits
+    """
+    if step <= 0:
+        raise ValueError("step must be greater than 0")
+    return list(range(start, stop + 1, step))
+
+
+def simulate_limits(candidates, daily_totals=None, end_date=None):
+    """
+    Replay the spending history against each candidate daily limit.
+
+    Every day from the first recorded expense to end_date is judged
+    against the candidate, as if it had been the limit all along.
+    Days without expenses count as under the limit.
+
+    Args:
+        candidates (list): Daily limits to try
+        daily_totals (dict, optional): Date -> total spent. If None,
+                                       totals are computed from the ledger.
+        end_date (str, optional): Last day to include, in YYYY-MM-DD
+                                  format. If None, uses today's date.
+
+    Returns:
+        dict: Dictionary with 'days', 'start', 'end' and 'scenarios'
+              - scenarios: One dictionary per candidate, in order, with
+                'daily_limit', 'current_streak', 'best_streak',
+                'breach_days' (over the limit) and 'warning_days'
+                (at the warning threshold but not over)
+    """
+    dates, totals = get_daily_series(daily_totals, end_date)
+    candidates = list(candidates)
+
+    result = {
+        'days': len(dates),
+        'start': dates[0] if dates else None,
+        'end': dates[-1] if dates else end_date,
+        'scenarios': []
+    }
+
+    if not dates:
+        result['scenarios'] = [{'daily_limit': limit, 'current_streak': 0, 'best_streak': 0,
+                                'breach_days': 0, 'warning_days': 0}
+                               for limit in candidates]
+        return result
+
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is not None:
+        # One row per candidate: check every (candidate, day) pair at once
+        day_count = len(totals)
+        checks = check_limits_batch(np.tile(np.asarray(totals, dtype=np.float64), len(candidates)),
+                                    np.repeat(np.asarray(candidates, dtype=np.float64), day_count))
+        exceeded_rows = checks['exceeded'].reshape(len(candidates), day_count)
+        warning_rows = checks['warning'].reshape(len(candidates), day_count)
+    else:
+        exceeded_rows = []
+        warning_rows = []
+        for limit in candidates:
+            checks = check_limits_batch(totals, limit)
+            exceeded_rows.append(checks['exceeded'])
+            warning_rows.append(checks['warning'])
+
+    for limit, exceeded, warning in zip(candidates, exceeded_rows, warning_rows):
+        if np is not None:
+            breach_days = int(exceeded.sum())
+            warning_days = int(warning.sum()) - breach_days
+            current, best = compute_streaks(~exceeded)
+        else:
+            breach_days = sum(exceeded)
+            warning_days = sum(warning) - breach_days
+            current, best = compute_streaks([not is_over for is_over in exceeded])
+
+        result['scenarios'].append({
+            'daily_limit': limit,
+            'current_streak': current,
+            'best_streak': best,
+            'breach_days': breach_days,
+            'warning_days': warning_days
+        })
+
+    return result
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing budget simulator...")
+
+    simulation = simulate_limits(limit_range(200, 1000, 200))
+    print(f"{simulation['days']} days from {simulation['start']} to {simulation['end']}")
+    for scenario in simulation['scenarios']:
+        print(scenario)
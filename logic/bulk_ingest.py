@@ -0,0 +1,214 @@
+"""
+Bulk Ingest Module
+Pushes a stream of SMS through the pipeline in batches.
+
+Each batch runs through pipeline.process_sms() in one transaction, so
+bulk-loaded expenses get the same metadata, anomaly statistics, limit
+and streak handling as the daemon's, and are committed under the data
+folder's lock.
+"""
+
+import json
+import time
+from datetime import datetime
+
+from logic.expense_parser import parse_expense_amount
+from logic.expense_store import load_expense_metadata
+from logic.pipeline import ExpenseTransaction, process_sms
+
+
+def read_sms_line(line):
+    """
+    Get the SMS from one input line.
+
+    Lines are either plain SMS text or JSON objects with a 'body' key
+    and optional 'id' and 'timestamp' keys (the format produced by
+    interface.fake_device).
+
+    Args:
+        line (str): One line of input
+
+    Returns:
+        dict or None: Dictionary with 'body', 'id' and 'timestamp' keys
+                      ('id' and 'timestamp' may be None), or None for
+                      blank lines
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    if line.startswith('{'):
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            message = None
+        if isinstance(message, dict) and isinstance(message.get('body'), str):
+            return {
+                'body': message['body'],
+                'id': message.get('id'),
+                'timestamp': message.get('timestamp')
+            }
+
+    return {'body': line, 'id': None, 'timestamp': None}
+
+
+def get_message_date(timestamp):
+    """
+    Get the ledger date for an SMS timestamp.
+
+    Args:
+        timestamp (str or None): ISO 8601 timestamp. Times with a UTC
+                                 offset are converted to local time.
+
+    Returns:
+        str or None: Date in YYYY-MM-DD format, or None if the timestamp
+                     is missing or unreadable
+    """
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        when = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if when.tzinfo is not None:
+        when = when.astimezone()
+    return when.strftime('%Y-%m-%d')
+
+
+def ingest_lines(lines, batch_size=500, on_progress=None, progress_interval=1.0):
+    """
+    Parse and store SMS from an iterable of lines.
+
+    JSON lines are stored under the date of their timestamp; plain
+    lines under today's date. A message whose integer 'id' is already
+    stored (e.g. from an earlier run over the same export), or whose
+    'id' (or, without one, 'timestamp' and text) was already seen in
+    this run, is counted as a duplicate and not stored again. Plain
+    lines can't be told apart from a real repeat purchase, so they are
+    never deduplicated. Each batch is committed as one transaction.
+
+    Args:
+        lines (iterable): Lines of input, one SMS per line
+        batch_size (int): Number of expenses stored per transaction
+        on_progress (callable, optional): Called with a stats dictionary
+                                          every progress_interval seconds
+        progress_interval (float): Seconds between progress reports
+
+    Returns:
+        dict: Counts ('read', 'parsed', 'skipped', 'duplicates', 'stored'),
+              'elapsed', 'msgs_per_sec' and per-stage 'timings' in seconds
+    """
+    stats = {
+        'read': 0,
+        'parsed': 0,
+        'skipped': 0,
+        'duplicates': 0,
+        'stored': 0,
+        'timings': {'read': 0.0, 'parse': 0.0, 'dedupe': 0.0, 'store': 0.0}
+    }
+    timings = stats['timings']
+    seen = set()
+    # IDs of the SMS already in the ledger
+    stored_ids = load_expense_metadata().sms_ids()
+    # Messages waiting to be stored
+    batch = []
+
+    started = time.perf_counter()
+    last_report = started
+
+    def flush():
+        store_started = time.perf_counter()
+        with ExpenseTransaction() as txn:
+            stored = sum(process_sms(message['body'], txn, message['sms_id'],
+                                     get_message_date(message['timestamp'])) is not None
+                         for message in batch)
+        stats['stored'] += stored
+        timings['store'] += time.perf_counter() - store_started
+        batch.clear()
+
+    iterator = iter(lines)
+    while True:
+        # Report here so skipped and duplicate lines count towards progress
+        now = time.perf_counter()
+        if on_progress is not None and now - last_report >= progress_interval:
+            last_report = now
+            on_progress(_with_rate(stats, now - started))
+
+        stage_started = time.perf_counter()
+        line = next(iterator, None)
+        if line is None:
+            break
+        message = read_sms_line(line)
+        parse_started = time.perf_counter()
+        timings['read'] += parse_started - stage_started
+
+        if message is None:
+            continue
+        stats['read'] += 1
+
+        amount = parse_expense_amount(message['body'])
+        dedupe_started = time.perf_counter()
+        timings['parse'] += dedupe_started - parse_started
+
+        if amount is None or amount <= 0:
+            stats['skipped'] += 1
+            continue
+
+        # Only integer IDs fit the metadata's sms_id column
+        sms_id = message['id'] if type(message['id']) is int else None
+        if sms_id is not None and sms_id in stored_ids:
+            stats['duplicates'] += 1
+            timings['dedupe'] += time.perf_counter() - dedupe_started
+            continue
+
+        if message['id'] is not None:
+            key = ('id', message['id'])
+        elif message['timestamp'] is not None:
+            key = ('timestamp', message['timestamp'], message['body'])
+        else:
+            key = None
+
+        if key is not None:
+            if key in seen:
+                stats['duplicates'] += 1
+                timings['dedupe'] += time.perf_counter() - dedupe_started
+                continue
+            seen.add(key)
+        timings['dedupe'] += time.perf_counter() - dedupe_started
+
+        stats['parsed'] += 1
+        message['sms_id'] = sms_id
+        batch.append(message)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    return _with_rate(stats, time.perf_counter() - started)
+
+
+def _with_rate(stats, elapsed):
+    """Copy stats and add elapsed time and throughput."""
+    result = dict(stats)
+    result['timings'] = dict(stats['timings'])
+    result['elapsed'] = round(elapsed, 3)
+    result['msgs_per_sec'] = round(stats['read'] / elapsed, 1) if elapsed > 0 else 0.0
+    return result
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing bulk ingest...")
+
+    sample = [
+        "₹299 debited from your account for Amazon purchase",
+        "Rs.120 spent via UPI to Zomato",
+        "Rs.120 spent via UPI to Zomato",
+        "Your account credited with ₹500",
+        '{"id": 7, "timestamp": "2026-01-18T09:30:00", "body": "INR 200 paid to Uber"}',
+        '{"id": 7, "timestamp": "2026-01-18T09:30:00", "body": "INR 200 paid to Uber"}',
+    ]
+    result = ingest_lines(sample)
+    print(f"Read: {result['read']}, stored: {result['stored']}, "
+          f"skipped: {result['skipped']}, duplicates: {result['duplicates']}")
@@ -0,0 +1,275 @@
+"""
+Categorizer Module
+Maps merchants to spending categories.
+
+All merchant keywords are compiled into one Aho-Corasick automaton, so
+classifying a name is a single pass over its characters however many
+keywords the dictionary holds. Results are memoized per merchant.
+
+Users extend or override the built-in keywords in data/categories.json:
+
+    {"chaayos": "food", "cult.fit": "health"}
+"""
+
+import json
+import os
+
+from logic import metrics
+
+
+# Category for merchants that match no keyword
+UNCATEGORIZED = 'other'
+
+# Built-in keywords per category (matched case-insensitively, as whole words)
+DEFAULT_CATEGORIES = {
+    'food': ['zomato', 'swiggy', 'dominos', 'starbucks', 'mcdonalds', 'kfc',
+             'pizza hut', 'burger king', 'cafe', 'restaurant'],
+    'groceries': ['bigbasket', 'dmart', 'reliance fresh', 'blinkit', 'zepto',
+                  'more supermarket', 'grocery'],
+    'shopping': ['amazon', 'flipkart', 'myntra', 'ajio', 'nykaa', 'meesho'],
+    'transport': ['uber', 'ola', 'rapido', 'irctc', 'metro', 'indian oil',
+                  'hp petrol', 'fuel'],
+    'entertainment': ['netflix', 'spotify', 'bookmyshow', 'hotstar', 'prime video', 'pvr'],
+    'bills': ['airtel', 'jio', 'vodafone', 'bsnl', 'electricity', 'tata power', 'broadband'],
+    'health': ['apollo', 'pharmeasy', 'netmeds', 'pharmacy', 'hospital'],
+}
+
+# Memoized merchants kept per matcher before the memo is reset
+MEMO_LIMIT = 10000
+
+
+class MerchantMatcher:
+    """
+    Aho-Corasick automaton over merchant keywords.
+
+        matcher = MerchantMatcher({'zomato': 'food', 'reliance fresh': 'groceries'})
+        matcher.categorize('Reliance Fresh Ltd')   # 'groceries'
+
+    Only whole-word matches count ('ola' does not match 'Coca-Cola').
+    When several keywords match, the longest wins.
+    """
+
+    def __init__(self, keywords):
+        """
+        Build the automaton.
+
+        Args:
+            keywords (dict): Keyword -> category
+        """
+        # Node i: outgoing edges, failure link, matches ending here
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._memo = {}
+
+        for keyword, category in keywords.items():
+            self._add(keyword.lower(), category)
+        self._link()
+
+    def _add(self, keyword, category):
+        """Add one keyword to the trie."""
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+        self._output[node] = ((len(keyword), category),)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+
+    def find(self, text):
+        """
+        Find the best keyword match in text.
+
+        Args:
+            text (str): Merchant name or SMS text
+
+        Returns:
+            tuple or None: (category, start, end) of the longest whole-word
+                           match, or None
+        """
+        text = text.lower()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        best = None
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            for length, category in output[node]:
+                start = index - length + 1
+                end = index + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum():
+                    continue
+                if best is None or length > best[2] - best[1]:
+                    best = (category, start, end)
+
+        return best
+
+    def categorize(self, merchant):
+        """
+        Get the category for a merchant name, memoized.
+
+        Args:
+            merchant (str): Merchant name
+
+        Returns:
+            str: Category, or UNCATEGORIZED
+        """
+        key = merchant.lower()
+        category = self._memo.get(key)
+        metrics.record_cache('categorizer', category is not None)
+        if category is not None:
+            return category
+
+        match = self.find(key)
+        category = match[0] if match else UNCATEGORIZED
+
+        if len(self._memo) >= MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[key] = category
+        return category
+
+
+# Categories file path -> (mtime, matcher)
+_matcher_cache = {}
+
+
+def get_categories_file_path():
+    """
+    Get the full path to categories.json file.
+
+    Returns:
+        str: Absolute path to categories.json
+    """
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'categories.json')
+
+
+def load_user_categories():
+    """
+    Load the user's keyword -> category overrides.
+
+    Returns:
+        dict: Keyword -> category (empty if none saved)
+    """
+    file_path = get_categories_file_path()
+
+    if not os.path.exists(file_path):
+        return {}
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        metrics.record_io('load', file_path)
+        return data
+    except (json.JSONDecodeError, IOError):
+        return {}
+
+
+def save_user_categories(categories):
+    """
+    Save the user's keyword -> category overrides.
+
+    Args:
+        categories (dict): Keyword -> category
+    """
+    from logic.expense_store import write_lock
+    file_path = get_categories_file_path()
+
+    try:
+        with write_lock(), open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(categories, file, indent=2, ensure_ascii=False)
+        metrics.record_io('save', file_path)
+    except IOError as e:
+        print(f"Error saving categories: {e}")
+
+
+def add_merchant_category(keyword, category):
+    """
+    Map a merchant keyword to a category for this user.
+
+    Args:
+        keyword (str): Merchant name or part of it, e.g. 'chaayos'
+        category (str): Category name, e.g. 'food'
+    """
+    from logic.expense_store import data_lock
+
+    with data_lock():
+        categories = load_user_categories()
+        categories[keyword.lower()] = category
+        save_user_categories(categories)
+
+
+def get_matcher():
+    """
+    Get the compiled matcher for the built-in and user keywords.
+
+    The matcher is rebuilt only when categories.json changes.
+
+    Returns:
+        MerchantMatcher: Compiled matcher
+    """
+    file_path = get_categories_file_path()
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    cached = _matcher_cache.get(file_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    keywords = {keyword: category
+                for category, words in DEFAULT_CATEGORIES.items()
+                for keyword in words}
+    keywords.update(load_user_categories())
+
+    matcher = MerchantMatcher(keywords)
+    _matcher_cache[file_path] = (mtime, matcher)
+    return matcher
+
+
+def categorize_merchant(merchant):
+    """
+    Get the category for a merchant.
+
+    Args:
+        merchant (str or None): Merchant name, e.g. from parse_merchant()
+
+    Returns:
+        str: Category, or UNCATEGORIZED
+    """
+    if not merchant:
+        return UNCATEGORIZED
+    return get_matcher().categorize(merchant)
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing categorizer...")
+
+    for name in ['Zomato', 'Reliance Fresh', 'Uber India', 'Coca-Cola', 'Corner Shop']:
+        print(f"{name}: {categorize_merchant(name)}")
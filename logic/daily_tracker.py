@@ -3,8 +3,63 @@ Daily Tracker Module
 Calculates daily spending totals.
 """
 
+import os
 from datetime import datetime
-from logic.expense_store import get_today_expenses, get_expenses_for_date
+from logic.expense_store import get_today_expenses, get_expenses_for_date, get_expenses_file_path
+from logic.tenant import get_current_user
+
+
+# (user, date) -> (total, count, ledger mtime) kept up to date from
+# ExpenseAdded events, so repeat lookups skip reading the ledger
+_aggregates = {}
+
+
+def on_expense_added(event):
+    """
+    Update the running total and count for the event's date.
+    
+    Only expenses already written to disk are tracked; transactions
+    keep their own totals until they commit.
+    
+    Args:
+        event (ExpenseAdded): Published by expense_store
+    """
+    if event.txn is not None:
+        return
+    
+    try:
+        mtime = os.stat(get_expenses_file_path()).st_mtime_ns
+    except OSError:
+        return
+    
+    _aggregates[(event.user_id, event.date_str)] = (event.daily_total, event.count, mtime)
+
+
+def _get_aggregate(date_str):
+    """
+    Get the tracked (total, count) for a date if the ledger hasn't
+    changed since it was recorded.
+    
+    Args:
+        date_str (str): Date in YYYY-MM-DD format
+    
+    Returns:
+        tuple or None: (total, count), or None if not tracked or stale
+    """
+    cached = _aggregates.get((get_current_user(), date_str))
+    if cached is None:
+        return None
+    
+    try:
+        mtime = os.stat(get_expenses_file_path()).st_mtime_ns
+    except OSError:
+        return None
+    
+    # Another process wrote the ledger since the event
+    if mtime != cached[2]:
+        return None
+    
+    return cached[0], cached[1]
 
 
 def get_daily_total(date_str=None):
@@ -19,12 +74,14 @@ def get_daily_total(date_str=None):
         int: Total amount spent on that date
     """
     if date_str is None:
-        # Use today's date
-        expenses = get_today_expenses()
-    else:
-        # Use specified date
-        expenses = get_expenses_for_date(date_str)
+        date_str = datetime.now().strftime('%Y-%m-%d')
+    
+    cached = _get_aggregate(date_str)
+    if cached is not None:
+        return cached[0]
     
+    expenses = get_expenses_for_date(date_str)
+
     # Sum all expenses for the date
     # If no expenses, sum returns 0
     total = sum(expenses)
@@ -54,9 +111,13 @@ def get_expense_count(date_str=None):
         int: Number of expenses on that date
     """
     if date_str is None:
-        expenses = get_today_expenses()
-    else:
-        expenses = get_expenses_for_date(date_str)
+        date_str = datetime.now().strftime('%Y-%m-%d')
+    
+    cached = _get_aggregate(date_str)
+    if cached is not None:
+        return cached[1]
+    
+    expenses = get_expenses_for_date(date_str)
     
     return len(expenses)
 
@@ -0,0 +1,188 @@
+"""
+Day Scheduler Module
+Finalizes each day's streak at midnight using timer-based wakeups.
+
+Days end at midnight on the same clock the ledger dates expenses with,
+the process's local time. A 'timezone' in config.json is applied to the
+whole process by use_timezone(), so the ledger and the scheduler agree.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from logic.limit_checker import load_config
+from logic.streak_manager import finalize_streaks
+from logic.tenant import get_current_user, use_user
+
+
+# Small delay after midnight so the new day has definitely started
+MIDNIGHT_GRACE_SECONDS = 1
+
+
+def get_timezone(name=None):
+    """
+    Resolve the timezone used to decide when a day ends.
+
+    Args:
+        name (str, optional): IANA timezone name, e.g. 'Asia/Kolkata'.
+                              If None, uses 'timezone' from config.json.
+
+    Returns:
+        tzinfo or None: Timezone object, or None for the system local time
+    """
+    if name is None:
+        name = load_config().get('timezone')
+    if not name:
+        return None
+
+    try:
+        from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    except ImportError:
+        return None
+
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError:
+        print(f"Unknown timezone '{name}', using local time")
+        return None
+
+
+def use_timezone(name=None):
+    """
+    Make the process's local time follow the configured timezone.
+
+    Expenses are dated with the local time, so this has to run before
+    anything is recorded. It does nothing on platforms without
+    time.tzset() (Windows), where the system local time is used.
+
+    Args:
+        name (str, optional): IANA timezone name. If None, uses
+                              'timezone' from config.json.
+
+    Returns:
+        tzinfo or None: Timezone applied, or None for the system local time
+    """
+    tz = get_timezone(name)
+    if tz is None or not hasattr(time, 'tzset'):
+        return None
+
+    os.environ['TZ'] = tz.key
+    time.tzset()
+    return tz
+
+
+def seconds_until_midnight(now):
+    """
+    Get the number of seconds until the next midnight.
+
+    The next midnight is found on the wall clock and then converted to
+    an absolute time, so days that are 23 or 25 hours long because of
+    a DST change are handled.
+
+    Args:
+        now (datetime): Current time. Naive times are local time.
+
+    Returns:
+        float: Seconds until the start of the next day
+    """
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    if now.tzinfo is None:
+        # Local time: let the system rules pick the UTC offset
+        midnight = midnight.astimezone()
+    else:
+        # zoneinfo picks the offset in effect at that wall-clock time
+        midnight = midnight.replace(tzinfo=now.tzinfo)
+    return midnight.timestamp() - now.timestamp()
+
+
+class DayEndScheduler:
+    """
+    Background scheduler that finalizes streaks at the end of each day.
+
+    On start it catches up on every day missed while it was not running,
+    then sleeps on a timer until the next midnight.
+    """
+
+    def __init__(self, on_finalize=None):
+        """
+        Args:
+            on_finalize (callable, optional): Called with the streak data
+                                              after each finalization
+        """
+        # Timer threads don't inherit the caller's context
+        self.user_id = get_current_user()
+        self.on_finalize = on_finalize
+        self._timer = None
+        self._lock = threading.Lock()
+        self._running = False
+
+    def now(self):
+        """Get the current time on the ledger's clock."""
+        return datetime.now()
+
+    def finalize_through_yesterday(self):
+        """
+        Finalize every completed day up to yesterday.
+
+        Returns:
+            dict or None: Streak data, or None if nothing needed doing
+        """
+        yesterday = (self.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        # A transaction, so it waits for other threads' and processes'
+        # commits instead of overwriting them
+        with use_user(self.user_id):
+            result = finalize_streaks(yesterday)
+
+        if result is not None and self.on_finalize is not None:
+            self.on_finalize(result)
+        return result
+
+    def start(self):
+        """Catch up on missed days and schedule the next midnight wakeup."""
+        with self._lock:
+            self._running = True
+        self.finalize_through_yesterday()
+        self._schedule_next()
+
+    def stop(self):
+        """Cancel the pending wakeup."""
+        with self._lock:
+            self._running = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule_next(self):
+        """Arm a timer for just after the next midnight."""
+        delay = seconds_until_midnight(self.now()) + MIDNIGHT_GRACE_SECONDS
+
+        with self._lock:
+            if not self._running:
+                return
+            self._timer = threading.Timer(delay, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        """Timer callback: finalize the day that just ended."""
+        try:
+            self.finalize_through_yesterday()
+        finally:
+            self._schedule_next()
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing day scheduler...")
+
+    scheduler = DayEndScheduler()
+    print(f"Seconds until midnight: {seconds_until_midnight(scheduler.now()):.0f}")
+
+    result = scheduler.finalize_through_yesterday()
+    if result is None:
+        print("Already finalized through yesterday")
+    else:
+        print(f"Finalized through {result['finalized_date']}: "
+              f"current={result['current_streak']}, best={result['best_streak']}")
@@ -0,0 +1,162 @@
+"""
+Event Bus Module
+In-process publish/subscribe for expense events.
+
+The store publishes ExpenseAdded after every write, carrying the new
+daily total and count, so subscribers (tracker, limit checker, streak
+manager, forecaster, notifier) update their own state from the event
+instead of each re-reading the ledger:
+
+    subscribe(ExpenseAdded, on_expense_added)
+    publish(ExpenseAdded([299], '2026-01-18', 419, 2))
+
+Handlers run synchronously, in the order they subscribed, on the
+publishing thread. A failing handler is reported and skipped so it
+can't stop the others or the write that published the event.
+"""
+
+import threading
+
+from logic import metrics
+from logic.tenant import get_current_user
+
+
+class ExpenseAdded:
+    """
+    One or more expenses were added for a date.
+
+    Attributes:
+        amounts (tuple): Amounts added in this write
+        date_str (str): Date in YYYY-MM-DD format
+        daily_total (int): Total for the date after the write
+        count (int): Number of expenses for the date after the write
+        txn (ExpenseTransaction or None): Open transaction the expense was
+                                          added to, or None if it was
+                                          written straight to disk
+        user_id (str or None): User the expense belongs to
+        results (dict): Filled in by handlers, e.g. 'crossing', 'streak'
+    """
+
+    def __init__(self, amounts, date_str, daily_total, count, txn=None):
+        self.amounts = tuple(amounts)
+        self.date_str = date_str
+        self.daily_total = daily_total
+        self.count = count
+        self.txn = txn
+        self.user_id = get_current_user()
+        self.results = {}
+
+    @property
+    def amount(self):
+        """int: Sum of the amounts added."""
+        return sum(self.amounts)
+
+
+class LimitCrossed:
+    """
+    A daily total crossed the warning or limit threshold for the first
+    time on a date.
+
+    Attributes:
+        level (str): 'warning' or 'exceeded'
+        date_str (str): Date in YYYY-MM-DD format
+        daily_total (int): Total for the date
+        limit (int): Daily limit in effect
+        user_id (str or None): User the total belongs to
+    """
+
+    def __init__(self, level, date_str, daily_total, limit):
+        self.level = level
+        self.date_str = date_str
+        self.daily_total = daily_total
+        self.limit = limit
+        self.user_id = get_current_user()
+
+
+_lock = threading.Lock()
+# Event class -> tuple of handlers; replaced, never mutated, so
+# publish() can read it without taking the lock
+_subscribers = {}
+
+
+def subscribe(event_type, handler):
+    """
+    Call handler for every published event of event_type.
+
+    Subscribing the same handler twice has no effect.
+
+    Args:
+        event_type (type): Event class, e.g. ExpenseAdded
+        handler (callable): Called with the event
+    """
+    with _lock:
+        handlers = _subscribers.get(event_type, ())
+        if handler not in handlers:
+            _subscribers[event_type] = handlers + (handler,)
+
+
+def unsubscribe(event_type, handler):
+    """
+    Stop calling handler for event_type.
+
+    Args:
+        event_type (type): Event class
+        handler (callable): Handler passed to subscribe()
+    """
+    with _lock:
+        handlers = _subscribers.get(event_type, ())
+        _subscribers[event_type] = tuple(item for item in handlers if item != handler)
+
+
+def has_subscribers(event_type):
+    """
+    Check whether anyone listens for event_type.
+
+    Publishers can use this to skip building events nobody reads.
+
+    Args:
+        event_type (type): Event class
+
+    Returns:
+        bool: True if at least one handler is subscribed
+    """
+    return bool(_subscribers.get(event_type))
+
+
+def publish(event):
+    """
+    Deliver an event to every handler subscribed to its class.
+
+    Args:
+        event: Event instance, e.g. ExpenseAdded
+
+    Returns:
+        The same event, with any results the handlers filled in
+    """
+    event_name = type(event).__name__
+    metrics.increment('events_published_total', 'event', event_name)
+
+    for handler in _subscribers.get(type(event), ()):
+        try:
+            handler(event)
+        except Exception as e:
+            handler_name = getattr(handler, '__qualname__', repr(handler))
+            metrics.increment('event_handler_errors_total', 'handler', handler_name)
+            print(f"Error in {event_name} handler {handler_name}: {e}")
+
+    return event
+
+
+def clear():
+    """Remove every subscription."""
+    with _lock:
+        _subscribers.clear()
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing event bus...")
+
+    subscribe(ExpenseAdded, lambda event: event.results.update(seen=event.amount))
+    event = publish(ExpenseAdded([120, 30], '2026-01-18', 150, 2))
+    print(f"Handler results: {event.results}")
@@ -1,11 +1,37 @@
 """
 Expense Parser Module
-Extracts expense amounts from bank SMS text messages.
+Extracts expense amounts and merchants from bank SMS text messages.
 """
 
 import re
 
+from logic import metrics
 
+
+# Text that ends a merchant name: a following keyword or punctuation
+_MERCHANT_END = (r"(?=\s+(?:on|from|via|using|ref|upi|for|with|avl|dated|a/c)\b"
+                 r"|[.,;:]\s|[.,;:]?\s*$)")
+
+# "to Zomato", "at Flipkart" - tried first
+_MERCHANT_PATTERN = re.compile(
+    r"\b(?:to|at)\s+(?P<name>[A-Za-z0-9][A-Za-z0-9&'.\- ]*?)" + _MERCHANT_END,
+    re.IGNORECASE
+)
+
+# "for Spotify subscription" - only if no "to"/"at" merchant was found
+_FOR_PATTERN = re.compile(
+    r"\bfor\s+(?P<name>[A-Za-z0-9][A-Za-z0-9&'.\- ]*?)" + _MERCHANT_END,
+    re.IGNORECASE
+)
+
+# Words that follow "to"/"for" but aren't merchants
+_NOT_MERCHANTS = {'upi', 'your', 'a/c', 'ac', 'account', 'payment', 'txn', 'transaction'}
+
+# Generic trailing words dropped from names ("Spotify subscription")
+_TRAILING_WORDS = {'subscription', 'order', 'payment', 'purchase', 'bill', 'recharge', 'services'}
+
+
+@metrics.timed('parse')
 def parse_expense_amount(sms_text):
     """
     Parse expense amount from SMS text.
@@ -61,6 +87,56 @@ def parse_expense_amount(sms_text):
     return None
 
 
+def parse_merchant(sms_text):
+    """
+    Parse the merchant name from SMS text.
+    
+    Args:
+        sms_text (str): Raw SMS text from bank
+        
+    Returns:
+        str or None: Merchant name as written in the SMS, or None if not found
+        
+    Examples:
+        "INR 200 paid to Zomato" -> "Zomato"
+        "Rs 150 spent at Reliance Fresh on 18-01-26" -> "Reliance Fresh"
+        "₹119 debited for Spotify subscription" -> "Spotify"
+    """
+    if not sms_text:
+        return None
+    
+    for pattern in (_MERCHANT_PATTERN, _FOR_PATTERN):
+        for match in pattern.finditer(sms_text):
+            words = match.group('name').split()
+            if words[0].lower() in _NOT_MERCHANTS:
+                continue
+            
+            while len(words) > 1 and words[-1].lower() in _TRAILING_WORDS:
+                words.pop()
+            return ' '.join(words)
+    
+    return None
+
+
+def parse_expense(sms_text):
+    """
+    Parse amount and merchant from SMS text.
+    
+    Args:
+        sms_text (str): Raw SMS text from bank
+        
+    Returns:
+        dict or None: Dictionary with 'amount' and 'merchant' keys
+                      (merchant may be None), or None if the SMS is not
+                      an expense or its amount isn't positive
+    """
+    amount = parse_expense_amount(sms_text)
+    if amount is None or amount <= 0:
+        return None
+    
+    return {'amount': amount, 'merchant': parse_merchant(sms_text)}
+
+
 # Test function for development
 def _test_parser():
     """Internal test function to verify parser works correctly."""
@@ -79,6 +155,21 @@ def _test_parser():
         result = parse_expense_amount(text)
         status = "PASSED" if result == expected else "FAILED"
         print(f"{status} Input: '{text}' -> Expected: {expected}, Got: {result}")
+    
+    merchant_cases = [
+        ("INR 200 paid to Zomato", "Zomato"),
+        ("Rs 150 spent at Amazon", "Amazon"),
+        ("Rs.120 debited from HDFC Bank A/c XX1234 to Reliance Fresh on 18-01-26.", "Reliance Fresh"),
+        ("Your SBI A/c XX1234 is debited by ₹99 for UPI payment to Swiggy. Ref 123", "Swiggy"),
+        ("₹119 debited for Spotify subscription", "Spotify"),
+        ("₹299 debited from your account", None),
+    ]
+    
+    print("Testing merchant extraction...")
+    for text, expected in merchant_cases:
+        result = parse_merchant(text)
+        status = "PASSED" if result == expected else "FAILED"
+        print(f"{status} Input: '{text}' -> Expected: {expected}, Got: {result}")
 
 
 if __name__ == "__main__":
@@ -1,31 +1,119 @@
 """
 Expense Store Module
 Handles saving and loading expenses from JSON file.
+
+expenses.json keeps its original layout (date -> list of amounts).
+Per-expense details (time, merchant, category, source SMS ID) live in
+expense_meta.json as columns parallel to each day's amounts, with
+merchants and categories stored as small integer codes. Each column is
+saved as the base64 of its little-endian array bytes, so loading it is
+a single copy rather than parsing one number at a time.
+
+Functions here that change files hold the data folder's commit.lock
+(see write_lock()), the same lock transactions hold while committing.
+Taking that lock creates the folder if it doesn't exist yet, so
+looking up paths never touches the disk.
 """
 
+import base64
 import json
 import os
+import sys
+from array import array
+from contextlib import contextmanager
 from datetime import datetime
 
+from logic import event_bus, file_lock, metrics
+from logic.tenant import get_current_user, get_data_root, get_user_data_dir
+
+
+def get_base_data_dir():
+    """
+    Get the root data directory, ignoring any selected user.
+    
+    Returns:
+        str: Absolute path to the root data directory
+    """
+    # A root picked with tenant.use_data_root() wins; SPENDWISE_DATA_DIR
+    # moves all state elsewhere (e.g. for benchmarks)
+    base_dir = get_data_root() or os.environ.get('SPENDWISE_DATA_DIR')
+    
+    if not base_dir:
+        # Get the directory where this file is located
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        # Go up one level to project root, then into data folder
+        project_root = os.path.dirname(current_dir)
+        base_dir = os.path.join(project_root, 'data')
+    
+    return base_dir
+
 
 def get_data_dir():
     """
-    Get the absolute path to the data directory.
+    Get the absolute path to the data directory (does not create it).
+    
+    When a user is selected with tenant.use_user(), this is that
+    user's own folder inside the data directory. Folders are created
+    by the first write, when its lock is taken.
     
     Returns:
         str: Absolute path to data directory
     """
-    # Get the directory where this file is located
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # Go up one level to project root, then into data folder
-    project_root = os.path.dirname(current_dir)
-    data_dir = os.path.join(project_root, 'data')
+    data_dir = get_base_data_dir()
+    user_id = get_current_user()
+    if user_id is not None:
+        data_dir = get_user_data_dir(data_dir, user_id)
+    return data_dir
+
+
+# Locked while the folder's files change; holds a commit counter
+LOCK_FILE = 'commit.lock'
+
+
+def get_lock_file_path():
+    """
+    Get the full path to the data folder's commit.lock file.
     
-    # Create data directory if it doesn't exist
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
+    Returns:
+        str: Absolute path to commit.lock
+    """
+    return os.path.join(get_data_dir(), LOCK_FILE)
+
+
+@contextmanager
+def data_lock():
+    """
+    Hold the data folder's commit lock, e.g. around a read-modify-write.
     
-    return data_dir
+    Transactions hold the same lock while they change files, so nothing
+    done inside this block interleaves with a commit. Reentrant within
+    a thread.
+    """
+    lock_path = get_lock_file_path()
+    file_lock.acquire(lock_path)
+    try:
+        yield
+    finally:
+        file_lock.release(lock_path)
+
+
+@contextmanager
+def write_lock():
+    """
+    Hold the data folder's commit lock while writing files directly.
+    
+    The write counts as a commit, so a transaction loaded before it
+    re-reads the files before its next change instead of overwriting it.
+    """
+    lock_path = get_lock_file_path()
+    lock_file = file_lock.acquire(lock_path)
+    try:
+        yield
+    finally:
+        try:
+            file_lock.bump_counter(lock_file)
+        finally:
+            file_lock.release(lock_path)
 
 
 def get_expenses_file_path():
@@ -38,6 +126,7 @@ def get_expenses_file_path():
     return os.path.join(get_data_dir(), 'expenses.json')
 
 
+@metrics.timed('store_load')
 def load_expenses():
     """
     Load expenses from JSON file.
@@ -55,12 +144,14 @@ def load_expenses():
     try:
         with open(file_path, 'r', encoding='utf-8') as file:
             data = json.load(file)
-            return data
+        metrics.record_io('load', file_path)
+        return data
     except (json.JSONDecodeError, IOError):
         # If file is corrupted or can't be read, return empty dict
         return {}
 
 
+@metrics.timed('store_save')
 def save_expenses(expenses_data):
     """
     Save expenses to JSON file.
@@ -71,18 +162,273 @@ def save_expenses(expenses_data):
     file_path = get_expenses_file_path()
     
     try:
-        with open(file_path, 'w', encoding='utf-8') as file:
+        with write_lock(), open(file_path, 'w', encoding='utf-8') as file:
             json.dump(expenses_data, file, indent=2, ensure_ascii=False)
+        metrics.record_io('save', file_path)
     except IOError as e:
         print(f"Error saving expenses: {e}")
 
 
-def add_expense(amount):
+# Column name -> array typecode. Missing values are stored as -1.
+METADATA_COLUMNS = {
+    'time': 'i',        # Seconds since midnight
+    'merchant': 'i',    # Code into ExpenseMetadata.merchants
+    'category': 'i',    # Code into ExpenseMetadata.categories
+    'sms_id': 'q',      # ID of the SMS the expense came from
+}
+
+
+class ExpenseMetadata:
+    """
+    Per-expense details, stored column-wise.
+    
+    Row i of a day's columns describes expenses[date][i]. Days or rows
+    recorded before metadata existed simply have shorter columns.
+    """
+    
+    def __init__(self, merchants=None, categories=None, days=None):
+        self.merchants = list(merchants or [])
+        self.categories = list(categories or [])
+        self._merchant_codes = {name: code for code, name in enumerate(self.merchants)}
+        self._category_codes = {name: code for code, name in enumerate(self.categories)}
+        # Date -> {column name: array}
+        self.days = {}
+        
+        for date_str, columns in (days or {}).items():
+            self.days[date_str] = {name: _decode_column(typecode, columns.get(name, []))
+                                   for name, typecode in METADATA_COLUMNS.items()}
+    
+    def _encode(self, value, names, codes):
+        """Get the code for a merchant or category, adding it if new."""
+        if value is None:
+            return -1
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+    
+    def record(self, date_str, row, when=None, merchant=None, category=None, sms_id=None):
+        """
+        Store details for one expense.
+        
+        Args:
+            date_str (str): Date in YYYY-MM-DD format
+            row (int): Position of the expense in that day's amounts
+            when (datetime, optional): Time of the expense
+            merchant (str, optional): Merchant name
+            category (str, optional): Category name
+            sms_id (int, optional): Source SMS ID
+        """
+        columns = self.days.get(date_str)
+        if columns is None:
+            columns = self.days[date_str] = {name: array(typecode)
+                                             for name, typecode in METADATA_COLUMNS.items()}
+        
+        values = {
+            'time': -1 if when is None else when.hour * 3600 + when.minute * 60 + when.second,
+            'merchant': self._encode(merchant, self.merchants, self._merchant_codes),
+            'category': self._encode(category, self.categories, self._category_codes),
+            'sms_id': -1 if sms_id is None else sms_id,
+        }
+        
+        for name, column in columns.items():
+            # Expenses added without details get empty rows
+            if len(column) < row:
+                column.extend([-1] * (row - len(column)))
+            if len(column) == row:
+                column.append(values[name])
+            else:
+                column[row] = values[name]
+    
+    def get_row(self, date_str, row):
+        """
+        Get the details of one expense.
+        
+        Args:
+            date_str (str): Date in YYYY-MM-DD format
+            row (int): Position of the expense in that day's amounts
+            
+        Returns:
+            dict: 'time' ('HH:MM:SS'), 'merchant', 'category' and 'sms_id'
+                  (each None if unknown)
+        """
+        columns = self.days.get(date_str, {})
+        
+        def value(name):
+            column = columns.get(name)
+            if column is None or row >= len(column) or column[row] < 0:
+                return None
+            return column[row]
+        
+        seconds = value('time')
+        merchant = value('merchant')
+        category = value('category')
+        return {
+            'time': None if seconds is None else
+                    f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}",
+            'merchant': None if merchant is None else self.merchants[merchant],
+            'category': None if category is None else self.categories[category],
+            'sms_id': value('sms_id')
+        }
+    
+    def sms_ids(self):
+        """
+        Get the IDs of every SMS an expense was stored from.
+        
+        Returns:
+            set: SMS IDs
+        """
+        ids = set()
+        for columns in self.days.values():
+            ids.update(columns['sms_id'])
+        ids.discard(-1)
+        return ids
+    
+    def category_totals(self, expenses, dates=None):
+        """
+        Sum spending per category.
+        
+        Works on the integer codes and only turns them into names at
+        the end. Uses NumPy when it is installed.
+        
+        Args:
+            expenses (dict): Ledger from load_expenses()
+            dates (iterable, optional): Dates to include. If None, all.
+            
+        Returns:
+            dict: Category -> total; expenses without a category are
+                  under None
+        """
+        if dates is None:
+            dates = expenses.keys()
+        
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        
+        # Slot 0 holds uncategorized spending, slot code + 1 each category
+        sums = [0] * (len(self.categories) + 1)
+        
+        for date_str in dates:
+            amounts = expenses.get(date_str)
+            if not amounts:
+                continue
+            
+            codes = self.days.get(date_str, {}).get('category', array('i'))
+            codes = codes[:len(amounts)]
+            if len(codes) < len(amounts):
+                codes.extend([-1] * (len(amounts) - len(codes)))
+            
+            if np is not None:
+                day_sums = np.bincount(np.frombuffer(codes, dtype=np.int32) + 1,
+                                       weights=amounts, minlength=len(sums))
+                for slot, total in enumerate(day_sums):
+                    sums[slot] += total
+            else:
+                for code, amount in zip(codes, amounts):
+                    sums[code + 1] += amount
+        
+        totals = {}
+        for slot, total in enumerate(sums):
+            if total:
+                name = None if slot == 0 else self.categories[slot - 1]
+                totals[name] = int(total) if float(total).is_integer() else total
+        return totals
+    
+    def to_dict(self):
+        """
+        Get the JSON form.
+        
+        Returns:
+            dict: 'merchants', 'categories' and 'days' (date -> encoded columns)
+        """
+        return {
+            'merchants': self.merchants,
+            'categories': self.categories,
+            'days': {date_str: {name: _encode_column(column) for name, column in columns.items()}
+                     for date_str, columns in self.days.items()}
+        }
+
+
+def _encode_column(column):
+    """Encode an array as base64 of its little-endian bytes."""
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return base64.b64encode(column.tobytes()).decode('ascii')
+
+
+def _decode_column(typecode, value):
+    """Decode a column from _encode_column(), or from a plain list."""
+    if not isinstance(value, str):
+        return array(typecode, value)
+    
+    column = array(typecode)
+    column.frombytes(base64.b64decode(value))
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def get_metadata_file_path():
+    """
+    Get the full path to expense_meta.json file.
+    
+    Returns:
+        str: Absolute path to expense_meta.json
+    """
+    return os.path.join(get_data_dir(), 'expense_meta.json')
+
+
+def load_expense_metadata():
+    """
+    Load per-expense details.
+    
+    Returns:
+        ExpenseMetadata: Details (empty if none recorded yet)
+    """
+    file_path = get_metadata_file_path()
+    
+    if not os.path.exists(file_path):
+        return ExpenseMetadata()
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        metrics.record_io('load', file_path)
+        return ExpenseMetadata(data.get('merchants'), data.get('categories'), data.get('days'))
+    except (json.JSONDecodeError, IOError):
+        return ExpenseMetadata()
+
+
+def save_expense_metadata(metadata):
+    """
+    Save per-expense details.
+    
+    Args:
+        metadata (ExpenseMetadata): Details to save
+    """
+    file_path = get_metadata_file_path()
+    
+    try:
+        with write_lock(), open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(metadata.to_dict(), file, indent=2, ensure_ascii=False)
+        metrics.record_io('save', file_path)
+    except IOError as e:
+        print(f"Error saving expense details: {e}")
+
+
+def add_expense(amount, merchant=None, category=None, sms_id=None):
     """
     Add a new expense for today.
     
     Args:
         amount (int): Expense amount to add
+        merchant (str, optional): Merchant name
+        category (str, optional): Spending category
+        sms_id (int, optional): ID of the SMS the expense came from
         
     Returns:
         bool: True if expense was added successfully, False otherwise
@@ -91,22 +437,77 @@ def add_expense(amount):
         return False
     
     # Get today's date in YYYY-MM-DD format
-    today = datetime.now().strftime('%Y-%m-%d')
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
     
-    # Load existing expenses
-    expenses = load_expenses()
+    # Nobody else may write between the load and the save
+    with data_lock():
+        # Load existing expenses
+        expenses = load_expenses()
+        
+        # Add today's date if it doesn't exist
+        if today not in expenses:
+            expenses[today] = []
+        
+        # Append the new expense
+        expenses[today].append(amount)
+        
+        # Save back to file
+        save_expenses(expenses)
+        
+        metadata = load_expense_metadata()
+        metadata.record(today, len(expenses[today]) - 1, now, merchant, category, sms_id)
+        save_expense_metadata(metadata)
+    
+    _publish_added([amount], today, expenses[today])
+    
+    return True
+
+
+def add_expenses(amounts, date_str=None):
+    """
+    Add many expenses with a single load and save.
     
-    # Add today's date if it doesn't exist
-    if today not in expenses:
-        expenses[today] = []
+    Args:
+        amounts (list): Expense amounts to add; invalid ones are skipped
+        date_str (str, optional): Date in YYYY-MM-DD format.
+                                  If None, uses today's date.
+        
+    Returns:
+        int: Number of expenses added
+    """
+    valid = [amount for amount in amounts if amount is not None and amount > 0]
+    if not valid:
+        return 0
     
-    # Append the new expense
-    expenses[today].append(amount)
+    if date_str is None:
+        date_str = datetime.now().strftime('%Y-%m-%d')
     
-    # Save back to file
-    save_expenses(expenses)
+    with data_lock():
+        expenses = load_expenses()
+        expenses.setdefault(date_str, []).extend(valid)
+        save_expenses(expenses)
     
-    return True
+    _publish_added(valid, date_str, expenses[date_str])
+    
+    return len(valid)
+
+
+def _publish_added(amounts, date_str, day_expenses):
+    """
+    Tell subscribers about stored expenses.
+    
+    The new daily total and count go in the event, so subscribers
+    don't need to read the ledger again.
+    
+    Args:
+        amounts (list): Amounts just stored
+        date_str (str): Date they were stored under
+        day_expenses (list): Every expense for that date after the write
+    """
+    if event_bus.has_subscribers(event_bus.ExpenseAdded):
+        event_bus.publish(event_bus.ExpenseAdded(
+            amounts, date_str, sum(day_expenses), len(day_expenses)))
 
 
 def get_expenses_for_date(date_str):
@@ -123,6 +524,38 @@ def get_expenses_for_date(date_str):
     return expenses.get(date_str, [])
 
 
+def get_expense_details(date_str):
+    """
+    Get every expense for a date with its details.
+    
+    Args:
+        date_str (str): Date in YYYY-MM-DD format
+        
+    Returns:
+        list: Dictionaries with 'amount', 'time', 'merchant', 'category'
+              and 'sms_id' keys (details are None if unknown)
+    """
+    amounts = get_expenses_for_date(date_str)
+    metadata = load_expense_metadata()
+    
+    return [dict(metadata.get_row(date_str, row), amount=amount)
+            for row, amount in enumerate(amounts)]
+
+
+def get_category_totals(dates=None):
+    """
+    Get total spending per category.
+    
+    Args:
+        dates (iterable, optional): Dates in YYYY-MM-DD format.
+                                    If None, every recorded date.
+        
+    Returns:
+        dict: Category -> total; expenses without a category are under None
+    """
+    return load_expense_metadata().category_totals(load_expenses(), dates)
+
+
 def get_today_expenses():
     """
     Get all expenses for today.
@@ -0,0 +1,154 @@
+"""
+File Lock Module
+Exclusive locks on a file, shared between processes.
+
+Uses fcntl.flock on POSIX and msvcrt.locking on Windows. A lock is
+reentrant within the thread holding it, so a function that holds it
+can call others that take it too; other threads and processes wait.
+
+The lock file can also hold a small counter (e.g. of commits), read
+and changed while the lock is held.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Per thread: lock file path -> [open file, depth]
+_held = threading.local()
+
+
+def _held_locks():
+    """Get the calling thread's held locks."""
+    locks = getattr(_held, 'locks', None)
+    if locks is None:
+        locks = _held.locks = {}
+    return locks
+
+
+def _lock(lock_file):
+    """Block until this process has the lock on an open file."""
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+
+    # msvcrt.locking gives up after ten tries, so keep asking
+    while True:
+        lock_file.seek(0)
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            time.sleep(0.01)
+
+
+def _unlock(lock_file):
+    """Release the lock on an open file."""
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def acquire(path):
+    """
+    Wait for the lock on a file, creating the file and its folder if needed.
+
+    Args:
+        path (str): Lock file path
+
+    Returns:
+        file: The open lock file, for read_counter()/bump_counter()
+    """
+    locks = _held_locks()
+    entry = locks.get(path)
+    if entry is not None:
+        entry[1] += 1
+        return entry[0]
+
+    try:
+        lock_file = open(path, 'a+b')
+    except FileNotFoundError:
+        # First write to a new (or removed) folder
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_file = open(path, 'a+b')
+    try:
+        _lock(lock_file)
+    except BaseException:
+        lock_file.close()
+        raise
+    locks[path] = [lock_file, 1]
+    return lock_file
+
+
+def release(path):
+    """
+    Release a lock taken with acquire() by the same thread.
+
+    Args:
+        path (str): Lock file path
+    """
+    locks = _held_locks()
+    entry = locks[path]
+    entry[1] -= 1
+    if entry[1] == 0:
+        del locks[path]
+        try:
+            _unlock(entry[0])
+        finally:
+            entry[0].close()
+
+
+def is_held(path):
+    """
+    Check whether the calling thread holds a lock.
+
+    Args:
+        path (str): Lock file path
+
+    Returns:
+        bool: True if acquire() was called more often than release()
+    """
+    return path in _held_locks()
+
+
+def read_counter(lock_file):
+    """
+    Get the counter stored in a held lock file.
+
+    Args:
+        lock_file (file): File returned by acquire()
+
+    Returns:
+        int: Counter value (0 if never set)
+    """
+    lock_file.seek(0)
+    content = lock_file.read().strip()
+    return int(content) if content.isdigit() else 0
+
+
+def bump_counter(lock_file):
+    """
+    Add one to the counter stored in a held lock file.
+
+    Args:
+        lock_file (file): File returned by acquire()
+
+    Returns:
+        int: New counter value
+    """
+    counter = read_counter(lock_file) + 1
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(counter).encode('ascii'))
+    lock_file.flush()
+    return counter
@@ -5,6 +5,13 @@ Checks if daily spending is approaching or exceeding the limit.
 
 import json
 import os
+from array import array
+from datetime import datetime
+
+from logic import event_bus, metrics
+
+# Fraction of the daily limit at which a warning is raised
+WARNING_THRESHOLD = 0.8
 
 
 def get_config_file_path():
@@ -14,17 +21,8 @@ def get_config_file_path():
     Returns:
         str: Absolute path to config.json
     """
-    # Get the directory where this file is located
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # Go up one level to project root, then into data folder
-    project_root = os.path.dirname(current_dir)
-    data_dir = os.path.join(project_root, 'data')
-    
-    # Create data directory if it doesn't exist
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-    
-    return os.path.join(data_dir, 'config.json')
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'config.json')
 
 
 def load_config():
@@ -49,6 +47,7 @@ def load_config():
     try:
         with open(file_path, 'r', encoding='utf-8') as file:
             config = json.load(file)
+            metrics.record_io('load', file_path)
             # Ensure daily_limit exists
             if 'daily_limit' not in config:
                 config['daily_limit'] = 500
@@ -65,11 +64,13 @@ def save_config(config):
     Args:
         config (dict): Configuration dictionary to save
     """
+    from logic.expense_store import write_lock
     file_path = get_config_file_path()
     
     try:
-        with open(file_path, 'w', encoding='utf-8') as file:
+        with write_lock(), open(file_path, 'w', encoding='utf-8') as file:
             json.dump(config, file, indent=2, ensure_ascii=False)
+        metrics.record_io('save', file_path)
     except IOError as e:
         print(f"Error saving config: {e}")
 
@@ -95,16 +96,89 @@ def set_daily_limit(new_limit):
     Returns:
         bool: True if limit was updated successfully
     """
+    from logic.expense_store import data_lock
+    
     if new_limit <= 0:
         return False
     
-    config = load_config()
-    config['daily_limit'] = new_limit
-    save_config(config)
+    today = datetime.now().strftime('%Y-%m-%d')
+    
+    with data_lock():
+        config = load_config()
+        
+        # Keep a history of limit changes so past days can be re-judged
+        # against the limit that was in effect at the time
+        history = config.setdefault('limit_history', [])
+        if not history:
+            # The old limit applied to every day before this change
+            history.append({'date': None, 'daily_limit': config['daily_limit']})
+        
+        if history[-1]['date'] == today:
+            history[-1]['daily_limit'] = new_limit
+        else:
+            history.append({'date': today, 'daily_limit': new_limit})
+        
+        config['daily_limit'] = new_limit
+        save_config(config)
     
     return True
 
 
+def get_limits_for_dates(dates, config=None):
+    """
+    Get the daily limit that was in effect on each of the given dates.
+    
+    Walks the sorted dates and the limit history together in one pass.
+    
+    Args:
+        dates (list): Sorted list of dates in YYYY-MM-DD format
+        config (dict, optional): Configuration to use. If None, reads
+                                 from config.json.
+        
+    Returns:
+        list: Daily limit for each date, in the same order
+    """
+    if config is None:
+        config = load_config()
+    
+    history = config.get('limit_history') or []
+    if not history:
+        return [config.get('daily_limit', 500)] * len(dates)
+    
+    return list(iter_limits_for_dates(dates, config))
+
+
+def iter_limits_for_dates(dates, config=None):
+    """
+    Generator version of get_limits_for_dates(), for long date streams.
+    
+    Args:
+        dates (iterable): Sorted dates in YYYY-MM-DD format
+        config (dict, optional): Configuration to use. If None, reads
+                                 from config.json.
+        
+    Yields:
+        int: Daily limit for each date, in the same order
+    """
+    if config is None:
+        config = load_config()
+    
+    history = config.get('limit_history') or []
+    if not history:
+        history = [{'date': None, 'daily_limit': config.get('daily_limit', 500)}]
+    
+    index = 0
+    current = history[0]['daily_limit']
+    
+    for date_str in dates:
+        # Advance past every change that took effect on or before this date
+        while (index + 1 < len(history)
+               and history[index + 1]['date'] <= date_str):
+            index += 1
+            current = history[index]['daily_limit']
+        yield current
+
+
 def check_limit(daily_total):
     """
     Check if daily spending is near or over the limit.
@@ -119,8 +193,21 @@ def check_limit(daily_total):
               - limit: The daily limit value
               - percentage: Percentage of limit used
     """
-    limit = get_daily_limit()
+    return evaluate_limit(daily_total, get_daily_limit())
+
+
+@metrics.timed('limit_check')
+def evaluate_limit(daily_total, limit):
+    """
+    Check a daily total against a given limit without reading config.
     
+    Args:
+        daily_total (int): Total amount spent
+        limit (int): Daily limit to compare against
+        
+    Returns:
+        dict: Same structure as check_limit()
+    """
     # Calculate percentage of limit used
     if limit > 0:
         percentage = (daily_total / limit) * 100
@@ -128,7 +215,7 @@ def check_limit(daily_total):
         percentage = 0
     
     # Warning if at 80% or more of limit
-    warning = daily_total >= (limit * 0.8)
+    warning = daily_total >= (limit * WARNING_THRESHOLD)
     
     # Exceeded if over limit
     exceeded = daily_total > limit
@@ -141,6 +228,241 @@ def check_limit(daily_total):
     }
 
 
+def check_limits_batch(totals, limits=None):
+    """
+    Check many daily totals against their limits in one call.
+    
+    Useful for sweeps over many accounts, where calling check_limit()
+    per user would re-read config.json every time. Uses NumPy when it
+    is installed, otherwise falls back to array.array.
+    
+    Args:
+        totals (sequence): Daily totals, one per user
+        limits (sequence or int, optional): Limit per user, or one limit
+                                            shared by all. If None, the
+                                            configured daily limit is
+                                            read once and used for all.
+        
+    Returns:
+        dict: Dictionary with 'warning', 'exceeded', 'percentage'
+              sequences, each the same length as totals. Flags are
+              booleans and percentages floats either way: NumPy bool and
+              float64 arrays, or without NumPy lists of bool and an
+              array('d').
+    """
+    if limits is None:
+        limits = get_daily_limit()
+    
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    
+    if np is not None:
+        totals_arr = np.asarray(totals, dtype=np.float64)
+        limits_arr = np.broadcast_to(np.asarray(limits, dtype=np.float64),
+                                     totals_arr.shape)
+        
+        # Avoid division by zero for non-positive limits
+        safe_limits = np.where(limits_arr > 0, limits_arr, 1.0)
+        percentage = np.where(limits_arr > 0,
+                              totals_arr / safe_limits * 100, 0.0)
+        
+        return {
+            'warning': totals_arr >= limits_arr * WARNING_THRESHOLD,
+            'exceeded': totals_arr > limits_arr,
+            'percentage': np.round(percentage, 1)
+        }
+    
+    # Pure Python fallback
+    if isinstance(limits, (int, float)):
+        limits = [limits] * len(totals)
+    
+    if len(limits) != len(totals):
+        raise ValueError("totals and limits must have the same length")
+    
+    warning = [total >= limit * WARNING_THRESHOLD
+               for total, limit in zip(totals, limits)]
+    exceeded = [total > limit for total, limit in zip(totals, limits)]
+    percentage = array('d', [round(total / limit * 100, 1) if limit > 0 else 0.0
+                             for total, limit in zip(totals, limits)])
+    
+    return {
+        'warning': warning,
+        'exceeded': exceeded,
+        'percentage': percentage
+    }
+
+
+def get_alert_state_file_path():
+    """
+    Get the full path to alert_state.json file.
+    
+    Returns:
+        str: Absolute path to alert_state.json
+    """
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'alert_state.json')
+
+
+def load_alert_state():
+    """
+    Load the threshold crossing state from alert_state.json.
+    
+    Returns:
+        dict: Dictionary with 'date', 'level' and 'limit' keys
+    """
+    file_path = get_alert_state_file_path()
+    
+    default_state = {
+        'date': None,
+        'level': None,
+        'limit': None
+    }
+    
+    if not os.path.exists(file_path):
+        return default_state
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+            metrics.record_io('load', file_path)
+            for key, value in default_state.items():
+                state.setdefault(key, value)
+            return state
+    except (json.JSONDecodeError, IOError):
+        return default_state
+
+
+def save_alert_state(state):
+    """
+    Save the threshold crossing state to alert_state.json.
+    
+    Args:
+        state (dict): Crossing state dictionary to save
+    """
+    from logic.expense_store import write_lock
+    file_path = get_alert_state_file_path()
+    
+    try:
+        with write_lock(), open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=2, ensure_ascii=False)
+        metrics.record_io('save', file_path)
+    except IOError as e:
+        print(f"Error saving alert state: {e}")
+
+
+# Alert levels in increasing order of severity
+ALERT_LEVELS = [None, 'warning', 'exceeded']
+
+
+def evaluate_crossing(state, date_str, daily_total, limit):
+    """
+    Work out whether a threshold was crossed for the first time today.
+    
+    The state is updated in place. A new day, or a changed limit,
+    resets the recorded level so thresholds can fire again.
+    
+    Args:
+        state (dict): Crossing state with 'date', 'level', 'limit' keys
+        date_str (str): Date in YYYY-MM-DD format
+        daily_total (int): Total amount spent on that date
+        limit (int): Daily limit in effect
+        
+    Returns:
+        str or None: 'warning' or 'exceeded' if that threshold was just
+                     crossed, None if nothing changed
+    """
+    if state.get('date') != date_str or state.get('limit') != limit:
+        state['date'] = date_str
+        state['level'] = None
+        state['limit'] = limit
+    
+    if daily_total > limit:
+        level = 'exceeded'
+    elif daily_total >= limit * WARNING_THRESHOLD:
+        level = 'warning'
+    else:
+        level = None
+    
+    # Only escalate - a level already alerted on stays quiet
+    if ALERT_LEVELS.index(level) <= ALERT_LEVELS.index(state['level']):
+        return None
+    
+    state['level'] = level
+    return level
+
+
+def check_limit_crossing(daily_total, date_str=None):
+    """
+    Check limits and report only thresholds crossed for the first time.
+    
+    Unlike check_limit(), repeated calls after the limit is passed
+    return no event, so callers can alert once per threshold per day.
+    
+    Args:
+        daily_total (int): Total amount spent on that date
+        date_str (str, optional): Date in YYYY-MM-DD format.
+                                  If None, uses today's date.
+        
+    Returns:
+        dict: Dictionary with 'event', 'level' and 'limit' keys
+              - event: 'warning', 'exceeded' or None if no new crossing
+              - level: Highest threshold reached so far that day
+              - limit: The daily limit value
+    """
+    from logic.expense_store import data_lock
+    
+    if date_str is None:
+        date_str = datetime.now().strftime('%Y-%m-%d')
+    
+    with data_lock():
+        limit = get_daily_limit()
+        state = load_alert_state()
+        previous = dict(state)
+        
+        event = evaluate_crossing(state, date_str, daily_total, limit)
+        
+        # Only touch the file when the state actually changed
+        if state != previous:
+            save_alert_state(state)
+    
+    return {
+        'event': event,
+        'level': state['level'],
+        'limit': limit
+    }
+
+
+def on_expense_added(event):
+    """
+    Check the event's new daily total for a first-time crossing.
+    
+    Works on the open transaction if the expense was added to one,
+    otherwise on alert_state.json. Stores the level (or None) in
+    event.results['crossing']. LimitCrossed is published for a new
+    crossing right away for expenses already on disk; a transaction
+    publishes it when it commits. Expenses for other days (e.g. a
+    backfill) are ignored, so they neither alert nor reset today's
+    crossing state.
+    
+    Args:
+        event (ExpenseAdded): Published by expense_store or a transaction
+    """
+    if event.date_str != datetime.now().strftime('%Y-%m-%d'):
+        return
+    
+    if event.txn is not None:
+        event.results['crossing'] = event.txn.check_crossing(event.daily_total, event.date_str)
+        return
+    
+    result = check_limit_crossing(event.daily_total, event.date_str)
+    event.results['crossing'] = result['event']
+    if result['event'] is not None:
+        event_bus.publish(event_bus.LimitCrossed(
+            result['event'], event.date_str, event.daily_total, result['limit']))
+
+
 def get_remaining_budget():
     """
     Get remaining budget for today.
@@ -176,3 +498,8 @@ if __name__ == "__main__":
         print(f"  Warning: {result['warning']}")
         print(f"  Exceeded: {result['exceeded']}")
         print(f"  Percentage: {result['percentage']}%")
+    
+    # Test batch evaluation
+    batch = check_limits_batch(test_amounts)
+    print(f"\nBatch warning flags: {list(batch['warning'])}")
+    print(f"Batch exceeded flags: {list(batch['exceeded'])}")
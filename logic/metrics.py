@@ -0,0 +1,304 @@
+"""
+Metrics Module
+Lightweight timing, I/O and cache counters for the hot path.
+
+Disabled by default. When disabled, every hook is a single flag check,
+so the instrumented functions cost practically the same as before.
+Enable with enable() or by setting SPENDWISE_METRICS=1.
+
+Export with export_prometheus() (text exposition format) or
+export_json(). profile() wraps a block in cProfile.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_enabled = os.environ.get('SPENDWISE_METRICS') == '1'
+_lock = threading.Lock()
+
+# stage -> [bucket counts..., +Inf count, sum of seconds]
+_histograms = {}
+# (metric name, label name, label value) -> value
+_counters = {}
+
+
+def enable():
+    """Turn metrics collection on."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Turn metrics collection off."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """
+    Check whether metrics are being collected.
+
+    Returns:
+        bool: True if enabled
+    """
+    return _enabled
+
+
+def reset():
+    """Clear all collected metrics."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def observe(stage, seconds):
+    """
+    Record one latency sample for a stage.
+
+    Args:
+        stage (str): Pipeline stage name
+        seconds (float): Duration in seconds
+    """
+    with _lock:
+        buckets = _histograms.get(stage)
+        if buckets is None:
+            buckets = _histograms[stage] = [0] * (len(LATENCY_BUCKETS) + 2)
+
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                buckets[index] += 1
+                break
+        else:
+            buckets[len(LATENCY_BUCKETS)] += 1
+        buckets[-1] += seconds
+
+
+def increment(name, label=None, value=None, amount=1):
+    """
+    Add to a counter.
+
+    Args:
+        name (str): Counter name
+        label (str, optional): Label name, e.g. 'file'
+        value (str, optional): Label value, e.g. 'expenses.json'
+        amount (int): Amount to add
+    """
+    if not _enabled:
+        return
+    with _lock:
+        key = (name, label, value)
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def timed(stage):
+    """
+    Decorator that records a function's latency under `stage`.
+
+    Args:
+        stage (str): Pipeline stage name
+
+    Returns:
+        callable: Decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def record_io(kind, file_path):
+    """
+    Count a file load or save and its size.
+
+    Args:
+        kind (str): 'load' or 'save'
+        file_path (str): Path of the file that was read or written
+    """
+    if not _enabled:
+        return
+
+    name = os.path.basename(file_path)
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        size = 0
+
+    direction = 'read' if kind == 'load' else 'written'
+    increment(f'file_{kind}s_total', 'file', name)
+    increment(f'file_bytes_{direction}_total', 'file', name, size)
+
+
+def record_cache(cache, hit):
+    """
+    Count a cache hit or miss.
+
+    Args:
+        cache (str): Cache name
+        hit (bool): True for a hit, False for a miss
+    """
+    if not _enabled:
+        return
+    increment('cache_hits_total' if hit else 'cache_misses_total', 'cache', cache)
+
+
+def export_json():
+    """
+    Get a snapshot of all metrics.
+
+    Returns:
+        dict: 'latency' (per stage: count, sum, buckets), 'counters'
+              and 'cache_hit_rate' (per cache)
+    """
+    with _lock:
+        latency = {}
+        for stage, buckets in _histograms.items():
+            counts = buckets[:-1]
+            latency[stage] = {
+                'count': sum(counts),
+                'sum': buckets[-1],
+                'buckets': dict(zip([str(bound) for bound in LATENCY_BUCKETS] + ['+Inf'], counts))
+            }
+
+        counters = {}
+        for (name, label, value), amount in _counters.items():
+            key = name if label is None else f'{name}{{{label}="{value}"}}'
+            counters[key] = amount
+
+        hit_rates = {}
+        for (name, label, value), amount in _counters.items():
+            if name != 'cache_hits_total':
+                continue
+            misses = _counters.get(('cache_misses_total', label, value), 0)
+            hit_rates[value] = amount / (amount + misses)
+        for (name, label, value), amount in _counters.items():
+            if name == 'cache_misses_total' and value not in hit_rates:
+                hit_rates[value] = 0.0
+
+    return {'latency': latency, 'counters': counters, 'cache_hit_rate': hit_rates}
+
+
+def export_prometheus(file_path=None):
+    """
+    Render metrics in the Prometheus text exposition format.
+
+    Args:
+        file_path (str, optional): If given, also write the text here
+                                   (e.g. for the node_exporter textfile
+                                   collector)
+
+    Returns:
+        str: Metrics text
+    """
+    snapshot = export_json()
+    lines = ['# TYPE spendwise_stage_latency_seconds histogram']
+
+    for stage, data in sorted(snapshot['latency'].items()):
+        cumulative = 0
+        for bound, count in data['buckets'].items():
+            cumulative += count
+            lines.append(f'spendwise_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'spendwise_stage_latency_seconds_sum{{stage="{stage}"}} {data["sum"]:.9f}')
+        lines.append(f'spendwise_stage_latency_seconds_count{{stage="{stage}"}} {data["count"]}')
+
+    with _lock:
+        counters = sorted(_counters.items(), key=lambda item: (item[0][0], str(item[0][2])))
+
+    seen_types = set()
+    for (name, label, value), amount in counters:
+        metric = f'spendwise_{name}'
+        if metric not in seen_types:
+            lines.append(f'# TYPE {metric} counter')
+            seen_types.add(metric)
+        labels = '' if label is None else f'{{{label}="{value}"}}'
+        lines.append(f'{metric}{labels} {amount}')
+
+    text = '\n'.join(lines) + '\n'
+
+    if file_path is not None:
+        # Write then rename so scrapers never see a partial file
+        temp_path = file_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temp_path, file_path)
+
+    return text
+
+
+def write_snapshot(file_path):
+    """
+    Write metrics to a file, as Prometheus text for .prom files and
+    JSON otherwise.
+
+    Args:
+        file_path (str): Output path
+    """
+    if file_path.endswith('.prom'):
+        export_prometheus(file_path)
+    else:
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(export_json(), file, indent=2)
+
+
+class profile:
+    """
+    Context manager that runs the enclosed block under cProfile.
+
+        with metrics.profile('pipeline.prof'):
+            process_expense()
+
+    Stats are written to `output` if given (load with pstats), otherwise
+    the top functions by cumulative time are printed.
+    """
+
+    def __init__(self, output=None, top=20):
+        self.output = output
+        self.top = top
+        self._profiler = None
+
+    def __enter__(self):
+        import cProfile
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        return self._profiler
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler.disable()
+        if self.output is not None:
+            self._profiler.dump_stats(self.output)
+        else:
+            import pstats
+            pstats.Stats(self._profiler).sort_stats('cumulative').print_stats(self.top)
+        return False
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing metrics...")
+
+    enable()
+
+    @timed('example')
+    def example():
+        time.sleep(0.001)
+
+    for _ in range(5):
+        example()
+    record_cache('example', True)
+    record_cache('example', False)
+
+    print(export_prometheus())
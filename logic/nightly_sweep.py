@@ -0,0 +1,249 @@
+"""
+Nightly Sweep Module
+Runs end-of-day streak and limit work for every user in parallel.
+
+Users are split into shards and the shards are handed to a process
+pool, along with the root data folder. Each worker finalizes its
+users' streaks one transaction per user, then checks all their limits
+in one call to check_limits_batch(). The parent collects per-user
+summaries, reports progress and throughput, and flags shards that
+took much longer than the rest.
+
+Run:
+    python main.py sweep --workers 8
+"""
+
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from logic.expense_store import get_base_data_dir
+from logic.limit_checker import get_limits_for_dates, check_limits_batch
+from logic.pipeline import ExpenseTransaction
+from logic.tenant import iter_user_ids, use_data_root, use_user
+
+
+# Shards per worker; more, smaller shards keep all workers busy when
+# some users have much longer histories than others
+SHARDS_PER_WORKER = 4
+
+# A shard is a straggler if it took this many times the median shard time
+STRAGGLER_FACTOR = 2.0
+
+
+def partition_users(user_ids, shard_count):
+    """
+    Split users into shards of near-equal size.
+
+    Args:
+        user_ids (list): User IDs
+        shard_count (int): Number of shards wanted
+
+    Returns:
+        list: Non-empty lists of user IDs
+    """
+    shard_count = max(1, min(shard_count, len(user_ids)))
+    return [user_ids[index::shard_count] for index in range(shard_count)
+            if user_ids[index::shard_count]]
+
+
+def sweep_shard(shard_id, user_ids, through_date, base_dir):
+    """
+    Finalize streaks and check limits for one shard of users.
+
+    Runs inside a worker process.
+
+    Args:
+        shard_id (int): Shard number, for reporting
+        user_ids (list): Users in this shard
+        through_date (str): Last completed day, in YYYY-MM-DD format
+        base_dir (str): Root data directory
+
+    Returns:
+        dict: 'shard', 'users', 'updated', 'skipped', 'elapsed' and
+              'results' (user ID -> summary dictionary)
+    """
+    started = time.perf_counter()
+    results, updated, skipped = _sweep_users(user_ids, through_date, base_dir)
+
+    return {
+        'shard': shard_id,
+        'users': len(user_ids),
+        'updated': updated,
+        'skipped': skipped,
+        'elapsed': time.perf_counter() - started,
+        'results': results
+    }
+
+
+def _sweep_users(user_ids, through_date, base_dir):
+    """
+    Finalize streaks and check limits for a list of users.
+
+    Args:
+        user_ids (list): Users to sweep
+        through_date (str): Last completed day, in YYYY-MM-DD format
+        base_dir (str): Root data directory
+
+    Returns:
+        tuple: (user ID -> summary dictionary, users updated, users skipped)
+    """
+    # Finalize each user in their own transaction, so the sweep takes
+    # the same lock and journal as every other writer
+    totals = []
+    limits = []
+    updates = []
+    skipped = 0
+    with use_data_root(base_dir):
+        for user_id in user_ids:
+            with use_user(user_id), ExpenseTransaction() as txn:
+                streak = txn.finalize_streaks(through_date)
+                if streak is None:
+                    skipped += 1
+                    continue
+                updates.append((user_id, streak))
+                totals.append(txn.get_daily_total(through_date))
+                limits.append(get_limits_for_dates([through_date], txn.config)[0])
+
+    # Check every user's limit in one batch
+    checks = check_limits_batch(totals, limits) if updates else None
+
+    results = {}
+    for index, (user_id, streak) in enumerate(updates):
+        results[user_id] = {
+            'total': totals[index],
+            'limit': limits[index],
+            'percentage': float(checks['percentage'][index]),
+            'warning': bool(checks['warning'][index]),
+            'exceeded': bool(checks['exceeded'][index]),
+            'current_streak': streak['current_streak'],
+            'best_streak': streak['best_streak']
+        }
+
+    return results, len(updates), skipped
+
+
+def find_stragglers(shards, factor=STRAGGLER_FACTOR):
+    """
+    Find shards that took much longer than the median shard.
+
+    Args:
+        shards (list): Shard results from sweep_shard()
+        factor (float): How many times the median counts as slow
+
+    Returns:
+        list: (shard number, elapsed seconds) for each slow shard
+    """
+    if len(shards) < 2:
+        return []
+
+    median = statistics.median(shard['elapsed'] for shard in shards)
+    return [(shard['shard'], round(shard['elapsed'], 3)) for shard in shards
+            if shard['elapsed'] > median * factor]
+
+
+def run_sweep(through_date=None, workers=None, user_ids=None, on_progress=None,
+              report_path=None):
+    """
+    Run the end-of-day sweep over every user.
+
+    Users whose streaks are already finalized through the date are
+    skipped, so an interrupted sweep can simply be run again.
+
+    Args:
+        through_date (str, optional): Last completed day, in YYYY-MM-DD
+                                      format. If None, uses yesterday.
+        workers (int, optional): Worker processes. If None, one per CPU.
+                                 With 1, runs in this process.
+        user_ids (list, optional): Users to sweep. If None, every user
+                                   with a data folder.
+        on_progress (callable, optional): Called with a stats dictionary
+                                          after each shard finishes
+        report_path (str, optional): Where to write the per-user results
+                                     as JSON. If None, writes
+                                     sweep_<date>.json in the data folder.
+
+    Returns:
+        dict: 'date', 'users', 'updated', 'skipped', 'over_limit',
+              'elapsed', 'users_per_sec', 'stragglers' and 'report_path'
+    """
+    if through_date is None:
+        through_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Users live under the root folder, whichever user is selected
+    base_dir = get_base_data_dir()
+    if user_ids is None:
+        user_ids = sorted(iter_user_ids(base_dir))
+
+    shards = partition_users(user_ids, workers * SHARDS_PER_WORKER)
+    started = time.perf_counter()
+    done = []
+
+    def collect(shard):
+        done.append(shard)
+        if on_progress is not None:
+            finished = sum(item['users'] for item in done)
+            elapsed = time.perf_counter() - started
+            on_progress({
+                'shards_done': len(done),
+                'shards': len(shards),
+                'users_done': finished,
+                'users': len(user_ids),
+                'users_per_sec': round(finished / elapsed, 1) if elapsed > 0 else 0.0
+            })
+
+    if workers <= 1 or len(shards) <= 1:
+        for shard_id, shard_users in enumerate(shards):
+            collect(sweep_shard(shard_id, shard_users, through_date, base_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(sweep_shard, shard_id, shard_users, through_date, base_dir)
+                       for shard_id, shard_users in enumerate(shards)]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for shard in done:
+        results.update(shard['results'])
+
+    if report_path is None:
+        report_path = os.path.join(base_dir, f'sweep_{through_date}.json')
+
+    # Keep results from an earlier, interrupted run of the same sweep
+    try:
+        with open(report_path, 'r', encoding='utf-8') as file:
+            earlier = json.load(file)
+        if earlier.get('date') == through_date:
+            results = {**earlier.get('users', {}), **results}
+    except (IOError, json.JSONDecodeError):
+        pass
+
+    with open(report_path, 'w', encoding='utf-8') as file:
+        json.dump({'date': through_date, 'users': results}, file, indent=2, ensure_ascii=False)
+
+    return {
+        'date': through_date,
+        'users': len(user_ids),
+        'updated': sum(shard['updated'] for shard in done),
+        'skipped': sum(shard['skipped'] for shard in done),
+        'over_limit': sum(1 for result in results.values() if result['exceeded']),
+        'elapsed': round(elapsed, 3),
+        'users_per_sec': round(len(user_ids) / elapsed, 1) if elapsed > 0 else 0.0,
+        'stragglers': find_stragglers(done),
+        'report_path': report_path
+    }
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing nightly sweep...")
+
+    print(f"Shards: {partition_users([f'user{n}' for n in range(10)], 3)}")
+    print(run_sweep(workers=1))
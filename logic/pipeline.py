@@ -0,0 +1,635 @@
+"""
+Pipeline Module
+Runs parse -> store -> limit -> streak as one unit of work.
+
+All state files are loaded once, every step runs in memory, and the
+changes are written together on commit. If any step fails, nothing
+is written. Commits go through a journal (commit_journal.json), so a
+crash part way through is finished by the next transaction instead of
+leaving some files old and some new.
+
+Processes sharing a data directory (the daemon, the API server and CLI
+commands) take turns through an exclusive lock on commit.lock: a
+transaction holds it from its first change until it commits or rolls
+back, and re-reads the files first if another one committed meanwhile.
+
+Adding an expense publishes ExpenseAdded on the event bus. When the
+limit checker and streak manager are subscribed (see
+install_subscribers()), they update the transaction from the event;
+otherwise the transaction runs those steps itself. LimitCrossed events
+for the transaction are held back until it commits.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from logic import event_bus, file_lock, metrics
+from logic.anomaly_detector import (
+    load_anomaly_state, get_anomaly_state_file_path, evaluate_expense,
+)
+from logic.categorizer import categorize_merchant
+from logic.expense_parser import parse_expense
+from logic.expense_store import (
+    get_data_dir, get_lock_file_path, load_expenses, get_expenses_file_path,
+    load_expense_metadata, get_metadata_file_path,
+)
+from logic.limit_checker import (
+    load_config,
+    load_alert_state, get_alert_state_file_path,
+    evaluate_limit, evaluate_crossing,
+)
+from logic.spend_forecaster import (
+    load_profile, get_forecast_file_path, discard_profile,
+    observe_expense, check_projected_breach,
+)
+from logic.streak_manager import (
+    load_streak_data, get_streak_file_path, apply_streak_update, apply_finalization,
+)
+from logic.tenant import get_current_user, use_user
+
+
+# Lists the files of a commit in progress; see ExpenseTransaction.commit()
+JOURNAL_FILE = 'commit_journal.json'
+
+
+class ExpenseTransaction:
+    """
+    In-memory view of expenses, config, streak and alert state.
+
+    Use as a context manager: changes are committed when the block
+    exits normally and discarded if it raises. From its first change
+    until commit() or rollback(), the transaction holds the data
+    folder's lock, so don't leave one with changes open.
+
+        with ExpenseTransaction() as txn:
+            txn.add_expense(299)
+            total = txn.get_daily_total()
+    """
+
+    def __init__(self):
+        # Bound to the current user, so it can be used from any thread;
+        # the lock taken by the first change belongs to that thread, so
+        # commit or roll back there
+        self.user_id = get_current_user()
+        # ExpenseAdded event from the latest add_expense()
+        self.last_event = None
+        # Open commit.lock while this transaction holds it
+        self._lock_file = None
+        self._lock_path = None
+        self._load()
+
+    def _load(self):
+        """Read every state file once, with the folder locked."""
+        held = self._lock_file is not None
+        if not held:
+            self._acquire_lock()
+        try:
+            with use_user(self.user_id):
+                if recover_commit():
+                    file_lock.bump_counter(self._lock_file)
+                self.expenses = load_expenses()
+                self.config = load_config()
+                self.streak = load_streak_data()
+                self.alert_state = load_alert_state()
+            # Commits by anyone since this load show up as a new count
+            self._generation = file_lock.read_counter(self._lock_file)
+        finally:
+            if not held:
+                self._release_lock()
+        self._dirty = set()
+        # Date -> running total, so adding an expense doesn't re-sum the day
+        self._totals = {}
+        # Per-expense details and anomaly statistics, loaded on first use
+        self._metadata = None
+        self._anomaly_state = None
+        self._forecast_profile = None
+        # Name -> (path function, data) of other files to write on commit
+        self._extra_files = {}
+        # LimitCrossed events to publish once the changes are on disk
+        self._pending_events = []
+
+    def _acquire_lock(self):
+        """Wait for the exclusive lock on the user's data folder."""
+        with use_user(self.user_id):
+            self._lock_path = get_lock_file_path()
+        self._lock_file = file_lock.acquire(self._lock_path)
+
+    def _release_lock(self):
+        """Let other transactions change the folder again."""
+        if self._lock_file is not None:
+            self._lock_file = None
+            file_lock.release(self._lock_path)
+
+    def _begin(self):
+        """
+        Lock the folder before the first change.
+
+        If another transaction committed since the state was loaded,
+        it is loaded again so the change builds on the latest files.
+
+        Raises:
+            RuntimeError: If uncommitted changes were made against files
+                          that have since changed (e.g. retrying a failed
+                          commit); roll back and start over
+        """
+        if self._lock_file is not None:
+            return
+        self._acquire_lock()
+        if file_lock.read_counter(self._lock_file) != self._generation:
+            if self._dirty:
+                self._release_lock()
+                raise RuntimeError("data changed since these changes were made; roll back")
+            self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    @property
+    def metadata(self):
+        """ExpenseMetadata: Per-expense details, loaded on first use."""
+        if self._metadata is None:
+            with use_user(self.user_id):
+                self._metadata = load_expense_metadata()
+        return self._metadata
+
+    @property
+    def anomaly_state(self):
+        """dict: Anomaly detector statistics, loaded on first use."""
+        if self._anomaly_state is None:
+            with use_user(self.user_id):
+                self._anomaly_state = load_anomaly_state()
+        return self._anomaly_state
+
+    @property
+    def forecast_profile(self):
+        """dict: Spend forecaster profile, loaded on first use."""
+        if self._forecast_profile is None:
+            with use_user(self.user_id):
+                self._forecast_profile = load_profile()
+        return self._forecast_profile
+
+    @property
+    def daily_limit(self):
+        """int: Daily spending limit from the loaded config."""
+        return self.config.get('daily_limit', 500)
+
+    def add_expense(self, amount, date_str=None, merchant=None, category=None, sms_id=None):
+        """
+        Add an expense in memory.
+
+        Args:
+            amount (int): Expense amount to add
+            date_str (str, optional): Date in YYYY-MM-DD format.
+                                      If None, uses today's date and
+                                      records the current time.
+            merchant (str, optional): Merchant name
+            category (str, optional): Spending category
+            sms_id (int, optional): ID of the SMS the expense came from
+
+        Returns:
+            bool: True if expense was added, False if amount is invalid
+        """
+        if amount is None or amount <= 0:
+            return False
+
+        self._begin()
+        when = None
+        if date_str is None:
+            when = datetime.now()
+            date_str = when.strftime('%Y-%m-%d')
+
+        daily_total = self.get_daily_total(date_str) + amount
+        day_expenses = self.expenses.setdefault(date_str, [])
+        day_expenses.append(amount)
+        self._totals[date_str] = daily_total
+        self._dirty.add('expenses')
+
+        self.metadata.record(date_str, len(day_expenses) - 1, when, merchant, category, sms_id)
+        self._dirty.add('metadata')
+
+        with use_user(self.user_id):
+            self.last_event = event_bus.publish(event_bus.ExpenseAdded(
+                [amount], date_str, daily_total, len(day_expenses), txn=self))
+        self._run_missing_steps(self.last_event)
+        return True
+
+    def _run_missing_steps(self, event):
+        """
+        Fill in the crossing and streak results no subscriber provided.
+
+        Covers handlers that aren't subscribed or that failed, so the
+        results don't depend on what else is running in the process.
+
+        Args:
+            event (ExpenseAdded): Event published by add_expense()
+        """
+        if event.date_str != datetime.now().strftime('%Y-%m-%d'):
+            # Crossings and streaks only track today
+            return
+        results = event.results
+        if 'crossing' not in results:
+            results['crossing'] = self.check_crossing(event.daily_total, event.date_str)
+        if 'streak' not in results:
+            results['streak'] = self.update_streak(event.daily_total, event.date_str)
+
+    def get_daily_total(self, date_str=None):
+        """
+        Get total spending for a date from the in-memory ledger.
+
+        Args:
+            date_str (str, optional): Date in YYYY-MM-DD format.
+                                      If None, uses today's date.
+
+        Returns:
+            int: Total amount spent on that date
+        """
+        if date_str is None:
+            date_str = datetime.now().strftime('%Y-%m-%d')
+        total = self._totals.get(date_str)
+        if total is None:
+            total = self._totals[date_str] = sum(self.expenses.get(date_str, []))
+        return total
+
+    def get_expense_count(self, date_str=None):
+        """
+        Get number of expenses for a date from the in-memory ledger.
+
+        Args:
+            date_str (str, optional): Date in YYYY-MM-DD format.
+                                      If None, uses today's date.
+
+        Returns:
+            int: Number of expenses on that date
+        """
+        if date_str is None:
+            date_str = datetime.now().strftime('%Y-%m-%d')
+        return len(self.expenses.get(date_str, []))
+
+    def check_limit(self, daily_total):
+        """
+        Check a daily total against the loaded limit.
+
+        Args:
+            daily_total (int): Total amount spent
+
+        Returns:
+            dict: Same structure as limit_checker.check_limit()
+        """
+        return evaluate_limit(daily_total, self.daily_limit)
+
+    def check_anomaly(self, amount, merchant=None):
+        """
+        Score an expense against the running statistics and update them.
+
+        Args:
+            amount (int): Expense amount
+            merchant (str, optional): Merchant name
+
+        Returns:
+            dict: Same structure as anomaly_detector.evaluate_expense()
+        """
+        self._begin()
+        result = evaluate_expense(self.anomaly_state, amount, merchant)
+        self._dirty.add('anomaly_state')
+        return result
+
+    def observe_forecast(self, amount, when=None):
+        """
+        Record an expense in the forecaster's time-of-day profile.
+
+        Args:
+            amount (int): Expense amount
+            when (datetime, optional): Time of the expense. Defaults to now.
+        """
+        self._begin()
+        observe_expense(amount, when, self.forecast_profile)
+        self._dirty.add('forecast')
+
+    def check_forecast(self, daily_total):
+        """
+        Forecast today's total and report a projected breach once a day.
+
+        Args:
+            daily_total (int): Amount spent so far today
+
+        Returns:
+            dict: Same structure as spend_forecaster.check_projected_breach()
+        """
+        self._begin()
+        forecast = check_projected_breach(daily_total, daily_limit=self.daily_limit,
+                                          profile=self.forecast_profile)
+        if forecast['notify']:
+            self._dirty.add('forecast')
+        return forecast
+
+    def check_crossing(self, daily_total, date_str=None):
+        """
+        Report a threshold crossed for the first time on this date.
+
+        Args:
+            daily_total (int): Total amount spent on that date
+            date_str (str, optional): Date in YYYY-MM-DD format.
+                                      If None, uses today's date.
+
+        Returns:
+            str or None: 'warning', 'exceeded' or None
+        """
+        if date_str is None:
+            date_str = datetime.now().strftime('%Y-%m-%d')
+
+        self._begin()
+        previous = dict(self.alert_state)
+        event = evaluate_crossing(self.alert_state, date_str, daily_total, self.daily_limit)
+        if self.alert_state != previous:
+            self._dirty.add('alert_state')
+        if event is not None:
+            # Alert only once the crossing is committed
+            with use_user(self.user_id):
+                self._pending_events.append(event_bus.LimitCrossed(
+                    event, date_str, daily_total, self.daily_limit))
+        return event
+
+    def update_streak(self, daily_total, date_str=None):
+        """
+        Update the streak for a date in memory.
+
+        Args:
+            daily_total (int): Total amount spent on that date
+            date_str (str, optional): Date in YYYY-MM-DD format.
+                                      If None, uses today's date.
+
+        Returns:
+            dict: Same structure as streak_manager.update_streak()
+        """
+        if date_str is None:
+            date_str = datetime.now().strftime('%Y-%m-%d')
+
+        self._begin()
+        result = apply_streak_update(self.streak, daily_total <= self.daily_limit, date_str)
+        if not result['already_updated']:
+            self._dirty.add('streak')
+        return result
+
+    def finalize_streaks(self, through_date):
+        """
+        Judge every day up to and including through_date as finished.
+
+        Args:
+            through_date (str): Last completed day, in YYYY-MM-DD format
+
+        Returns:
+            dict: Same structure as streak_manager.finalize_streaks()
+        """
+        self._begin()
+        daily_totals = {date_str: sum(amounts) for date_str, amounts in self.expenses.items()}
+        if not apply_finalization(self.streak, through_date, daily_totals, self.config):
+            return None
+        self._dirty.add('streak')
+        return dict(self.streak)
+
+    def include_file(self, name, get_path, data):
+        """
+        Write another JSON file as part of the next commit.
+
+        Lets callers outside the pipeline, such as the daemon's SMS
+        cursor, be saved atomically with the expenses they belong to.
+
+        Args:
+            name (str): Name for the file, unique within the transaction
+            get_path (callable): Returns the file's path for the current user
+            data: JSON-serializable data to write
+        """
+        self._begin()
+        self._extra_files[name] = (get_path, data)
+        self._dirty.add(name)
+
+    def reload_config(self):
+        """Re-read config.json, e.g. after the limit was changed elsewhere."""
+        with use_user(self.user_id):
+            self.config = load_config()
+
+    @metrics.timed('commit')
+    def commit(self):
+        """
+        Write every changed file as one atomic step.
+
+        Each file is first written to a uniquely named temporary file
+        next to it. Once all of them are on disk, a journal listing them
+        is written, the files are moved into place and the journal is
+        removed. If the process dies after the journal is written, the
+        next transaction finishes moving the files (see recover_commit());
+        if it dies before, the old files are untouched. The folder stays
+        locked until this returns, whether or not it succeeds.
+        LimitCrossed events held back since the last commit are
+        published afterwards.
+        """
+        targets = {
+            'expenses': (get_expenses_file_path, lambda: self.expenses),
+            'metadata': (get_metadata_file_path, lambda: self._metadata.to_dict()),
+            'alert_state': (get_alert_state_file_path, lambda: self.alert_state),
+            'anomaly_state': (get_anomaly_state_file_path, lambda: self._anomaly_state),
+            'forecast': (get_forecast_file_path, lambda: self._forecast_profile),
+            'streak': (get_streak_file_path, lambda: self.streak),
+        }
+        for name, (get_path, data) in self._extra_files.items():
+            targets[name] = (get_path, lambda data=data: data)
+
+        try:
+            if self._dirty:
+                self._begin()
+                self._write_files(targets)
+        finally:
+            self._release_lock()
+
+        self._dirty.clear()
+        self._extra_files = {}
+
+        events = self._pending_events
+        self._pending_events = []
+        with use_user(self.user_id):
+            for event in events:
+                event_bus.publish(event)
+
+    def _write_files(self, targets):
+        """
+        Stage, journal and move the changed files. Call with the lock held.
+
+        Args:
+            targets (dict): Name -> (path function, data function)
+        """
+        with use_user(self.user_id):
+            data_dir = get_data_dir()
+            paths = [targets[name][0]() for name in sorted(self._dirty)]
+
+        staged = {}
+        try:
+            for name, file_path in zip(sorted(self._dirty), paths):
+                fd, temp_path = tempfile.mkstemp(
+                    prefix=os.path.basename(file_path) + '.', suffix='.tmp', dir=data_dir)
+                os.close(fd)
+                staged[file_path] = temp_path
+                _write_json_synced(temp_path, targets[name][1]())
+        except (IOError, OSError):
+            for temp_path in staged.values():
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            raise
+
+        journal_path = os.path.join(data_dir, JOURNAL_FILE)
+        _write_json_synced(journal_path + '.tmp', {'files': {
+            os.path.basename(file_path): os.path.basename(temp_path)
+            for file_path, temp_path in staged.items()
+        }})
+        os.replace(journal_path + '.tmp', journal_path)
+        # From here the commit counts, even if it's finished by recovery
+        self._generation = file_lock.bump_counter(self._lock_file)
+        _finish_commit(data_dir, journal_path)
+        for file_path in staged:
+            metrics.record_io('save', file_path)
+
+    def rollback(self):
+        """Discard in-memory changes by reloading state from disk."""
+        try:
+            if 'forecast' in self._dirty:
+                # The forecaster's cached copy has the discarded changes too
+                with use_user(self.user_id):
+                    discard_profile()
+            self._load()
+        finally:
+            self._release_lock()
+
+
+def _write_json_synced(file_path, data):
+    """Write JSON and flush it to disk before returning."""
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=2, ensure_ascii=False)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _finish_commit(data_dir, journal_path):
+    """
+    Move a journaled commit's files into place and remove the journal.
+
+    Files already moved are skipped, so this can be repeated after a
+    crash.
+
+    Args:
+        data_dir (str): Folder holding the files and the journal
+        journal_path (str): Path of the journal
+    """
+    with open(journal_path, 'r', encoding='utf-8') as file:
+        files = json.load(file)['files']
+    if isinstance(files, list):
+        # Journals from before temp names were unique
+        files = {name: name + '.tmp' for name in files}
+
+    for name, temp_name in files.items():
+        temp_path = os.path.join(data_dir, temp_name)
+        if os.path.exists(temp_path):
+            os.replace(temp_path, os.path.join(data_dir, name))
+
+    os.remove(journal_path)
+
+
+def recover_commit():
+    """
+    Finish a commit that was interrupted after its journal was written.
+
+    Called when a transaction loads, for the current user's folder.
+    Call with the folder's commit.lock held, so a commit still in
+    progress in another process isn't mistaken for an interrupted one.
+
+    Returns:
+        bool: True if an interrupted commit was finished
+    """
+    data_dir = get_data_dir()
+    journal_path = os.path.join(data_dir, JOURNAL_FILE)
+    if not os.path.exists(journal_path):
+        return False
+
+    # The journal is only moved into place once it is complete
+    _finish_commit(data_dir, journal_path)
+    return True
+
+
+def install_subscribers():
+    """
+    Subscribe the tracker, limit checker and streak manager to
+    ExpenseAdded. Safe to call more than once.
+
+    Call this from entry points (main.py commands, the daemon, the API
+    server) that want plain expense_store writes to update the alert
+    state and streak too. Transactions don't need it.
+    """
+    from logic import daily_tracker, limit_checker, streak_manager
+
+    for module in (daily_tracker, limit_checker, streak_manager):
+        event_bus.subscribe(event_bus.ExpenseAdded, module.on_expense_added)
+
+
+def process_sms(sms_text, txn=None, sms_id=None, date_str=None):
+    """
+    Run one SMS through parse -> anomaly check -> store -> limit -> streak.
+
+    Args:
+        sms_text (str): Raw SMS text from bank
+        txn (ExpenseTransaction, optional): Open transaction to use. If
+                                            None, a new one is opened and
+                                            committed before returning.
+        sms_id (int, optional): ID of the SMS, stored with the expense
+        date_str (str, optional): Date to store the expense under, in
+                                  YYYY-MM-DD format. If None, today.
+
+    Returns:
+        dict or None: Dictionary with 'amount', 'merchant', 'category',
+                      'anomaly', 'daily_total', 'limit_status', 'crossing'
+                      and 'streak' keys, or None if the SMS is not an
+                      expense
+    """
+    expense = parse_expense(sms_text)
+    if expense is None:
+        return None
+
+    if txn is None:
+        with ExpenseTransaction() as new_txn:
+            return process_sms(sms_text, new_txn, sms_id, date_str)
+
+    amount = expense['amount']
+    merchant = expense['merchant']
+    category = categorize_merchant(merchant)
+    anomaly = txn.check_anomaly(amount, merchant)
+    txn.add_expense(amount, date_str, merchant=merchant, category=category, sms_id=sms_id)
+    event = txn.last_event
+
+    return {
+        'amount': amount,
+        'merchant': merchant,
+        'category': category,
+        'anomaly': anomaly,
+        'daily_total': event.daily_total,
+        'limit_status': txn.check_limit(event.daily_total),
+        'crossing': event.results.get('crossing'),
+        'streak': event.results.get('streak')
+    }
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing pipeline...")
+
+    with ExpenseTransaction() as txn:
+        result = process_sms("Rs.120 spent via UPI to Zomato", txn)
+        print(f"Amount: ₹{result['amount']}")
+        print(f"Daily total: ₹{result['daily_total']} / ₹{txn.daily_limit}")
+        print(f"Crossing: {result['crossing']}")
+        print(f"Streak: {result['streak']['current_streak']} days")
@@ -0,0 +1,291 @@
+"""
+Report Generator Module
+Writes daily, monthly or yearly spending statements as CSV or HTML.
+
+Rows are produced by generators and written as they are produced:
+each day's total is summed once, month and year rows are rolled up
+from the day rows rather than from the expenses, and nothing but the
+current row is kept. The HTML file is self-contained (inline CSS).
+
+Month and year rows count calendar days, so average_per_day includes
+the days nothing was spent.
+
+    write_report('statement.html', period='month')
+    write_report('days.csv', start='2026-01-01', end='2026-01-31')
+"""
+
+import calendar
+import csv
+import html
+from datetime import date, datetime
+from itertools import groupby, tee
+
+from logic.expense_store import load_expenses
+from logic.limit_checker import load_config, iter_limits_for_dates, evaluate_limit
+
+
+# Period name -> number of leading date characters that identify it
+PERIODS = {
+    'day': 10,      # 2026-01-18
+    'month': 7,     # 2026-01
+    'year': 4,      # 2026
+}
+
+COLUMNS = ['period', 'days', 'expenses', 'total', 'average_per_day',
+           'days_over_limit', 'days_warned', 'limit']
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #222; }}
+table {{ border-collapse: collapse; }}
+th, td {{ padding: 4px 10px; border-bottom: 1px solid #ddd; text-align: right; }}
+th:first-child, td:first-child {{ text-align: left; }}
+tr.over td {{ color: #b00020; }}
+tr.warned td {{ color: #a66300; }}
+tfoot td {{ font-weight: bold; border-top: 2px solid #222; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<table>
+<thead><tr>{header}</tr></thead>
+<tbody>
+"""
+
+
+def iter_day_rows(expenses=None, start=None, end=None, config=None):
+    """
+    Yield one row per day with expenses, in date order.
+
+    Args:
+        expenses (dict, optional): Ledger from load_expenses(). If None,
+                                   it is loaded.
+        start (str, optional): First day to include (YYYY-MM-DD)
+        end (str, optional): Last day to include (YYYY-MM-DD)
+        config (dict, optional): Configuration with the limit history.
+                                 If None, reads from config.json.
+
+    Yields:
+        dict: Row with the COLUMNS keys, for a single day
+    """
+    if expenses is None:
+        expenses = load_expenses()
+    if config is None:
+        config = load_config()
+
+    dates = (date_str for date_str in sorted(expenses)
+             if (start is None or date_str >= start) and (end is None or date_str <= end))
+
+    # Dates are consumed by the limit generator and the loop in step
+    dates, limit_dates = tee(dates)
+    for date_str, limit in zip(dates, iter_limits_for_dates(limit_dates, config)):
+        amounts = expenses[date_str]
+        total = sum(amounts)
+        status = evaluate_limit(total, limit)
+        yield {
+            'period': date_str,
+            'days': 1,
+            'expenses': len(amounts),
+            'total': total,
+            'average_per_day': total,
+            'days_over_limit': int(status['exceeded']),
+            'days_warned': int(status['warning'] and not status['exceeded']),
+            'limit': limit
+        }
+
+
+def roll_up(day_rows, period, start=None, end=None):
+    """
+    Combine day rows into month or year rows.
+
+    A combined row's 'days' is the number of calendar days it covers,
+    clipped to start and end (today by default), so average_per_day
+    counts days without expenses too.
+
+    Args:
+        day_rows (iterable): Rows from iter_day_rows(), in date order
+        period (str): 'day', 'month' or 'year'
+        start (str, optional): First day of the report (YYYY-MM-DD)
+        end (str, optional): Last day of the report (YYYY-MM-DD)
+
+    Yields:
+        dict: Row with the COLUMNS keys, for each period with expenses
+    """
+    if period == 'day':
+        yield from day_rows
+        return
+
+    if end is None:
+        end = date.today().isoformat()
+
+    key_length = PERIODS[period]
+    for key, rows in groupby(day_rows, key=lambda row: row['period'][:key_length]):
+        combined = {'period': key, 'days': 0, 'expenses': 0, 'total': 0,
+                    'days_over_limit': 0, 'days_warned': 0, 'limit': None}
+        last_day = None
+        for row in rows:
+            last_day = row['period']
+            combined['expenses'] += row['expenses']
+            combined['total'] += row['total']
+            combined['days_over_limit'] += row['days_over_limit']
+            combined['days_warned'] += row['days_warned']
+            # Limit in effect at the end of the period
+            combined['limit'] = row['limit']
+
+        first, last = _period_bounds(key)
+        if start is not None:
+            first = max(first, start)
+        # A future-dated expense still counts the days up to it
+        last = min(last, max(end, last_day))
+        combined['days'] = (_to_date(last) - _to_date(first)).days + 1
+        combined['average_per_day'] = round(combined['total'] / combined['days'], 2)
+        yield combined
+
+
+def _period_bounds(key):
+    """Get the first and last day (YYYY-MM-DD) of a month or year key."""
+    if len(key) == PERIODS['year']:
+        return f'{key}-01-01', f'{key}-12-31'
+    year, month = int(key[:4]), int(key[5:7])
+    return f'{key}-01', f'{key}-{calendar.monthrange(year, month)[1]:02d}'
+
+
+def _to_date(date_str):
+    """Parse a YYYY-MM-DD string."""
+    return datetime.strptime(date_str, '%Y-%m-%d').date()
+
+
+def validate_date(date_str):
+    """
+    Check that a report bound is a real date in YYYY-MM-DD format.
+
+    Args:
+        date_str (str): Date to check
+
+    Returns:
+        str: The same date
+
+    Raises:
+        ValueError: If it isn't a valid YYYY-MM-DD date
+    """
+    try:
+        # Also rejects dates like 2026-1-5 that would compare wrongly
+        if _to_date(date_str).isoformat() == date_str:
+            return date_str
+    except (TypeError, ValueError):
+        pass
+    raise ValueError(f"Invalid date (expected YYYY-MM-DD): {date_str}")
+
+
+def write_csv(rows, file):
+    """
+    Write rows as CSV, one at a time.
+
+    Args:
+        rows (iterable): Report rows
+        file: Open text file
+
+    Returns:
+        dict: Totals over all rows ('rows', 'expenses', 'total')
+    """
+    writer = csv.DictWriter(file, fieldnames=COLUMNS)
+    writer.writeheader()
+
+    totals = {'rows': 0, 'expenses': 0, 'total': 0}
+    for row in rows:
+        writer.writerow(row)
+        _add_to_totals(totals, row)
+    return totals
+
+
+def write_html(rows, file, title="Spending Statement"):
+    """
+    Write rows as a self-contained HTML table, one at a time.
+
+    Args:
+        rows (iterable): Report rows
+        file: Open text file
+        title (str): Page heading
+
+    Returns:
+        dict: Totals over all rows ('rows', 'expenses', 'total')
+    """
+    header = ''.join(f'<th>{html.escape(column.replace("_", " "))}</th>' for column in COLUMNS)
+    file.write(_HTML_HEAD.format(title=html.escape(title), header=header))
+
+    totals = {'rows': 0, 'expenses': 0, 'total': 0}
+    for row in rows:
+        css_class = 'over' if row['days_over_limit'] else 'warned' if row['days_warned'] else ''
+        cells = ''.join(f'<td>{html.escape(str(row[column]))}</td>' for column in COLUMNS)
+        file.write(f'<tr class="{css_class}">{cells}</tr>\n')
+        _add_to_totals(totals, row)
+
+    file.write('</tbody>\n<tfoot><tr>'
+               f'<td>Total</td><td></td><td>{totals["expenses"]}</td><td>{totals["total"]}</td>'
+               + '<td></td>' * (len(COLUMNS) - 4) +
+               '</tr></tfoot>\n</table>\n</body>\n</html>\n')
+    return totals
+
+
+def _add_to_totals(totals, row):
+    """Add one row to the running report totals."""
+    totals['rows'] += 1
+    totals['expenses'] += row['expenses']
+    totals['total'] += row['total']
+
+
+def write_report(path, period='day', start=None, end=None, fmt=None):
+    """
+    Write a spending statement to a file.
+
+    Args:
+        path (str): Output file path
+        period (str): 'day', 'month' or 'year'
+        start (str, optional): First day to include (YYYY-MM-DD)
+        end (str, optional): Last day to include (YYYY-MM-DD)
+        fmt (str, optional): 'csv' or 'html'. If None, taken from the
+                             file extension (HTML for .html/.htm, else CSV).
+
+    Returns:
+        dict: Totals over all rows ('rows', 'expenses', 'total')
+
+    Raises:
+        ValueError: If period or fmt is not recognized, or start or end
+                    isn't a valid date, or start is after end
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    for bound in (start, end):
+        if bound is not None:
+            validate_date(bound)
+    if start is not None and end is not None and start > end:
+        raise ValueError(f"Start date {start} is after end date {end}")
+    if fmt is None:
+        fmt = 'html' if path.lower().endswith(('.html', '.htm')) else 'csv'
+    if fmt not in ('csv', 'html'):
+        raise ValueError(f"Unknown format: {fmt}")
+
+    rows = roll_up(iter_day_rows(start=start, end=end), period, start, end)
+
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        if fmt == 'html':
+            title = f"Spending Statement by {period}"
+            if start or end:
+                title += f" ({start or 'start'} to {end or 'today'})"
+            return write_html(rows, file, title)
+        return write_csv(rows, file)
+
+
+if __name__ == "__main__":
+    # Simple test
+    import sys
+
+    print("Testing report generator...")
+
+    for row in roll_up(iter_day_rows(), 'month'):
+        print(row)
+    write_csv(roll_up(iter_day_rows(), 'year'), sys.stdout)
@@ -0,0 +1,338 @@
+"""
+Spend Forecaster Module
+Projects today's final spending total from the time-of-day profile.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from logic import metrics
+from logic.limit_checker import get_daily_limit
+
+
+# Minimum history (in days) before the learned hourly profile is trusted.
+# Until then, spending is assumed to be spread evenly over the day.
+MIN_PROFILE_DAYS = 3
+
+# In-memory copies of profiles, keyed by file path (one per user), so
+# each is only read from disk once
+_profile_cache = {}
+
+
+def get_forecast_file_path():
+    """
+    Get the full path to forecast_profile.json file.
+
+    Returns:
+        str: Absolute path to forecast_profile.json
+    """
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'forecast_profile.json')
+
+
+def _bootstrap_profile(already_observed=0):
+    """
+    Build a starting profile from the existing ledger.
+
+    The ledger has no timestamps, so only the average daily spend can
+    be learned from it. The hourly profile starts empty and fills up
+    as expenses are observed.
+
+    Args:
+        already_observed (int): Part of today's ledger total the caller
+                                is about to observe, so it isn't
+                                counted twice
+
+    Returns:
+        dict: New profile dictionary
+    """
+    from logic.expense_store import load_expenses
+
+    expenses = load_expenses()
+    today = datetime.now().strftime('%Y-%m-%d')
+
+    # Today is still in progress, so it is the running day rather than
+    # part of the averages
+    past_dates = [date_str for date_str in expenses if date_str < today]
+
+    # Every calendar day since the first expense counts, including
+    # days nothing was spent
+    history_days = 0
+    if past_dates:
+        first = datetime.strptime(min(past_dates), '%Y-%m-%d')
+        history_days = (datetime.strptime(today, '%Y-%m-%d') - first).days
+
+    return {
+        'hourly_spend': [0] * 24,
+        'profile_days': 0,
+        'history_total': sum(sum(expenses[date_str]) for date_str in past_dates),
+        'history_days': history_days,
+        'today': today,
+        'today_total': sum(expenses.get(today, [])) - already_observed,
+        'warned_date': None
+    }
+
+
+def load_profile(already_observed=0):
+    """
+    Load the spending profile, using the in-memory cache when possible.
+
+    Args:
+        already_observed (int): Passed to the bootstrap when there is no
+                                saved profile yet
+
+    Returns:
+        dict: Profile dictionary with hourly spend and running totals
+    """
+    file_path = get_forecast_file_path()
+    cached = _profile_cache.get(file_path)
+
+    metrics.record_cache('forecast_profile', cached is not None)
+    if cached is not None:
+        return cached
+
+    profile = None
+
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                profile = json.load(file)
+        except (json.JSONDecodeError, IOError):
+            profile = None
+
+    if profile is None:
+        profile = _bootstrap_profile(already_observed)
+        save_profile(profile)
+
+    _profile_cache[file_path] = profile
+    return profile
+
+
+def discard_profile():
+    """Forget the in-memory profile, so the next load reads the file."""
+    _profile_cache.pop(get_forecast_file_path(), None)
+
+
+def save_profile(profile):
+    """
+    Save the spending profile to forecast_profile.json.
+
+    Args:
+        profile (dict): Profile dictionary to save
+    """
+    from logic.expense_store import write_lock
+    file_path = get_forecast_file_path()
+    _profile_cache[file_path] = profile
+
+    try:
+        with write_lock(), open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(profile, file, indent=2, ensure_ascii=False)
+    except IOError as e:
+        print(f"Error saving forecast profile: {e}")
+
+
+def _roll_day(profile, date_str):
+    """
+    Move the profile's running day forward if the date has changed.
+
+    Args:
+        profile (dict): Profile dictionary, updated in place
+        date_str (str): Current date in YYYY-MM-DD format
+
+    Returns:
+        bool: True if the profile moved to a new day
+    """
+    if profile['today'] == date_str:
+        return False
+
+    if profile['today'] is not None:
+        # Fold the finished day, and any zero-spend days after it, into
+        # the history averages
+        elapsed = (datetime.strptime(date_str, '%Y-%m-%d')
+                   - datetime.strptime(profile['today'], '%Y-%m-%d')).days
+        profile['history_total'] += profile['today_total']
+        profile['history_days'] += max(elapsed, 1)
+        profile['profile_days'] += 1
+
+    profile['today'] = date_str
+    profile['today_total'] = 0
+    return True
+
+
+def observe_expense(amount, when=None, profile=None):
+    """
+    Record an expense in the profile in memory. Runs in constant time.
+
+    The caller saves the profile (save_profile(), or a transaction
+    commit).
+
+    Args:
+        amount (int): Expense amount
+        when (datetime, optional): Time of the expense. Defaults to now.
+        profile (dict, optional): Profile to update. If None, the
+                                  cached profile is loaded.
+
+    Returns:
+        dict: Updated profile
+    """
+    if when is None:
+        when = datetime.now()
+    if profile is None:
+        profile = load_profile()
+
+    _roll_day(profile, when.strftime('%Y-%m-%d'))
+
+    profile['hourly_spend'][when.hour] += amount
+    profile['today_total'] += amount
+
+    return profile
+
+
+def on_expense_added(event):
+    """
+    Record today's new expenses in the profile.
+
+    Expenses added to a transaction are saved with it; expenses already
+    on disk are saved right away.
+
+    Args:
+        event (ExpenseAdded): Published by expense_store or a transaction
+    """
+    now = datetime.now()
+    if event.date_str != now.strftime('%Y-%m-%d'):
+        return
+
+    if event.txn is not None:
+        for amount in event.amounts:
+            event.txn.observe_forecast(amount, now)
+        return
+
+    from logic.expense_store import data_lock
+
+    with data_lock():
+        # The ledger already holds these, so a first-time bootstrap must
+        # leave them out
+        profile = load_profile(already_observed=event.amount)
+        for amount in event.amounts:
+            observe_expense(amount, now, profile)
+        save_profile(profile)
+
+
+def get_elapsed_fraction(profile, when):
+    """
+    Get the share of a typical day's spending that happens before `when`.
+
+    Args:
+        profile (dict): Profile dictionary
+        when (datetime): Point in the day
+
+    Returns:
+        float: Fraction between 0 and 1
+    """
+    hourly = profile['hourly_spend']
+    profile_total = sum(hourly)
+
+    # Not enough history yet - assume spending is spread evenly
+    if profile['profile_days'] < MIN_PROFILE_DAYS or profile_total <= 0:
+        return (when.hour * 60 + when.minute) / (24 * 60)
+
+    before = sum(hourly[:when.hour])
+    # Assume spending within the current hour is spread evenly
+    within = hourly[when.hour] * (when.minute / 60)
+
+    return (before + within) / profile_total
+
+
+def forecast_today(spent=None, when=None, daily_limit=None, profile=None):
+    """
+    Project today's final total and check it against the daily limit.
+
+    The projection is what has been spent so far plus the average daily
+    spend scaled by the part of the day still to come.
+
+    Args:
+        spent (int, optional): Amount spent so far today. If None, uses
+                               the total of expenses observed today.
+        when (datetime, optional): Time to forecast from. Defaults to now.
+        daily_limit (int, optional): Limit to compare against.
+                                     If None, reads from config.
+        profile (dict, optional): Profile to use. If None, the cached
+                                  profile is loaded.
+
+    Returns:
+        dict: Dictionary with 'spent', 'projected_total', 'limit' and
+              'projected_breach' keys
+    """
+    if when is None:
+        when = datetime.now()
+    if daily_limit is None:
+        daily_limit = get_daily_limit()
+
+    if profile is None:
+        # Keep the finished day even if no expense comes in to save it
+        profile = load_profile()
+        if _roll_day(profile, when.strftime('%Y-%m-%d')):
+            save_profile(profile)
+    else:
+        _roll_day(profile, when.strftime('%Y-%m-%d'))
+
+    if profile['history_days'] > 0:
+        average_daily = profile['history_total'] / profile['history_days']
+    else:
+        average_daily = 0
+
+    elapsed = get_elapsed_fraction(profile, when)
+    if spent is None:
+        spent = profile['today_total']
+    projected = spent + average_daily * (1 - elapsed)
+
+    return {
+        'spent': spent,
+        'projected_total': round(projected),
+        'limit': daily_limit,
+        'projected_breach': projected > daily_limit
+    }
+
+
+def check_projected_breach(spent=None, when=None, daily_limit=None, profile=None):
+    """
+    Forecast today and report a projected breach once per day.
+
+    Args:
+        spent (int, optional): Amount spent so far today
+        when (datetime, optional): Time to forecast from. Defaults to now.
+        daily_limit (int, optional): Limit to compare against.
+                                     If None, reads from config.
+        profile (dict, optional): Profile held by a transaction, which
+                                  saves it on commit. If None, the cached
+                                  profile is loaded and saved here.
+
+    Returns:
+        dict: Forecast dictionary plus a 'notify' key that is True only
+              the first time a breach is projected on that day
+    """
+    save = profile is None
+    if profile is None:
+        profile = load_profile()
+    forecast = forecast_today(spent, when, daily_limit, profile)
+
+    notify = forecast['projected_breach'] and profile['warned_date'] != profile['today']
+
+    if notify:
+        profile['warned_date'] = profile['today']
+        if save:
+            save_profile(profile)
+
+    forecast['notify'] = notify
+    return forecast
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing spend forecaster...")
+
+    forecast = forecast_today()
+    print(f"Spent so far: ₹{forecast['spent']}")
+    print(f"Projected total: ₹{forecast['projected_total']} / ₹{forecast['limit']}")
+    print(f"Projected breach: {forecast['projected_breach']}")
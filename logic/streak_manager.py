@@ -7,6 +7,8 @@ import json
 import os
 from datetime import datetime, timedelta
 
+from logic import metrics
+
 
 def get_streak_file_path():
     """
@@ -15,17 +17,8 @@ def get_streak_file_path():
     Returns:
         str: Absolute path to streak.json
     """
-    # Get the directory where this file is located
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # Go up one level to project root, then into data folder
-    project_root = os.path.dirname(current_dir)
-    data_dir = os.path.join(project_root, 'data')
-    
-    # Create data directory if it doesn't exist
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-    
-    return os.path.join(data_dir, 'streak.json')
+    from logic.expense_store import get_data_dir
+    return os.path.join(get_data_dir(), 'streak.json')
 
 
 def load_streak_data():
@@ -52,6 +45,7 @@ def load_streak_data():
     try:
         with open(file_path, 'r', encoding='utf-8') as file:
             data = json.load(file)
+            metrics.record_io('load', file_path)
             # Ensure all required keys exist
             if 'current_streak' not in data:
                 data['current_streak'] = 0
@@ -72,11 +66,13 @@ def save_streak_data(streak_data):
     Args:
         streak_data (dict): Streak data dictionary to save
     """
+    from logic.expense_store import write_lock
     file_path = get_streak_file_path()
     
     try:
-        with open(file_path, 'w', encoding='utf-8') as file:
+        with write_lock(), open(file_path, 'w', encoding='utf-8') as file:
             json.dump(streak_data, file, indent=2, ensure_ascii=False)
+        metrics.record_io('save', file_path)
     except IOError as e:
         print(f"Error saving streak data: {e}")
 
@@ -113,8 +109,34 @@ def update_streak(is_under_limit):
     Returns:
         dict: Updated streak data with 'current_streak', 'best_streak', 'streak_broken' keys
     """
-    data = load_streak_data()
+    from logic.expense_store import data_lock
+    
     today = datetime.now().strftime('%Y-%m-%d')
+    
+    with data_lock():
+        data = load_streak_data()
+        result = apply_streak_update(data, is_under_limit, today)
+        
+        # Save updated data
+        if not result['already_updated']:
+            save_streak_data(data)
+    
+    return result
+
+
+@metrics.timed('streak_update')
+def apply_streak_update(data, is_under_limit, today):
+    """
+    Apply one day's result to streak data in memory.
+    
+    Args:
+        data (dict): Streak data dictionary, updated in place
+        is_under_limit (bool): True if the day's total is <= daily limit
+        today (str): Date being judged, in YYYY-MM-DD format
+        
+    Returns:
+        dict: Same structure as update_streak()
+    """
     last_update = data.get('last_update_date')
     
     # Check if this is a new day
@@ -157,9 +179,6 @@ def update_streak(is_under_limit):
     # Update last update date
     data['last_update_date'] = today
     
-    # Save updated data
-    save_streak_data(data)
-    
     return {
         'current_streak': data['current_streak'],
         'best_streak': data['best_streak'],
@@ -187,6 +206,209 @@ def check_and_update_streak():
     return update_streak(is_under_limit)
 
 
+def on_expense_added(event):
+    """
+    Update today's streak from the event's new daily total.
+    
+    Works on the open transaction if the expense was added to one,
+    otherwise on streak.json. Stores the update result in
+    event.results['streak']. Expenses for other days are ignored;
+    past days are handled by recompute_streaks().
+    
+    Args:
+        event (ExpenseAdded): Published by expense_store or a transaction
+    """
+    if event.date_str != datetime.now().strftime('%Y-%m-%d'):
+        return
+    
+    if event.txn is not None:
+        event.results['streak'] = event.txn.update_streak(event.daily_total, event.date_str)
+    else:
+        from logic.limit_checker import get_daily_limit
+        event.results['streak'] = update_streak(event.daily_total <= get_daily_limit())
+
+
+def compute_streaks(under_limit_flags):
+    """
+    Compute current and best streak from a sequence of daily results.
+    
+    Uses NumPy when it is installed, otherwise a single Python loop.
+    
+    Args:
+        under_limit_flags (sequence): One bool per consecutive day,
+                                      True if that day was under limit
+        
+    Returns:
+        tuple: (current_streak, best_streak)
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    
+    if np is not None:
+        flags = np.asarray(under_limit_flags, dtype=bool)
+        if flags.size == 0:
+            return 0, 0
+        
+        # Streaks are the gaps between days that went over the limit
+        breaks = np.flatnonzero(~flags)
+        bounds = np.concatenate(([-1], breaks, [flags.size]))
+        runs = np.diff(bounds) - 1
+        
+        return int(runs[-1]), int(runs.max())
+    
+    current = 0
+    best = 0
+    for is_under_limit in under_limit_flags:
+        if is_under_limit:
+            current += 1
+            if current > best:
+                best = current
+        else:
+            current = 0
+    
+    return current, best
+
+
+def get_daily_series(daily_totals=None, end_date=None):
+    """
+    Get one total per calendar day, from the first recorded expense up
+    to end_date. Days without expenses are 0.
+    
+    Args:
+        daily_totals (dict, optional): Date -> total spent. If None,
+                                       totals are computed from the ledger.
+        end_date (str, optional): Last day to include, in YYYY-MM-DD
+                                  format. If None, uses today's date.
+        
+    Returns:
+        tuple: (dates, totals) as parallel lists; both empty if nothing
+               was recorded up to end_date
+    """
+    from logic.expense_store import load_expenses
+    
+    if daily_totals is None:
+        daily_totals = {date_str: sum(amounts)
+                        for date_str, amounts in load_expenses().items()}
+    if end_date is None:
+        end_date = datetime.now().strftime('%Y-%m-%d')
+    
+    recorded = [date_str for date_str in daily_totals if date_str <= end_date]
+    if not recorded:
+        return [], []
+    
+    # Fill in every calendar day so gaps count as zero-spend days
+    start = datetime.strptime(min(recorded), '%Y-%m-%d')
+    day_count = (datetime.strptime(end_date, '%Y-%m-%d') - start).days + 1
+    dates = [(start + timedelta(days=offset)).strftime('%Y-%m-%d')
+             for offset in range(day_count)]
+    
+    return dates, [daily_totals.get(date_str, 0) for date_str in dates]
+
+
+def recompute_streaks(daily_totals=None, end_date=None, save=True, config=None):
+    """
+    Rebuild current and best streak from the expense history.
+    
+    Every calendar day from the first recorded expense up to end_date
+    is judged against the limit in effect on that day. Days without
+    expenses count as under the limit.
+    
+    Args:
+        daily_totals (dict, optional): Date -> total spent. If None,
+                                       totals are computed from the ledger.
+        end_date (str, optional): Last day to include, in YYYY-MM-DD
+                                  format. If None, uses today's date.
+        save (bool): Whether to write the result to streak.json
+        config (dict, optional): Configuration with the limit history.
+                                 If None, reads from config.json.
+        
+    Returns:
+        dict: Rebuilt streak data with 'current_streak', 'best_streak'
+              and 'last_update_date' keys
+    """
+    from logic.expense_store import data_lock
+    from logic.limit_checker import get_limits_for_dates
+    
+    if end_date is None:
+        end_date = datetime.now().strftime('%Y-%m-%d')
+    
+    if save:
+        # The ledger and streak.json must not change in between
+        with data_lock():
+            return _recompute_and_save(daily_totals, end_date, config)
+    
+    data = {}
+    dates, totals = get_daily_series(daily_totals, end_date)
+    if not dates:
+        data.update({'current_streak': 0, 'best_streak': 0,
+                     'last_update_date': end_date})
+        return data
+    
+    limits = get_limits_for_dates(dates, config)
+    flags = [total <= limit for total, limit in zip(totals, limits)]
+    
+    current, best = compute_streaks(flags)
+    
+    data.update({'current_streak': current, 'best_streak': best,
+                 'last_update_date': end_date})
+    return data
+
+
+def _recompute_and_save(daily_totals, end_date, config):
+    """Recompute streaks into streak.json. Call with the data folder locked."""
+    data = load_streak_data()
+    data.update(recompute_streaks(daily_totals, end_date, save=False, config=config))
+    save_streak_data(data)
+    return data
+
+
+def apply_finalization(data, through_date, daily_totals=None, config=None):
+    """
+    Finalize days up to through_date in streak data in memory.
+    
+    Args:
+        data (dict): Streak data dictionary, updated in place
+        through_date (str): Last completed day, in YYYY-MM-DD format
+        daily_totals (dict, optional): Date -> total spent. If None,
+                                       totals are computed from the ledger.
+        config (dict, optional): Configuration with the limit history.
+                                 If None, reads from config.json.
+        
+    Returns:
+        bool: False if those days were already finalized
+    """
+    finalized = data.get('finalized_date')
+    if finalized is not None and finalized >= through_date:
+        return False
+    
+    data.update(recompute_streaks(daily_totals, through_date, save=False, config=config))
+    data['finalized_date'] = through_date
+    return True
+
+
+def finalize_streaks(through_date):
+    """
+    Judge every day up to and including through_date as finished.
+    
+    Days missed since the last finalization (e.g. after downtime) are
+    all handled in one recompute from the ledger. Runs as a transaction,
+    so it doesn't interleave with other processes' commits.
+    
+    Args:
+        through_date (str): Last completed day, in YYYY-MM-DD format
+        
+    Returns:
+        dict: Streak data after finalization, or None if those days
+              were already finalized
+    """
+    from logic.pipeline import ExpenseTransaction
+    
+    with ExpenseTransaction() as txn:
+        return txn.finalize_streaks(through_date)
+
+
 if __name__ == "__main__":
     # Simple test
     print("Testing streak manager...")
@@ -0,0 +1,177 @@
+"""
+Tenant Module
+Per-user data directories so one process can serve many users.
+
+The current user is held in a context variable, so every function in
+expense_store, limit_checker and streak_manager resolves its files for
+whichever user the caller selected with use_user():
+
+    with use_user('alice'):
+        add_expense(299)
+        check_and_update_streak()
+
+User directories are sharded by a hash prefix to keep any one folder
+from holding thousands of entries:
+
+    data/users/3f/a2/alice/expenses.json
+
+With no user selected, the single-user data/ folder is used as before.
+
+use_data_root() picks the root data folder itself for a block, e.g.
+for a worker handed the root by its parent, without touching
+SPENDWISE_DATA_DIR for the rest of the process.
+"""
+
+import hashlib
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+
+# Sub-folder of the data directory that holds all user folders
+USERS_DIR = 'users'
+
+_current_user = ContextVar('spendwise_user', default=None)
+_data_root = ContextVar('spendwise_data_root', default=None)
+
+
+def get_current_user():
+    """
+    Get the user selected for the current context.
+
+    Returns:
+        str or None: User ID, or None in single-user mode
+    """
+    return _current_user.get()
+
+
+@contextmanager
+def use_user(user_id):
+    """
+    Select a user for the enclosed block.
+
+    Args:
+        user_id (str or None): User ID, or None for single-user mode
+
+    Raises:
+        ValueError: If user_id is not a safe folder name
+    """
+    if user_id is not None:
+        validate_user_id(user_id)
+
+    token = _current_user.set(user_id)
+    try:
+        yield user_id
+    finally:
+        _current_user.reset(token)
+
+
+def get_data_root():
+    """
+    Get the root data directory selected for the current context.
+
+    Returns:
+        str or None: Root data directory, or None to use the default
+    """
+    return _data_root.get()
+
+
+@contextmanager
+def use_data_root(base_dir):
+    """
+    Select the root data directory for the enclosed block.
+
+    Args:
+        base_dir (str): Root data directory
+    """
+    token = _data_root.set(base_dir)
+    try:
+        yield base_dir
+    finally:
+        _data_root.reset(token)
+
+
+def validate_user_id(user_id):
+    """
+    Make sure a user ID can be used as a folder name.
+
+    Args:
+        user_id (str): User ID to check
+
+    Raises:
+        ValueError: If the ID is empty or could escape the data folder
+    """
+    if (not user_id or user_id in ('.', '..')
+            or '/' in user_id or '\\' in user_id or '\0' in user_id):
+        raise ValueError(f"Invalid user ID: {user_id!r}")
+
+
+@lru_cache(maxsize=65536)
+def get_user_shard(user_id):
+    """
+    Get the two-level hash prefix for a user's folder.
+
+    Args:
+        user_id (str): User ID
+
+    Returns:
+        tuple: (first level, second level), e.g. ('3f', 'a2')
+    """
+    digest = hashlib.sha1(user_id.encode('utf-8')).hexdigest()
+    return digest[:2], digest[2:4]
+
+
+@lru_cache(maxsize=65536)
+def get_user_data_dir(base_dir, user_id):
+    """
+    Get a user's data folder under base_dir (does not create it).
+
+    Cached per root and user, since every file lookup asks for it.
+
+    Args:
+        base_dir (str): Root data directory
+        user_id (str): User ID
+
+    Returns:
+        str: Path to the user's data folder
+    """
+    first, second = get_user_shard(user_id)
+    return os.path.join(base_dir, USERS_DIR, first, second, user_id)
+
+
+def iter_user_ids(base_dir):
+    """
+    List every user that has a data folder under base_dir.
+
+    Args:
+        base_dir (str): Root data directory
+
+    Yields:
+        str: User IDs, in no particular order
+    """
+    users_root = os.path.join(base_dir, USERS_DIR)
+    if not os.path.isdir(users_root):
+        return
+
+    for first in os.scandir(users_root):
+        if not first.is_dir():
+            continue
+        for second in os.scandir(first.path):
+            if not second.is_dir():
+                continue
+            for user in os.scandir(second.path):
+                if user.is_dir():
+                    yield user.name
+
+
+if __name__ == "__main__":
+    # Simple test
+    print("Testing tenant paths...")
+
+    for user_id in ('alice', 'bob'):
+        print(f"{user_id}: {get_user_data_dir('data', user_id)}")
+
+    with use_user('alice'):
+        print(f"Current user inside block: {get_current_user()}")
+    print(f"Current user outside block: {get_current_user()}")
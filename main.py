@@ -4,15 +4,25 @@ This is the main program that ties all modules together.
 
 Run this file to simulate the expense tracking system:
     python main.py
-"""
 
-# Import our custom modules
-from interface.mobile_actions import get_latest_sms, send_notification
-from logic.expense_parser import parse_expense_amount
-from logic.expense_store import add_expense
-from logic.daily_tracker import get_today_total, get_today_summary
-from logic.limit_checker import check_limit, get_daily_limit
-from logic.streak_manager import check_and_update_streak, get_current_streak, get_best_streak
+Or run it as a headless service:
+    python main.py --daemon
+
+One-shot commands:
+    python main.py summary
+    python main.py streak
+    python main.py set-limit 800
+    python main.py categorize chaayos food
+    python main.py simulate 400 600 800
+    python main.py report statement.html --period month
+    python main.py ingest messages.txt
+    python main.py listen --concurrency 4
+    python main.py serve --port 8765
+    python main.py --metrics metrics.prom process
+
+Modules are imported inside the functions that use them, so one-shot
+commands only load what they need and start quickly.
+"""
 
 
 def print_banner():
@@ -27,11 +37,87 @@ def print_separator():
     print("-" * 50)
 
 
+def send_spending_alerts(crossing, daily_total, daily_limit, forecast=None):
+    """
+    Queue the notifications for one processed expense.
+    
+    Args:
+        crossing (str or None): Threshold crossed for the first time today
+        daily_total (int): Today's total after the expense
+        daily_limit (int): Daily limit in effect
+        forecast (dict, optional): Result of check_projected_breach()
+    """
+    from interface.mobile_actions import queue_notification
+    
+    if crossing == 'exceeded':
+        queue_notification(
+            "Spending Alert",
+            f"You've exceeded your daily limit! Total: ₹{daily_total}"
+        )
+    elif crossing == 'warning':
+        queue_notification(
+            "Spending Warning",
+            f"You're at ₹{daily_total} / ₹{daily_limit}. Be careful!"
+        )
+    elif forecast is not None and forecast['notify']:
+        queue_notification(
+            "Spending Forecast",
+            f"At this pace you'll spend about ₹{forecast['projected_total']} "
+            f"today, over your ₹{daily_limit} limit."
+        )
+
+
+def send_anomaly_alert(amount, merchant, anomaly):
+    """
+    Queue a notification for an unusually large expense.
+    
+    Args:
+        amount (int): Expense amount
+        merchant (str or None): Merchant name
+        anomaly (dict): Result of the anomaly check
+    """
+    from interface.mobile_actions import queue_notification
+    
+    where = f" at {merchant}" if merchant else ""
+    queue_notification(
+        "Unusual Expense",
+        f"₹{amount}{where} is much more than your usual ₹{anomaly['typical']}."
+    )
+
+
+def notify_limit_crossed(event):
+    """
+    Queue the alert for a threshold crossed for the first time today.
+    
+    Args:
+        event (LimitCrossed): Published by the limit checker
+    """
+    send_spending_alerts(event.level, event.daily_total, event.limit)
+
+
+def subscribe_agent_handlers():
+    """
+    Update streaks and alerts, send alerts and feed the forecaster from
+    expense events. Called once by the commands that take in expenses.
+    """
+    from logic import event_bus, spend_forecaster
+    from logic.pipeline import install_subscribers
+    
+    install_subscribers()
+    event_bus.subscribe(event_bus.ExpenseAdded, spend_forecaster.on_expense_added)
+    event_bus.subscribe(event_bus.LimitCrossed, notify_limit_crossed)
+
+
 def process_expense():
     """
     Main function that processes an expense.
     This simulates receiving an SMS and tracking the expense.
     """
+    from interface.mobile_actions import get_latest_sms, flush_notifications
+    from logic.expense_parser import parse_expense
+    from logic.categorizer import categorize_merchant
+    from logic.pipeline import ExpenseTransaction
+    
     print_banner()
     
     # Step 1: Get latest SMS (stub - returns sample SMS)
@@ -42,86 +128,353 @@ def process_expense():
     
     # Step 2: Parse expense amount from SMS
     print("Step 2: Parsing expense amount...")
-    expense_amount = parse_expense_amount(sms_text)
+    expense = parse_expense(sms_text)
     
-    if expense_amount is None:
+    if expense is None:
         print("   No expense found in SMS")
         print("   This might be a credit transaction or invalid SMS")
         return
     
+    expense_amount = expense['amount']
+    merchant = expense['merchant']
     print(f"   Expense detected: ₹{expense_amount}")
+    # Same rule as pipeline.process_sms, so both paths store the same category
+    category = categorize_merchant(merchant)
+    if merchant:
+        print(f"   Merchant: {merchant} ({category})")
     print()
     
-    # Step 3: Store the expense
-    print("Step 3: Storing expense...")
-    success = add_expense(expense_amount)
+    # Load expenses, config and streak once; everything below runs in
+    # memory, and expenses, alert state and streak are written together
+    # when the block ends (or discarded if it raises). Alerts go out
+    # only once everything is stored.
+    with ExpenseTransaction() as txn:
+        # Flag unusually large debits before they're stored
+        anomaly = txn.check_anomaly(expense_amount, merchant)
+        
+        # Step 3: Store the expense; the limit checker, streak manager,
+        # forecaster and notifier all react to the ExpenseAdded event
+        print("Step 3: Storing expense...")
+        success = txn.add_expense(expense_amount, merchant=merchant, category=category)
+        
+        if not success:
+            txn.rollback()
+            print("   Failed to store expense")
+            return
+        
+        event = txn.last_event
+        print(f"   Expense logged: ₹{expense_amount}")
+        if anomaly['anomaly']:
+            print(f"   Unusual amount! Typically ₹{anomaly['typical']}")
+        print()
+        
+        # Step 4: Calculate daily total
+        print("Step 4: Calculating daily total...")
+        daily_total = event.daily_total
+        daily_limit = txn.daily_limit
+        print(f"   Daily total: ₹{daily_total} / ₹{daily_limit}")
+        print()
+        
+        # Step 5: Check limit warnings
+        print("Step 5: Checking spending limits...")
+        limit_status = txn.check_limit(daily_total)
+        forecast = None
+        
+        if limit_status['exceeded']:
+            print(f"   LIMIT EXCEEDED! You're at {limit_status['percentage']}% of your daily limit")
+        elif limit_status['warning']:
+            print(f"   Near daily limit ({limit_status['percentage']}% used)")
+        else:
+            print(f"   Within budget ({limit_status['percentage']}% used)")
+            
+            # Warn early if today's spending pattern points past the limit
+            forecast = txn.check_forecast(daily_total)
+            print(f"   Projected end-of-day total: ₹{forecast['projected_total']}")
+        
+        print()
+        
+        # Step 6: Update spending streak
+        print("Step 6: Updating spending streak...")
+        # Filled in by the streak step; update_streak() is a no-op if it ran
+        streak_result = event.results.get('streak') or txn.update_streak(daily_total)
+        
+        current_streak = streak_result['current_streak']
+        best_streak = streak_result['best_streak']
+        
+        if streak_result.get('already_updated'):
+            print(f"   Streak already updated today")
+            print(f"   Current streak: {current_streak} days (Best: {best_streak})")
+        elif streak_result['streak_broken']:
+            print(f"   Streak broken! Starting fresh from 0")
+            print(f"   Best streak: {best_streak} days")
+        else:
+            print(f"   Streak: {current_streak} days (Best: {best_streak})")
+            if current_streak == best_streak and current_streak > 0:
+                print(f"   New personal best!")
     
-    if not success:
-        print("   Failed to store expense")
-        return
+    if anomaly['anomaly']:
+        send_anomaly_alert(expense_amount, merchant, anomaly)
+    if forecast is not None:
+        send_spending_alerts(None, daily_total, daily_limit, forecast)
     
-    print(f"   Expense logged: ₹{expense_amount}")
     print()
+    print_separator()
     
-    # Step 4: Calculate daily total
-    print("Step 4: Calculating daily total...")
-    daily_total = get_today_total()
-    daily_limit = get_daily_limit()
-    print(f"   Daily total: ₹{daily_total} / ₹{daily_limit}")
+    # Print final summary
+    print("\nDAILY SUMMARY")
+    print_separator()
+    print(f"Total Expenses: {txn.get_expense_count()}")
+    print(f"Total Amount:   ₹{daily_total} / ₹{daily_limit}")
+    print(f"Remaining:      ₹{daily_limit - daily_total}")
+    print(f"Streak:         {current_streak} days")
+    print_separator()
     print()
     
-    # Step 5: Check limit warnings
-    print("Step 5: Checking spending limits...")
-    limit_status = check_limit(daily_total)
+    # Show any alerts from this expense before the menu is redrawn
+    flush_notifications()
+
+
+def show_summary():
+    """Print today's spending summary."""
+    from datetime import datetime
+    from logic.categorizer import UNCATEGORIZED
+    from logic.daily_tracker import get_today_summary
+    from logic.expense_store import get_category_totals
+    from logic.limit_checker import get_daily_limit
     
-    if limit_status['exceeded']:
-        print(f"   LIMIT EXCEEDED! You're at {limit_status['percentage']}% of your daily limit")
-        send_notification(
-            "Spending Alert",
-            f"You've exceeded your daily limit! Total: ₹{daily_total}"
-        )
-    elif limit_status['warning']:
-        print(f"   Near daily limit ({limit_status['percentage']}% used)")
-        send_notification(
-            "Spending Warning",
-            f"You're at ₹{daily_total} / ₹{daily_limit}. Be careful!"
-        )
+    print_banner()
+    summary = get_today_summary()
+    limit = get_daily_limit()
+    by_category = get_category_totals([datetime.now().strftime('%Y-%m-%d')])
+    # Expenses stored without a category count as uncategorized too
+    if None in by_category:
+        uncategorized = by_category.pop(None)
+        by_category[UNCATEGORIZED] = by_category.get(UNCATEGORIZED, 0) + uncategorized
+    print("TODAY'S SUMMARY")
+    print_separator()
+    print(f"Expenses count: {summary['count']}")
+    print(f"Individual amounts: {summary['expenses']}")
+    print(f"Total spent: ₹{summary['total']}")
+    print(f"Daily limit: ₹{limit}")
+    print(f"Remaining: ₹{limit - summary['total']}")
+    if by_category:
+        print("By category:")
+        for category, total in sorted(by_category.items(), key=lambda item: -item[1]):
+            print(f"  {category:<14} ₹{total}")
+    print_separator()
+
+
+def show_streak():
+    """Print current and best streak."""
+    from logic.streak_manager import get_current_streak, get_best_streak
+    
+    print_banner()
+    current = get_current_streak()
+    best = get_best_streak()
+    print("STREAK INFORMATION")
+    print_separator()
+    print(f"Current streak: {current} days")
+    print(f"Best streak:    {best} days")
+    print_separator()
+
+
+def change_limit(new_limit):
+    """
+    Update the daily limit and report the result.
+    
+    Args:
+        new_limit (int): New daily limit in rupees
+    """
+    from logic.limit_checker import set_daily_limit
+    
+    if new_limit > 0:
+        set_daily_limit(new_limit)
+        print(f"Daily limit updated to ₹{new_limit}")
     else:
-        print(f"   Within budget ({limit_status['percentage']}% used)")
+        print("Limit must be greater than 0")
+
+
+def run_simulation(limits=None, limit_spec=None):
+    """
+    Show how the spending history would look under other daily limits.
     
-    print()
+    Args:
+        limits (list, optional): Daily limits to try
+        limit_spec (list, optional): [start, stop, step] for a range of limits
+    """
+    from logic.budget_simulator import simulate_limits, limit_range
+    from logic.limit_checker import get_daily_limit
     
-    # Step 6: Update spending streak
-    print("Step 6: Updating spending streak...")
-    streak_result = check_and_update_streak()
+    candidates = list(limits or [])
+    if limit_spec:
+        candidates.extend(limit_range(*limit_spec))
+    if not candidates:
+        current = get_daily_limit()
+        candidates = limit_range(max(100, current // 2), current * 2, max(50, current // 10))
     
-    current_streak = streak_result['current_streak']
-    best_streak = streak_result['best_streak']
+    simulation = simulate_limits(sorted(set(candidates)))
     
-    if streak_result.get('already_updated'):
-        print(f"   Streak already updated today")
-        print(f"   Current streak: {current_streak} days (Best: {best_streak})")
-    elif streak_result['streak_broken']:
-        print(f"   Streak broken! Starting fresh from 0")
-        print(f"   Best streak: {best_streak} days")
+    print("WHAT-IF SIMULATION")
+    print_separator()
+    print(f"History: {simulation['days']} days "
+          f"({simulation['start']} to {simulation['end']})")
+    print_separator()
+    print(f"{'Limit':>8} {'Streak':>7} {'Best':>6} {'Over':>6} {'Warned':>7}")
+    for scenario in simulation['scenarios']:
+        print(f"{'₹' + str(scenario['daily_limit']):>8} {scenario['current_streak']:>7} "
+              f"{scenario['best_streak']:>6} {scenario['breach_days']:>6} "
+              f"{scenario['warning_days']:>7}")
+    print_separator()
+
+
+def export_report(path, period='day', start=None, end=None):
+    """
+    Write a spending statement to a CSV or HTML file.
+    
+    Args:
+        path (str): Output file (.html/.htm for HTML, otherwise CSV)
+        period (str): 'day', 'month' or 'year'
+        start (str, optional): First day to include (YYYY-MM-DD)
+        end (str, optional): Last day to include (YYYY-MM-DD)
+    """
+    from logic.report_generator import write_report
+    
+    try:
+        totals = write_report(path, period, start, end)
+    except ValueError as e:
+        # Bad --from/--to dates
+        raise SystemExit(f"Error: {e}")
+    print(f"Wrote {totals['rows']} {period} rows "
+          f"({totals['expenses']} expenses, ₹{totals['total']}) to {path}")
+
+
+def set_merchant_category(keyword, category):
+    """
+    Map a merchant keyword to a category and report the result.
+    
+    Args:
+        keyword (str): Merchant name or part of it
+        category (str): Category name
+    """
+    from logic.categorizer import add_merchant_category
+    
+    add_merchant_category(keyword, category)
+    print(f"'{keyword}' will be categorized as {category}")
+
+
+def run_ingest(path, batch_size=500):
+    """
+    Push a file of SMS (one per line) through the pipeline.
+    
+    Args:
+        path (str): Input file path, or '-' for stdin
+        batch_size (int): Number of expenses stored per transaction
+    """
+    import sys
+    from logic.bulk_ingest import ingest_lines
+    
+    def report(stats):
+        print(f"  {stats['read']} msgs ({stats['msgs_per_sec']} msgs/s) - "
+              f"parsed {stats['parsed']}, skipped {stats['skipped']}, "
+              f"duplicates {stats['duplicates']}", file=sys.stderr)
+    
+    if path == '-':
+        result = ingest_lines(sys.stdin, batch_size, on_progress=report)
     else:
-        print(f"   Streak: {current_streak} days (Best: {best_streak})")
-        if current_streak == best_streak and current_streak > 0:
-            print(f"   New personal best!")
+        with open(path, 'r', encoding='utf-8') as file:
+            result = ingest_lines(file, batch_size, on_progress=report)
     
-    print()
+    print("INGEST SUMMARY")
+    print_separator()
+    print(f"Messages read:   {result['read']}")
+    print(f"Parsed:          {result['parsed']}")
+    print(f"Skipped:         {result['skipped']}")
+    print(f"Duplicates:      {result['duplicates']}")
+    print(f"Stored:          {result['stored']}")
+    print(f"Elapsed:         {result['elapsed']} s ({result['msgs_per_sec']} msgs/s)")
     print_separator()
+    print("Time per stage:")
+    for stage, seconds in result['timings'].items():
+        print(f"  {stage:<8} {seconds * 1000:9.1f} ms")
+    print_separator()
+
+
+def run_listen(concurrency=4, batch_size=50, poll_interval=1.0, max_messages=None):
+    """
+    Store SMS from the device as they arrive, until interrupted.
     
-    # Print final summary
-    print("\nDAILY SUMMARY")
+    Args:
+        concurrency (int): Number of consumer tasks
+        batch_size (int): Most SMS stored per transaction
+        poll_interval (float): Seconds between device polls
+        max_messages (int, optional): Stop after this many messages
+    """
+    import asyncio
+    import signal
+    import sys
+    from interface.sms_ingest import run_ingest
+    
+    def report(stats):
+        print(f"  {stats['received']} msgs ({stats['msgs_per_sec']} msgs/s) - "
+              f"stored {stats['stored']}, skipped {stats['skipped']}, "
+              f"failed {stats['failed']}, queued {stats['queue_depth']}", file=sys.stderr)
+    
+    async def listen():
+        # Stop polling on Ctrl+C / SIGTERM, then drain what was queued
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop_event.set)
+            except NotImplementedError:
+                # Windows event loops have no signal handlers
+                pass
+        return await run_ingest(concurrency=concurrency, max_messages=max_messages,
+                                poll_interval=poll_interval, batch_size=batch_size,
+                                stop_event=stop_event, on_stats=report)
+    
+    result = asyncio.run(listen())
+    
+    print("LISTEN SUMMARY")
     print_separator()
-    summary = get_today_summary()
-    print(f"Total Expenses: {summary['count']}")
-    print(f"Total Amount:   ₹{summary['total']} / ₹{daily_limit}")
-    print(f"Remaining:      ₹{daily_limit - summary['total']}")
-    print(f"Streak:         {current_streak} days")
+    print(f"Messages received: {result['received']}")
+    print(f"Stored:            {result['stored']}")
+    print(f"Skipped:           {result['skipped']}")
+    print(f"Failed:            {result['failed']}")
+    print(f"Elapsed:           {result['elapsed']} s ({result['msgs_per_sec']} msgs/s)")
+    print_separator()
+
+
+def run_nightly_sweep(through_date=None, workers=None):
+    """
+    Finalize streaks and check limits for every user.
+    
+    Args:
+        through_date (str, optional): Last completed day, in YYYY-MM-DD
+                                      format. If None, uses yesterday.
+        workers (int, optional): Worker processes. If None, one per CPU.
+    """
+    import sys
+    from logic.nightly_sweep import run_sweep
+    
+    def report(stats):
+        print(f"  shard {stats['shards_done']}/{stats['shards']} - "
+              f"{stats['users_done']}/{stats['users']} users "
+              f"({stats['users_per_sec']} users/s)", file=sys.stderr)
+    
+    result = run_sweep(through_date, workers, on_progress=report)
+    
+    print(f"SWEEP SUMMARY ({result['date']})")
+    print_separator()
+    print(f"Users:           {result['users']}")
+    print(f"Updated:         {result['updated']}")
+    print(f"Already done:    {result['skipped']}")
+    print(f"Over limit:      {result['over_limit']}")
+    print(f"Elapsed:         {result['elapsed']} s ({result['users_per_sec']} users/s)")
+    for shard, seconds in result['stragglers']:
+        print(f"Slow shard:      #{shard} took {seconds} s")
+    print(f"Report:          {result['report_path']}")
     print_separator()
-    print()
 
 
 def show_menu():
@@ -134,65 +487,302 @@ def show_menu():
         print("2. View today's summary")
         print("3. View current streak")
         print("4. Change daily limit")
-        print("5. Exit")
+        print("5. Export monthly statement")
+        print("6. Exit")
         print("=" * 50)
         
-        choice = input("\nEnter your choice (1-5): ").strip()
+        choice = input("\nEnter your choice (1-6): ").strip()
         
         if choice == '1':
             process_expense()
         
         elif choice == '2':
-            print_banner()
-            summary = get_today_summary()
-            limit = get_daily_limit()
-            print("TODAY'S SUMMARY")
-            print_separator()
-            print(f"Expenses count: {summary['count']}")
-            print(f"Individual amounts: {summary['expenses']}")
-            print(f"Total spent: ₹{summary['total']}")
-            print(f"Daily limit: ₹{limit}")
-            print(f"Remaining: ₹{limit - summary['total']}")
-            print_separator()
+            show_summary()
         
         elif choice == '3':
-            print_banner()
-            current = get_current_streak()
-            best = get_best_streak()
-            print("STREAK INFORMATION")
-            print_separator()
-            print(f"Current streak: {current} days")
-            print(f"Best streak:    {best} days")
-            print_separator()
+            show_streak()
         
         elif choice == '4':
+            from logic.limit_checker import get_daily_limit
+            
             print_banner()
             current_limit = get_daily_limit()
             print(f"Current daily limit: ₹{current_limit}")
             try:
                 new_limit = int(input("Enter new daily limit (₹): "))
-                if new_limit > 0:
-                    from logic.limit_checker import set_daily_limit
-                    set_daily_limit(new_limit)
-                    print(f"Daily limit updated to ₹{new_limit}")
-                else:
-                    print("Limit must be greater than 0")
+                change_limit(new_limit)
             except ValueError:
                 print("Invalid input. Please enter a number.")
         
         elif choice == '5':
+            path = input("Save statement as [statement.html]: ").strip() or 'statement.html'
+            export_report(path, 'month')
+        
+        elif choice == '6':
             print("\nThank you for using Expense Agent!")
             print("Stay mindful of your spending!\n")
             break
         
         else:
-            print("Invalid choice. Please enter 1-5.")
+            print("Invalid choice. Please enter 1-6.")
+
+
+def run_daemon(poll_interval=5.0, batch_size=100):
+    """
+    Run the expense pipeline as a long-running headless service.
+    
+    Pulls new SMS past the saved cursor and runs parse -> store ->
+    limit -> streak on each batch in its own transaction. The batch's
+    expenses and the moved cursor are committed together. If anything
+    fails, the batch is rolled back and its SMS are retried one at a
+    time; any SMS that still fails is saved to failed_sms.json and the
+    cursor moves past it, so one bad message can't stall ingestion.
+    Each batch starts from the files on disk, so writes by other
+    processes are kept.
+    SIGTERM/SIGINT stop the loop cleanly; SIGHUP reports the reloaded
+    config.json.
+    
+    Args:
+        poll_interval (float): Seconds to wait when there are no new SMS
+        batch_size (int): Maximum SMS handled per poll
+    """
+    import signal
+    import threading
+    from interface.mobile_actions import (
+        fetch_sms_since, load_sms_cursor, advance_sms_cursor, get_sms_cursor_file_path,
+        load_failed_sms, record_failed_sms, get_failed_sms_file_path,
+        flush_notifications, flush_outbox,
+    )
+    from logic.limit_checker import get_daily_limit
+    from logic.pipeline import ExpenseTransaction, process_sms
+    from logic.day_scheduler import DayEndScheduler
+    
+    stop_event = threading.Event()
+    reload_event = threading.Event()
+    
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: reload_event.set())
+    
+    cursor = load_sms_cursor()
+    
+    def run_batch(messages):
+        """Process SMS and move the cursor past them in one transaction."""
+        # Alerts for this batch, sent once it is committed
+        alerts = []
+        next_cursor = advance_sms_cursor(dict(cursor), messages, save=False)
+        
+        # Waits for the scheduler's finalization, also a transaction
+        with ExpenseTransaction() as txn:
+            for message in messages:
+                result = process_sms(message['body'], txn, message['id'])
+                if result is None:
+                    continue
+                
+                if result['anomaly']['anomaly']:
+                    alerts.append((send_anomaly_alert, result['amount'],
+                                   result['merchant'], result['anomaly']))
+                
+                # Crossing alerts go out through notify_limit_crossed
+                if not result['limit_status']['warning']:
+                    forecast = txn.check_forecast(result['daily_total'])
+                    alerts.append((send_spending_alerts, None, result['daily_total'],
+                                   txn.daily_limit, forecast))
+                print(f"Logged ₹{result['amount']} "
+                      f"(today ₹{result['daily_total']} / ₹{txn.daily_limit})")
+            
+            # Only move the checkpoint together with the batch
+            txn.include_file('sms_cursor', get_sms_cursor_file_path, next_cursor)
+        return alerts
+    
+    def skip_message(message, error):
+        """Dead-letter an SMS and move the cursor past it in one transaction."""
+        next_cursor = advance_sms_cursor(dict(cursor), [message], save=False)
+        with ExpenseTransaction() as txn:
+            failed = record_failed_sms(load_failed_sms(), message, error)
+            txn.include_file('failed_sms', get_failed_sms_file_path, failed)
+            txn.include_file('sms_cursor', get_sms_cursor_file_path, next_cursor)
+    
+    def on_finalize(streak_data):
+        print(f"Finalized day {streak_data['finalized_date']}: "
+              f"streak {streak_data['current_streak']} days")
+    
+    scheduler = DayEndScheduler(on_finalize=on_finalize)
+    scheduler.start()
+    print(f"Expense agent daemon started (polling every {poll_interval}s)")
+    
+    try:
+        while not stop_event.is_set():
+            if reload_event.is_set():
+                # Every batch reads config.json afresh
+                reload_event.clear()
+                print(f"Config reloaded, daily limit ₹{get_daily_limit()}")
+            
+            # Retry failed or deferred notifications even when no new
+            # alerts come in to trigger a flush
+            flush_outbox()
+            
+            messages = fetch_sms_since(cursor, batch_size)
+            if not messages:
+                stop_event.wait(poll_interval)
+                continue
+            
+            try:
+                alerts = run_batch(messages)
+                cursor = advance_sms_cursor(dict(cursor), messages, save=False)
+            except Exception as e:
+                # Rolled back; find the message that fails and skip it
+                print(f"Batch of {len(messages)} SMS failed ({e}), retrying one at a time")
+                alerts = []
+                for message in messages:
+                    try:
+                        alerts.extend(run_batch([message]))
+                    except Exception as e:
+                        print(f"Skipping SMS {message['id']}: {e}")
+                        skip_message(message, e)
+                    cursor = advance_sms_cursor(dict(cursor), [message], save=False)
+            
+            for send, *alert_args in alerts:
+                send(*alert_args)
+            
+            if poll_interval:
+                stop_event.wait(poll_interval)
+    finally:
+        scheduler.stop()
+        flush_notifications()
+        print("Expense agent daemon stopped")
 
 
 def main():
     """Main entry point of the application."""
-    # Run menu-driven interface
-    show_menu()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Expense tracking agent")
+    parser.add_argument('--daemon', action='store_true',
+                        help="run headless, processing SMS continuously")
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help="seconds between SMS polls in daemon mode")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="collect timing/I-O metrics and write them here on exit "
+                             "(.prom for Prometheus text, otherwise JSON)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="run under cProfile and write stats here")
+    parser.add_argument('--user', help="user ID whose data to use (multi-user hosting)")
+    
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('menu', help="interactive menu (default)")
+    commands.add_parser('process', help="process one simulated SMS")
+    commands.add_parser('summary', help="show today's summary")
+    commands.add_parser('streak', help="show current and best streak")
+    set_limit_parser = commands.add_parser('set-limit', help="change the daily limit")
+    set_limit_parser.add_argument('limit', type=int)
+    simulate_parser = commands.add_parser('simulate', help="replay history against other daily limits")
+    simulate_parser.add_argument('limits', nargs='*', type=int, help="daily limits to try")
+    simulate_parser.add_argument('--range', nargs=3, type=int, metavar=('START', 'STOP', 'STEP'),
+                                 dest='limit_range', help="try every limit in a range")
+    report_parser = commands.add_parser('report', help="export a CSV or HTML statement")
+    report_parser.add_argument('path', help="output file (.html for HTML, otherwise CSV)")
+    report_parser.add_argument('--period', choices=['day', 'month', 'year'], default='day')
+    report_parser.add_argument('--from', dest='start', metavar='DATE', help="first day (YYYY-MM-DD)")
+    report_parser.add_argument('--to', dest='end', metavar='DATE', help="last day (YYYY-MM-DD)")
+    category_parser = commands.add_parser('categorize', help="map a merchant keyword to a category")
+    category_parser.add_argument('keyword')
+    category_parser.add_argument('category')
+    ingest_parser = commands.add_parser('ingest', help="bulk-ingest SMS from a file or stdin")
+    ingest_parser.add_argument('path', nargs='?', default='-',
+                               help="file with one SMS per line ('-' for stdin)")
+    ingest_parser.add_argument('--batch-size', type=int, default=500)
+    listen_parser = commands.add_parser('listen', help="store SMS from the device as they arrive")
+    listen_parser.add_argument('--concurrency', type=int, default=4)
+    listen_parser.add_argument('--batch-size', type=int, default=50)
+    listen_parser.add_argument('--poll-interval', type=float, default=1.0)
+    listen_parser.add_argument('--max-messages', type=int, help="stop after this many messages")
+    sweep_parser = commands.add_parser('sweep', help="end-of-day sweep over all users")
+    sweep_parser.add_argument('--date', help="last completed day (default: yesterday)")
+    sweep_parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    serve_parser = commands.add_parser('serve', help="run the local API server")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--unix', metavar='PATH', help="serve on a Unix socket instead")
+    
+    args = parser.parse_args()
+    
+    from logic.tenant import use_user
+    
+    with use_user(args.user):
+        run_with_options(args)
+
+
+def run_with_options(args):
+    """
+    Run the command, with metrics and profiling if requested.
+    
+    Args:
+        args (argparse.Namespace): Parsed arguments from main()
+    """
+    if args.metrics or args.profile:
+        from logic import metrics
+        
+        if args.metrics:
+            metrics.enable()
+        try:
+            if args.profile:
+                with metrics.profile(args.profile):
+                    run_command(args)
+            else:
+                run_command(args)
+        finally:
+            if args.metrics:
+                metrics.write_snapshot(args.metrics)
+    else:
+        run_command(args)
+
+
+def run_command(args):
+    """
+    Dispatch parsed command-line arguments.
+    
+    Args:
+        args (argparse.Namespace): Parsed arguments from main()
+    """
+    from logic.day_scheduler import use_timezone
+    
+    # Expenses are dated on local time, so set it before anything runs
+    use_timezone()
+    
+    if args.daemon or args.command in (None, 'menu', 'process', 'ingest', 'listen', 'serve'):
+        # Commands that take in expenses react to them through the bus
+        subscribe_agent_handlers()
+    
+    if args.daemon:
+        run_daemon(poll_interval=args.poll_interval)
+    elif args.command == 'process':
+        process_expense()
+    elif args.command == 'summary':
+        show_summary()
+    elif args.command == 'streak':
+        show_streak()
+    elif args.command == 'set-limit':
+        change_limit(args.limit)
+    elif args.command == 'simulate':
+        run_simulation(args.limits, args.limit_range)
+    elif args.command == 'report':
+        export_report(args.path, args.period, args.start, args.end)
+    elif args.command == 'categorize':
+        set_merchant_category(args.keyword, args.category)
+    elif args.command == 'ingest':
+        run_ingest(args.path, args.batch_size)
+    elif args.command == 'listen':
+        run_listen(args.concurrency, args.batch_size, args.poll_interval, args.max_messages)
+    elif args.command == 'sweep':
+        run_nightly_sweep(args.date, args.workers)
+    elif args.command == 'serve':
+        from interface.api_server import serve
+        serve(args.host, args.port, args.unix)
+    else:
+        # Run menu-driven interface
+        show_menu()
 
 
 if __name__ == "__main__":
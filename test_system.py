@@ -3,20 +3,53 @@ Simple test script to verify all modules work correctly.
 This runs automated tests without user interaction.
 """
 
+import atexit
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
 print("=" * 60)
 print("EXPENSE AGENT - AUTOMATED TEST")
 print("=" * 60)
 
+
+@contextmanager
+def temp_data_dir():
+    """Point every module at a fresh, empty data directory."""
+    data_dir = tempfile.mkdtemp(prefix='spendwise-test-')
+    previous = os.environ.get('SPENDWISE_DATA_DIR')
+    os.environ['SPENDWISE_DATA_DIR'] = data_dir
+    try:
+        yield data_dir
+    finally:
+        if previous is None:
+            del os.environ['SPENDWISE_DATA_DIR']
+        else:
+            os.environ['SPENDWISE_DATA_DIR'] = previous
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+# Tests never write to data/: the first ones run on a copy of the sample
+# data, the rest in an empty directory each (see temp_data_dir())
+sample_data_dir = tempfile.mkdtemp(prefix='spendwise-test-')
+shutil.copytree(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'),
+                sample_data_dir, dirs_exist_ok=True)
+os.environ['SPENDWISE_DATA_DIR'] = sample_data_dir
+atexit.register(shutil.rmtree, sample_data_dir, ignore_errors=True)
+
 # Test 1: Expense Parser
 print("\n[TEST 1] Expense Parser")
 print("-" * 60)
-from logic.expense_parser import parse_expense_amount
+from logic.expense_parser import parse_expense, parse_expense_amount
 
 test_sms = "₹299 debited from your account for Amazon"
 amount = parse_expense_amount(test_sms)
 print(f"SMS: {test_sms}")
 print(f"Parsed amount: ₹{amount}")
 assert amount == 299, "Parser test failed!"
+assert parse_expense("INR 200 paid to Uber") == {'amount': 200, 'merchant': 'Uber'}, "Expense parse failed!"
+assert parse_expense("Rs.0 debited for Uber") is None, "Zero debit parsed as an expense!"
 print("PASSED")
 
 # Test 2: Expense Store
@@ -49,7 +82,11 @@ print("PASSED")
 # Test 4: Limit Checker
 print("\n[TEST 4] Limit Checker")
 print("-" * 60)
-from logic.limit_checker import check_limit, get_daily_limit
+import json
+import os
+import subprocess
+import sys
+from logic.limit_checker import check_limit, evaluate_crossing, get_daily_limit
 
 limit = get_daily_limit()
 print(f"Daily limit: ₹{limit}")
@@ -58,17 +95,60 @@ result = check_limit(total)
 print(f"Warning: {result['warning']}")
 print(f"Exceeded: {result['exceeded']}")
 print(f"Usage: {result['percentage']}%")
+
+# Same results with and without NumPy (a None entry makes the import fail)
+batch_code = (
+    "import json, sys\n"
+    "if sys.argv[1] == 'fallback':\n"
+    "    sys.modules['numpy'] = None\n"
+    "from logic.limit_checker import check_limits_batch\n"
+    "batch = check_limits_batch([100, 400, 600, 50], [500, 500, 500, 0])\n"
+    "assert all(type(flag).__name__ in ('bool', 'bool_') for key in ('warning', 'exceeded')\n"
+    "           for flag in batch[key]), 'Flags are not booleans!'\n"
+    "print(json.dumps({key: [value.item() if hasattr(value, 'item') else value\n"
+    "                        for value in values] for key, values in batch.items()}))\n"
+)
+for batch_path in ('default', 'fallback'):
+    batch_run = subprocess.run([sys.executable, '-c', batch_code, batch_path],
+                               capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert batch_run.returncode == 0, batch_run.stderr
+    batch = json.loads(batch_run.stdout)
+    print(f"Batch ({batch_path}): {batch}")
+    assert batch['warning'] == [False, True, True, True], "Batch warning check failed!"
+    assert batch['exceeded'] == [False, False, True, True], "Batch exceeded check failed!"
+    assert batch['percentage'] == [20.0, 80.0, 120.0, 0.0], "Batch percentage check failed!"
+
+state = {'date': None, 'level': None, 'limit': None}
+events = [evaluate_crossing(state, "2026-01-18", amount, 500)
+          for amount in [100, 450, 480, 600, 700]]
+print(f"Crossing events: {events}")
+assert events == [None, 'warning', None, 'exceeded', None], "Crossing check failed!"
 print("PASSED")
 
 # Test 5: Streak Manager
 print("\n[TEST 5] Streak Manager")
 print("-" * 60)
-from logic.streak_manager import check_and_update_streak, get_current_streak
+from logic.streak_manager import check_and_update_streak, compute_streaks, recompute_streaks
 
 streak_result = check_and_update_streak()
 print(f"Current streak: {streak_result['current_streak']} days")
 print(f"Best streak: {streak_result['best_streak']} days")
 print(f"Streak broken: {streak_result['streak_broken']}")
+
+current, best = compute_streaks([True, True, True, False, True, True])
+print(f"Recomputed streaks: current={current}, best={best}")
+assert (current, best) == (2, 3), "Streak recompute failed!"
+
+# Each day is judged against the limit in effect then; gap days count as under
+history_config = {'daily_limit': 200, 'limit_history': [
+    {'date': None, 'daily_limit': 500},
+    {'date': '2026-01-04', 'daily_limit': 200},
+]}
+history_totals = {'2025-12-30': 100, '2026-01-01': 400, '2026-01-03': 450,
+                  '2026-01-04': 300, '2026-01-06': 150}
+rebuilt = recompute_streaks(history_totals, '2026-01-08', save=False, config=history_config)
+print(f"Rebuilt over limit history: {rebuilt}")
+assert (rebuilt['current_streak'], rebuilt['best_streak']) == (4, 5), "Limit history recompute failed!"
 print("PASSED")
 
 # Test 6: Mobile Actions (stub)
@@ -82,6 +162,623 @@ assert sms is not None, "SMS stub failed!"
 send_notification("Test", "This is a test notification")
 print("PASSED")
 
+# The remaining tests each run against an empty data directory, so they
+# don't depend on the sample data
+
+
+# Test 7: Per-user data directories
+print("\n[TEST 7] Per-user Data Directories")
+print("-" * 60)
+from logic.expense_store import get_data_dir, get_expenses_file_path
+from logic.tenant import use_user
+
+with temp_data_dir() as data_dir:
+    with use_user('alice'):
+        alice_dir = get_data_dir()
+        assert add_expense(120), "Failed to add expense for user!"
+    assert alice_dir.startswith(os.path.join(data_dir, 'users')), "User folder not sharded!"
+    assert get_today_expenses() == [], "User expense leaked into single-user data!"
+
+    # Looking up a folder doesn't create it; the first write does
+    with use_user('carol'):
+        carol_dir = get_data_dir()
+        assert not os.path.exists(carol_dir), "Lookup created the user folder!"
+        assert get_today_expenses() == [], "New user has expenses!"
+        assert not os.path.exists(carol_dir), "Read created the user folder!"
+
+    # A removed user folder is recreated on the next write
+    shutil.rmtree(alice_dir)
+    with use_user('alice'):
+        assert add_expense(80), "Write failed after user folder was removed!"
+        assert os.path.exists(get_expenses_file_path()), "Ledger not recreated!"
+        print(f"User folder: {os.path.relpath(get_data_dir(), data_dir)}")
+        assert get_today_expenses() == [80], "Wrong expenses after folder was removed!"
+print("PASSED")
+
+# Test 8: Nightly Sweep
+print("\n[TEST 8] Nightly Sweep")
+print("-" * 60)
+from logic.nightly_sweep import run_sweep
+from logic.streak_manager import load_streak_data
+
+with temp_data_dir() as data_dir:
+    for user_id in ('alice', 'bob'):
+        with use_user(user_id):
+            add_expense(300)
+
+    # Run from inside another user's context, in this process
+    with use_user('alice'):
+        sweep = run_sweep(workers=1)
+    print(f"Swept {sweep['users']} users, updated {sweep['updated']}")
+    assert sweep['users'] == 2, "Sweep didn't find both users!"
+    assert os.path.dirname(sweep['report_path']) == data_dir, "Report not in root data folder!"
+    assert os.environ['SPENDWISE_DATA_DIR'] == data_dir, "Sweep changed SPENDWISE_DATA_DIR!"
+    with use_user('bob'):
+        assert load_streak_data()['finalized_date'] == sweep['date'], "Sweep didn't save bob's streak!"
+
+    assert run_sweep(workers=1)['skipped'] == 2, "Rerun didn't skip finished users!"
+print("PASSED")
+
+# Test 9: Expense Events
+print("\n[TEST 9] Expense Events")
+print("-" * 60)
+from logic import event_bus
+from logic import pipeline
+from logic.expense_store import add_expenses
+from logic.limit_checker import get_alert_state_file_path
+from logic.pipeline import ExpenseTransaction, process_sms
+
+with temp_data_dir():
+    event_bus.clear()
+    crossed = []
+    event_bus.subscribe(event_bus.LimitCrossed, crossed.append)
+
+    # Opening a transaction must not subscribe anything globally
+    txn = ExpenseTransaction()
+    assert not event_bus.has_subscribers(event_bus.ExpenseAdded), "Transaction subscribed handlers!"
+    add_expense(600)
+    assert not os.path.exists(get_alert_state_file_path()), "Plain store write touched alert state!"
+
+    # Without subscribers, or with a failing one, the steps still run
+    def broken_handler(event):
+        raise RuntimeError("handler failed")
+
+    event_bus.subscribe(event_bus.ExpenseAdded, broken_handler)
+    txn = ExpenseTransaction()
+    result = process_sms("Rs.120 spent via UPI to Zomato", txn)
+    print(f"Crossing: {result['crossing']}, streak: {result['streak']['current_streak']}")
+    assert result['crossing'] == 'exceeded', "Crossing missing without subscribers!"
+    assert result['streak'] is not None, "Streak missing without subscribers!"
+
+    # Limit alerts wait for the commit and are dropped on rollback
+    assert crossed == [], "Limit alert sent before commit!"
+    txn.rollback()
+    assert crossed == [], "Limit alert sent for a rolled-back expense!"
+    process_sms("Rs.120 spent via UPI to Zomato", txn)
+    txn.commit()
+    assert [event.level for event in crossed] == ['exceeded'], "Limit alert not sent on commit!"
+
+    # Backfilled past days neither alert nor reset today's crossing state
+    event_bus.clear()
+    pipeline.install_subscribers()
+    event_bus.subscribe(event_bus.LimitCrossed, crossed.append)
+    with open(get_alert_state_file_path(), 'r', encoding='utf-8') as file:
+        alert_state = file.read()
+    add_expenses([450, 450], '2025-03-02')
+    txn = ExpenseTransaction()
+    txn.add_expense(900, '2025-03-01')
+    txn.commit()
+    with open(get_alert_state_file_path(), 'r', encoding='utf-8') as file:
+        assert file.read() == alert_state, "Backfill rewrote today's alert state!"
+    assert len(crossed) == 1, "Backfilled day sent a limit alert!"
+    event_bus.clear()
+print("PASSED")
+
+# Test 10: Transaction Commit
+print("\n[TEST 10] Transaction Commit")
+print("-" * 60)
+import json
+from logic import file_lock, pipeline
+from logic.expense_store import get_lock_file_path
+from logic.spend_forecaster import get_forecast_file_path
+from logic.streak_manager import load_streak_data
+
+with temp_data_dir() as data_dir:
+    # A crash after the journal is written is finished by the next transaction
+    def crash_mid_commit(journal_dir, journal_path):
+        with open(journal_path, 'r', encoding='utf-8') as file:
+            first, temp_name = sorted(json.load(file)['files'].items())[0]
+        os.replace(os.path.join(journal_dir, temp_name), os.path.join(journal_dir, first))
+        raise KeyboardInterrupt("crash")
+
+    txn = ExpenseTransaction()
+    txn.add_expense(200)
+    finish_commit = pipeline._finish_commit
+    pipeline._finish_commit = crash_mid_commit
+    try:
+        txn.commit()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline._finish_commit = finish_commit
+
+    txn = ExpenseTransaction()
+    assert not os.path.exists(os.path.join(data_dir, pipeline.JOURNAL_FILE)), "Journal left behind!"
+    assert get_today_expenses() == [200], "Interrupted commit not finished!"
+    assert load_streak_data()['last_update_date'] is not None, "Streak not finished with ledger!"
+    print(f"Recovered expenses: {get_today_expenses()}")
+
+    # A failure while writing leaves every file as it was
+    write_json = pipeline._write_json_synced
+    writes = []
+
+    def fail_second_write(file_path, data):
+        writes.append(file_path)
+        if len(writes) == 2:
+            raise OSError("disk full")
+        write_json(file_path, data)
+
+    txn.add_expense(300)
+    pipeline._write_json_synced = fail_second_write
+    try:
+        txn.commit()
+        assert False, "Commit should have failed!"
+    except OSError:
+        pass
+    finally:
+        pipeline._write_json_synced = write_json
+    assert get_today_expenses() == [200], "Failed commit changed the ledger!"
+    assert not [name for name in os.listdir(data_dir) if name.endswith('.tmp')], "Temp files left!"
+
+    # The forecaster profile is written with the transaction, not before
+    txn = ExpenseTransaction()
+    txn.observe_forecast(150)
+    with open(get_forecast_file_path(), 'r', encoding='utf-8') as file:
+        assert json.load(file)['today_total'] == 200, "Profile written before commit!"
+    txn.rollback()
+    txn.observe_forecast(150)
+    txn.commit()
+    with open(get_forecast_file_path(), 'r', encoding='utf-8') as file:
+        assert json.load(file)['today_total'] == 350, "Profile not written on commit!"
+
+# Processes committing into the same folder take turns instead of
+# clobbering each other's temp files and journal
+import subprocess
+import sys
+
+with temp_data_dir() as data_dir:
+    worker = ("from logic.expense_store import add_expense\n"
+              "from logic.pipeline import process_sms\n"
+              "for _ in range(100):\n"
+              "    process_sms('Rs.10 spent via UPI to Zomato')\n"
+              "    add_expense(10)\n")
+    workers = [subprocess.Popen([sys.executable, '-c', worker],
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+               for _ in range(2)]
+    assert all(process.wait() == 0 for process in workers), "Concurrent commit failed!"
+    print(f"Stored by two processes: {len(get_today_expenses())}")
+    assert get_today_expenses() == [10] * 400, "Concurrent commits lost expenses!"
+    assert not [name for name in os.listdir(data_dir) if name.endswith('.tmp')], "Temp files left!"
+
+    # A zero-amount debit changes nothing, so nothing stays locked
+    txn = ExpenseTransaction()
+    assert process_sms("Rs.0 debited from your account", txn) is None, "Zero debit processed!"
+    assert not file_lock.is_held(get_lock_file_path()), "Zero debit locked the data folder!"
+
+    # A transaction loaded before a direct write builds on it
+    txn = ExpenseTransaction()
+    add_expense(111)
+    txn.add_expense(333)
+    txn.commit()
+    assert get_today_expenses()[-2:] == [111, 333], "Transaction overwrote a direct write!"
+print("PASSED")
+
+# Test 11: Spend Forecaster
+print("\n[TEST 11] Spend Forecaster")
+print("-" * 60)
+from datetime import datetime, timedelta
+from logic import spend_forecaster
+from logic.expense_store import save_expenses
+
+with temp_data_dir():
+    today = datetime.now()
+    three_days_ago = (today - timedelta(days=3)).strftime('%Y-%m-%d')
+    save_expenses({three_days_ago: [300], today.strftime('%Y-%m-%d'): [100]})
+
+    # Days without expenses count towards the average, and today's
+    # expenses so far are part of the running day
+    profile = spend_forecaster.load_profile()
+    print(f"History: ₹{profile['history_total']} over {profile['history_days']} days, "
+          f"today ₹{profile['today_total']}")
+    assert profile['history_days'] == 3, "Zero-spend days not counted!"
+    assert profile['history_total'] == 300, "Wrong history total!"
+    assert profile['today_total'] == 100, "Today's expenses left out of bootstrap!"
+
+    # Rolling over a gap counts every day in it
+    in_two_days = (today + timedelta(days=2)).strftime('%Y-%m-%d')
+    assert spend_forecaster._roll_day(profile, in_two_days), "Day didn't roll over!"
+    assert profile['history_days'] == 5, "Gap days not counted on rollover!"
+    assert profile['history_total'] == 400, "Finished day not folded in!"
+    assert not spend_forecaster._roll_day(profile, in_two_days), "Rolled the same day twice!"
+print("PASSED")
+
+# Test 12: Day Scheduler
+print("\n[TEST 12] Day Scheduler")
+print("-" * 60)
+from logic.day_scheduler import DayEndScheduler, get_timezone, seconds_until_midnight
+
+# The scheduler's day is the ledger's day
+scheduler = DayEndScheduler()
+assert scheduler.now().strftime('%Y-%m-%d') == datetime.now().strftime('%Y-%m-%d'), \
+    "Scheduler and ledger disagree on the date!"
+
+berlin = get_timezone('Europe/Berlin')
+if berlin is not None:
+    # Clocks go forward on 2026-03-29 and back on 2026-10-25
+    spring = seconds_until_midnight(datetime(2026, 3, 29, 0, 0, tzinfo=berlin))
+    autumn = seconds_until_midnight(datetime(2026, 10, 25, 0, 0, tzinfo=berlin))
+    print(f"DST days: {spring / 3600:.0f}h and {autumn / 3600:.0f}h")
+    assert spring == 23 * 3600, "Short DST day miscounted!"
+    assert autumn == 25 * 3600, "Long DST day miscounted!"
+
+# Finalizing is a transaction, so an older open one doesn't undo it
+with temp_data_dir():
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    save_expenses({yesterday: [100]})
+    txn = ExpenseTransaction()
+    assert scheduler.finalize_through_yesterday()['finalized_date'] == yesterday, "Day not finalized!"
+    txn.add_expense(50)
+    txn.commit()
+    assert load_streak_data()['finalized_date'] == yesterday, "Commit overwrote the finalization!"
+print("PASSED")
+
+# Test 13: Notification Queue
+print("\n[TEST 13] Notification Queue")
+print("-" * 60)
+from interface.mobile_actions import NotificationQueue
+
+delivered = []
+
+
+def flaky_deliver(title, message):
+    if title == "Broken":
+        raise RuntimeError("push service down")
+    delivered.append(title)
+
+
+queue = NotificationQueue(window=0.01, deliver=flaky_deliver)
+queue.put("Broken", "first")
+queue.put("Limit", "second")
+queue.flush()
+queue.put("Limit", "third")
+queue.close()
+print(f"Delivered: {delivered}, failed: {queue.failed}")
+assert delivered == ["Limit", "Limit"], "Worker stopped after a failed delivery!"
+assert queue.failed == 1, "Failed delivery not counted!"
+print("PASSED")
+
+# Test 14: SMS Ingest
+print("\n[TEST 14] SMS Ingest")
+print("-" * 60)
+import asyncio
+from interface.sms_ingest import run_ingest
+
+stored = []
+
+
+def flaky_store(messages):
+    if any('Rs.500' in sms_text for sms_text in messages):
+        raise OSError("disk full")
+    amounts = [parse_expense_amount(sms_text) for sms_text in messages]
+    stored.extend(amounts)
+    return amounts
+
+
+sms_batch = [f"Rs.{amount} spent via UPI to Zomato" for amount in (100, 500, 200, 300)]
+stats = asyncio.run(run_ingest(concurrency=1, fetch=lambda: sms_batch, batch_size=1,
+                               max_messages=len(sms_batch), store=flaky_store))
+print(f"Stored: {stats['stored']}, failed: {stats['failed']}")
+assert stored == [100, 200, 300], "Consumer stopped after a store error!"
+assert stats['failed'] == 1, "Store error not counted as failed!"
+
+# Batches from several consumers all reach the ledger
+with temp_data_dir():
+    sms_batch = [f"Rs.{amount} spent via UPI to Zomato" for amount in range(1, 41)] + ["Hello"]
+    stats = asyncio.run(run_ingest(concurrency=3, fetch=lambda: sms_batch, batch_size=8,
+                                   max_messages=len(sms_batch)))
+    print(f"Stored: {stats['stored']}, skipped: {stats['skipped']}")
+    assert (stats['stored'], stats['skipped']) == (40, 1), "Batches not all stored!"
+    assert sorted(get_today_expenses()) == list(range(1, 41)), "Ledger missing batched expenses!"
+print("PASSED")
+
+# Test 15: Fake Device
+print("\n[TEST 15] Fake Device")
+print("-" * 60)
+from interface.fake_device import FakeDevice, run_load_test
+
+for bad_args in ({'rate': None, 'total': None}, {'rate': 0, 'total': 10}):
+    try:
+        FakeDevice(**bad_args)
+        assert False, f"FakeDevice accepted {bad_args}!"
+    except ValueError:
+        pass
+
+device = FakeDevice(rate=None, total=50)
+for bad_total in (None, 0, 100):
+    try:
+        run_load_test(device, bad_total)
+        assert False, f"run_load_test accepted total={bad_total}!"
+    except ValueError:
+        pass
+
+load = run_load_test(device, 50)
+print(f"Load test: {load['messages']} messages, {load['parsed']} parsed")
+assert load['messages'] == 50, "Load test didn't consume every message!"
+
+
+class DroppingDevice(FakeDevice):
+    def fetch_sms_since(self, cursor, limit=None):
+        if cursor['last_id'] >= 20:
+            raise ConnectionError("device disconnected")
+        return super().fetch_sms_since(cursor, limit)
+
+
+with temp_data_dir():
+    stored_load = run_load_test(FakeDevice(rate=None, total=30), 30, store=True)
+    assert len(get_today_expenses()) == stored_load['parsed'], "Load test didn't store expenses!"
+
+    # A source failing mid-run leaves the ledger and the lock as they were
+    try:
+        run_load_test(DroppingDevice(rate=None, total=50), 50, batch_size=10, store=True)
+        assert False, "Source error swallowed!"
+    except ConnectionError:
+        pass
+    assert not file_lock.is_held(get_lock_file_path()), "Failed load test kept the lock!"
+    assert len(get_today_expenses()) == stored_load['parsed'], "Failed load test stored expenses!"
+print("PASSED")
+
+# Test 16: Notification Outbox
+print("\n[TEST 16] Notification Outbox")
+print("-" * 60)
+from interface import mobile_actions
+from interface.mobile_actions import enqueue_outbox, flush_outbox, load_outbox, save_outbox
+
+
+def failing_deliver(title, message):
+    raise RuntimeError("push service down")
+
+
+with temp_data_dir():
+    screen_check = mobile_actions.is_screen_on
+    mobile_actions.is_screen_on = lambda: False
+    try:
+        enqueue_outbox("Limit", "over budget", flush=False)
+        assert flush_outbox(failing_deliver)['pending'] == 1, "Failed entry dropped!"
+        assert load_outbox()['last_flush_at'] == 0, "Failed flush counted as a flush!"
+
+        # Once the backoff has passed, the retry goes out without waiting
+        # for the screen-off interval
+        outbox = load_outbox()
+        outbox['entries'][0]['next_attempt_at'] = 0
+        save_outbox(outbox)
+        sent = []
+        result = flush_outbox(lambda title, message: sent.append(title))
+        print(f"Retry: {result}")
+        assert sent == ["Limit"], "Retry deferred after a failed flush!"
+        assert load_outbox()['last_flush_at'] > 0, "Successful flush not recorded!"
+
+        # An entry that keeps failing is given up on, and the next goes out
+        enqueue_outbox("Stuck", "never delivered", flush=False)
+        enqueue_outbox("Next", "after the stuck one", flush=False)
+        for attempt in range(mobile_actions.OUTBOX_MAX_ATTEMPTS):
+            outbox = load_outbox()
+            outbox['entries'][0]['next_attempt_at'] = 0
+            save_outbox(outbox)
+            flush_outbox(failing_deliver, force=True)
+        outbox = load_outbox()
+        assert [entry['title'] for entry in outbox['dead']] == ["Stuck"], "Failing entry not dead-lettered!"
+        sent = []
+        flush_outbox(lambda title, message: sent.append(title), force=True)
+        assert sent == ["Next"], "Entry behind a dead-lettered one not delivered!"
+        assert not [name for name in os.listdir(get_data_dir()) if name.endswith('.tmp')], "Temp file left!"
+    finally:
+        mobile_actions.is_screen_on = screen_check
+print("PASSED")
+
+# Test 17: Daemon Batches
+print("\n[TEST 17] Daemon Batches")
+print("-" * 60)
+import signal
+import main
+from interface.mobile_actions import load_sms_cursor
+
+
+class StopDaemon(Exception):
+    pass
+
+
+def sms(sms_id, amount):
+    return {'id': sms_id, 'timestamp': None, 'body': f"Rs.{amount} spent via UPI to Zomato"}
+
+
+batches = [
+    [sms(1, 100)],
+    [sms(2, 200)],
+    [sms(3, 30), {'id': 4, 'timestamp': None, 'body': "BROKEN"}],
+]
+
+
+def fake_fetch(cursor, limit=None):
+    if not batches:
+        raise StopDaemon("no more batches")
+    if len(batches) == 2:
+        # Another process writes between batches
+        add_expense(50)
+    return batches.pop(0)
+
+
+def fail_on_broken(sms_text, txn=None, sms_id=None):
+    if sms_text == "BROKEN":
+        raise ValueError("bad message")
+    return process_sms(sms_text, txn, sms_id)
+
+
+with temp_data_dir():
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT)}
+    fetch_sms = mobile_actions.fetch_sms_since
+    mobile_actions.fetch_sms_since = fake_fetch
+    pipeline.process_sms = fail_on_broken
+    try:
+        main.run_daemon(poll_interval=0)
+        assert False, "Daemon swallowed the error!"
+    except StopDaemon:
+        pass
+    finally:
+        mobile_actions.fetch_sms_since = fetch_sms
+        pipeline.process_sms = process_sms
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+    print(f"Ledger: {get_today_expenses()}, cursor: {load_sms_cursor()['last_id']}")
+    assert get_today_expenses() == [100, 50, 200, 30], "Batch lost another writer's expense or a good SMS!"
+
+    # A message that keeps failing is set aside instead of stalling the daemon
+    failed = mobile_actions.load_failed_sms()
+    assert [message['id'] for message in failed] == [4], "Failed SMS not dead-lettered!"
+    assert load_sms_cursor()['last_id'] == 4, "Cursor not moved past the failed SMS!"
+print("PASSED")
+
+# Test 18: API Ingest
+print("\n[TEST 18] API Ingest")
+print("-" * 60)
+import socket
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from interface import api_server
+
+
+def post_ingest(base, payload):
+    request = Request(base + '/ingest', data=json.dumps(payload).encode('utf-8'), method='POST')
+    try:
+        with urlopen(request) as response:
+            return response.status
+    except HTTPError as error:
+        return error.code
+
+
+with temp_data_dir():
+    server = api_server.ApiServer(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        for bad_payload in (["Rs.10 spent"], {'messages': "Rs.10 spent"}, {'messages': [10]},
+                            {'sms': 10}, {'messages': []}):
+            assert post_ingest(base, bad_payload) == 400, f"Accepted {bad_payload}!"
+
+        # Negative or oversized lengths are refused without reading a body
+        for length in (-1, api_server.MAX_BODY_BYTES + 1):
+            with socket.create_connection(server.server_address, timeout=3) as conn:
+                conn.sendall(f"POST /ingest HTTP/1.1\r\nHost: localhost\r\n"
+                             f"Content-Length: {length}\r\n\r\n".encode('ascii'))
+                status_line = conn.recv(1024).split(b'\r\n')[0]
+            assert b' 400 ' in status_line, f"Content-Length {length} not refused!"
+
+        # A failing message rolls back the whole request
+        api_server.process_sms = fail_on_broken
+        try:
+            status = post_ingest(base, {'messages': ["Rs.70 spent via UPI to Zomato", "BROKEN"]})
+        finally:
+            api_server.process_sms = process_sms
+        assert status == 500, "Failed ingest not reported!"
+        assert post_ingest(base, {'sms': "Rs.90 spent via UPI to Zomato"}) == 200, "Ingest failed!"
+        print(f"Ledger: {get_today_expenses()}")
+        assert get_today_expenses() == [90], "Failed request left expenses behind!"
+
+        # Each ingest builds on the files, not on the server's cached copy
+        add_expense(5)
+        assert post_ingest(base, {'sms': "Rs.10 spent via UPI to Zomato"}) == 200, "Ingest failed!"
+        assert get_today_expenses() == [90, 5, 10], "Ingest overwrote another writer's expense!"
+        with urlopen(base + '/summary') as response:
+            assert json.load(response)['total'] == 105, "Summary not refreshed after ingest!"
+    finally:
+        server.shutdown()
+        server.server_close()
+print("PASSED")
+
+# Test 19: Bulk Ingest
+print("\n[TEST 19] Bulk Ingest")
+print("-" * 60)
+from logic.bulk_ingest import ingest_lines
+from logic.expense_store import get_expense_details, load_expenses
+
+with temp_data_dir():
+    lines = [
+        "Rs.120 spent via UPI to Zomato",
+        "Rs.120 spent via UPI to Zomato",
+        '{"id": 7, "timestamp": "2026-01-18T09:30:00", "body": "INR 200 paid to Uber"}',
+        '{"id": 7, "timestamp": "2026-01-18T09:30:00", "body": "INR 200 paid to Uber"}',
+        "Your account credited with ₹500",
+    ]
+    reports = []
+    result = ingest_lines(lines, on_progress=reports.append, progress_interval=0)
+    print(f"Stored: {result['stored']}, duplicates: {result['duplicates']}, "
+          f"skipped: {result['skipped']}")
+
+    # Plain repeats are real purchases; the repeated message ID is not
+    assert get_today_expenses() == [120, 120], "Repeated purchase dropped!"
+    assert load_expenses().get('2026-01-18') == [200], "Message timestamp not used for the date!"
+    assert result['duplicates'] == 1, "Repeated message ID not deduplicated!"
+    assert reports[-1]['skipped'] == 1 and reports[-1]['read'] == 5, "Progress missed skipped lines!"
+
+    # Ingesting the same export again doesn't store its messages twice
+    again = ingest_lines(lines[2:4])
+    assert (again['stored'], again['duplicates']) == (0, 2), "Stored message ID ingested again!"
+    assert load_expenses().get('2026-01-18') == [200], "Re-ingest doubled the ledger!"
+
+    # Bulk-loaded expenses carry the same details as the daemon's
+    details = get_expense_details('2026-01-18')
+    print(f"Details: {details}")
+    assert [(row['amount'], row['sms_id'], row['merchant']) for row in details] == [(200, 7, 'Uber')], \
+        "Expense details not recorded!"
+
+    # Expenses stored without details still get a row
+    add_expense(40)
+    details = get_expense_details(datetime.now().strftime('%Y-%m-%d'))
+    assert [row['amount'] for row in details] == [120, 120, 40], "Details out of line with the ledger!"
+    assert details[-1]['merchant'] is None and details[-1]['sms_id'] is None, "Made-up details!"
+print("PASSED")
+
+# Test 20: Report Generator
+print("\n[TEST 20] Report Generator")
+print("-" * 60)
+from logic.report_generator import iter_day_rows, roll_up, write_report
+
+with temp_data_dir() as data_dir:
+    save_expenses({'2026-01-05': [100, 60], '2026-01-20': [150]})
+
+    # Month rows average over every calendar day in range
+    month = list(roll_up(iter_day_rows(), 'month', end='2026-01-31'))[0]
+    print(f"January: ₹{month['total']} over {month['days']} days, "
+          f"₹{month['average_per_day']}/day")
+    assert month['days'] == 31 and month['average_per_day'] == 10.0, "Average skipped zero-spend days!"
+    clipped = list(roll_up(iter_day_rows(start='2026-01-05', end='2026-01-24'), 'month',
+                           start='2026-01-05', end='2026-01-24'))[0]
+    assert clipped['days'] == 20, "Month not clipped to the report range!"
+
+    # Each day is summed from the ledger, including later additions
+    add_expenses([25], '2026-01-20')
+    day = [row for row in iter_day_rows() if row['period'] == '2026-01-20'][0]
+    assert (day['total'], day['expenses']) == (175, 2), "Day total wrong!"
+
+    for bad_range in (('2026-1-5', None), (None, '2026-02-30'), ('2026-02-01', '2026-01-01')):
+        try:
+            write_report(os.path.join(data_dir, 'report.csv'), 'month', *bad_range)
+            assert False, f"Accepted dates {bad_range}!"
+        except ValueError:
+            pass
+print("PASSED")
+
 # Final Summary
 print("\n" + "=" * 60)
 print("ALL TESTS PASSED!")